@@ -0,0 +1,3 @@
+"""
+Performance benchmarks of `typer_di`, run them with `python -m benchmarks`.
+"""
@@ -0,0 +1,37 @@
+import argparse
+import json
+from pathlib import Path
+from typing import List, Optional
+
+from .suite import Config, compare, format_result, run_all, to_json
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Run `typer_di` benchmarks.",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="write results as JSON")
+    parser.add_argument(
+        "--compare", type=Path, help="print ratios to results of a previous run"
+    )
+    parser.add_argument("--quick", action="store_true", help="run the smallest sizes once")
+    args = parser.parse_args(argv)
+
+    config = Config.quick() if args.quick else Config()
+    results = run_all(config)
+
+    for r in results:
+        print(format_result(r))
+
+    if args.compare is not None:
+        print(f"\nCompared to {args.compare}:")
+        for line in compare(results, json.loads(args.compare.read_text())):
+            print(line)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(to_json(results), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Generators of synthetic dependency graphs and apps.
+
+Graphs are generated as source code, so callbacks are plain module-level
+functions with real signatures (as in user apps).
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import typer
+
+from typer_di import Depends, TyperDI
+from typer_di.compat import Annotated
+
+SHAPES = ("wide", "deep", "diamond")
+
+
+class Graph(NamedTuple):
+    command: Callable[..., Any]
+    manual: Callable[..., Any]  # hand-written equivalent of DI wrapper
+    kwargs: Dict[str, Any]  # arguments of both functions
+
+
+class _Source(NamedTuple):
+    lines: List[str]  # definitions of dependencies
+    manual: List[str]  # statements of hand-written wrapper
+    params: List[str]  # CLI parameters of the graph
+    deps: List[str]  # dependencies of command
+    results: List[str]  # variables of `manual` passed to command
+
+
+def make_graph(shape: str, size: int) -> Graph:
+    """
+    Return command with `size` dependencies organized in `shape`:
+
+    * "wide" - command depends on all dependencies directly
+    * "deep" - each dependency depends on the previous one
+    * "diamond" - chain of diamonds, each `top` depends on `left` and `right`,
+      both depending on the previous `top`
+    """
+    if size < 1:
+        raise ValueError("Graph must have at least one dependency")
+    if shape == "wide":
+        src = _wide(size)
+    elif shape == "deep":
+        src = _deep(size)
+    elif shape == "diamond":
+        src = _diamond(size)
+    else:
+        raise ValueError(f"Unknown graph shape {shape!r}, expected one of {SHAPES}")
+
+    lines = list(src.lines)
+    command_args = ", ".join(f"v{i}: int = Depends({d})" for i, d in enumerate(src.deps))
+    # long `a + b + ...` expressions overflow the compiler stack
+    command_body = "sum((" + "".join(f"v{i}, " for i in range(len(src.deps))) + "))"
+    lines.append(f"def command({command_args}) -> int:\n    return {command_body}\n")
+
+    manual_call = ", ".join(f"v{i}={r}" for i, r in enumerate(src.results))
+    lines.append(
+        f"def manual({', '.join(src.params)}):\n"
+        + "".join(f"    {line}\n" for line in src.manual)
+        + f"    return command({manual_call})\n"
+    )
+
+    namespace = _exec("\n".join(lines))
+    kwargs = {p: i for i, p in enumerate(src.params)}
+    return Graph(namespace["command"], namespace["manual"], kwargs)
+
+
+def make_app(commands: int, *, lazy: bool = False) -> TyperDI:
+    """
+    Return app with `commands` commands sharing a small dependency graph.
+    """
+    app = TyperDI(lazy=lazy)
+    namespace = _exec(
+        "\n".join(
+            f"def command_{i}(client: str = Depends(get_client), x{i}: int = 0):\n"
+            f"    pass\n"
+            for i in range(commands)
+        )
+    )
+    for i in range(commands):
+        app.command(f"command-{i}")(namespace[f"command_{i}"])
+    return app
+
+
+def get_config(config: Annotated[str, typer.Option("--config")] = "cfg") -> str:
+    return config
+
+
+def get_client(cfg: str = Depends(get_config), retries: int = 3) -> str:
+    return cfg
+
+
+def _wide(size: int) -> _Source:
+    return _Source(
+        lines=[f"def d{i}(p{i}: int) -> int:\n    return p{i}\n" for i in range(size)],
+        manual=[f"r{i} = d{i}(p{i}=p{i})" for i in range(size)],
+        params=[f"p{i}" for i in range(size)],
+        deps=[f"d{i}" for i in range(size)],
+        results=[f"r{i}" for i in range(size)],
+    )
+
+
+def _deep(size: int) -> _Source:
+    lines = ["def d0(p0: int) -> int:\n    return p0\n"]
+    manual = ["r0 = d0(p0=p0)"]
+    for i in range(1, size):
+        lines.append(
+            f"def d{i}(prev: int = Depends(d{i - 1}), p{i}: int = 0) -> int:\n"
+            f"    return prev + p{i}\n"
+        )
+        manual.append(f"r{i} = d{i}(prev=r{i - 1}, p{i}=p{i})")
+    return _Source(
+        lines=lines,
+        manual=manual,
+        params=[f"p{i}" for i in range(size)],
+        deps=[f"d{size - 1}"],
+        results=[f"r{size - 1}"],
+    )
+
+
+def _diamond(size: int) -> _Source:
+    # each diamond adds 3 callbacks
+    count = max(size // 3, 1)
+    lines = ["def top0(p0: int) -> int:\n    return p0\n"]
+    manual = ["t0 = top0(p0=p0)"]
+    for i in range(1, count):
+        lines.append(
+            f"def left{i}(top: int = Depends(top{i - 1}), p{i}: int = 0) -> int:\n"
+            f"    return top + p{i}\n"
+            f"def right{i}(top: int = Depends(top{i - 1})) -> int:\n"
+            f"    return top\n"
+            f"def top{i}(\n"
+            f"    left: int = Depends(left{i}), right: int = Depends(right{i})\n"
+            f") -> int:\n"
+            f"    return left + right\n"
+        )
+        manual += [
+            f"l{i} = left{i}(top=t{i - 1}, p{i}=p{i})",
+            f"r{i} = right{i}(top=t{i - 1})",
+            f"t{i} = top{i}(left=l{i}, right=r{i})",
+        ]
+    return _Source(
+        lines=lines,
+        manual=manual,
+        params=[f"p{i}" for i in range(count)],
+        deps=[f"top{count - 1}"],
+        results=[f"t{count - 1}"],
+    )
+
+
+def _exec(source: str) -> Dict[str, Any]:
+    namespace: Dict[str, Any] = {
+        "__name__": "benchmarks.generated",
+        "Depends": Depends,
+        "get_client": get_client,
+    }
+    exec(compile(source, "<benchmarks.generated>", "exec"), namespace)
+    return namespace
@@ -0,0 +1,201 @@
+"""
+Benchmarks of wrappers build time, call overhead and app startup.
+"""
+
+import gc
+import os
+import subprocess
+import sys
+import timeit
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import typer
+
+from typer_di import clear_resolution_cache, create_di_wrapper
+
+from .graphs import SHAPES, make_app, make_graph
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+
+@dataclass
+class Result:
+    name: str
+    params: Dict[str, Any]
+    value: float
+    unit: str
+
+
+@dataclass
+class Config:
+    graph_sizes: List[int] = field(default_factory=lambda: [10, 100, 500])
+    app_sizes: List[int] = field(default_factory=lambda: [10, 100, 1000, 5000])
+    repeat: int = 5
+
+    @classmethod
+    def quick(cls) -> "Config":
+        return cls(graph_sizes=[10], app_sizes=[10], repeat=1)
+
+
+def run_all(config: Config) -> List[Result]:
+    results: List[Result] = []
+    for shape in SHAPES:
+        for size in config.graph_sizes:
+            results += bench_build(shape, size, config.repeat)
+            results += bench_call(shape, size, config.repeat)
+    for commands in config.app_sizes:
+        for lazy in (False, True):
+            results += bench_app(commands, lazy, config.repeat)
+    results += bench_import(config.repeat)
+    return results
+
+
+def bench_build(shape: str, size: int, repeat: int) -> List[Result]:
+    """
+    Time of `create_di_wrapper` with empty (cold) and filled (warm) resolution cache.
+    """
+    graph = make_graph(shape, size)
+    params = {"shape": shape, "size": size}
+
+    def build_cold() -> None:
+        clear_resolution_cache()
+        create_di_wrapper(graph.command)
+
+    def build_warm() -> None:
+        create_di_wrapper(graph.command)
+
+    return [
+        Result("build_cold", params, _best(build_cold, repeat), "s"),
+        Result("build_warm", params, _best(build_warm, repeat), "s"),
+    ]
+
+
+def bench_call(shape: str, size: int, repeat: int) -> List[Result]:
+    """
+    Time of a wrapper call compared to hand-written equivalent.
+    """
+    graph = make_graph(shape, size)
+    wrapper = create_di_wrapper(graph.command)
+    params = {"shape": shape, "size": size}
+
+    def call_wrapper() -> None:
+        wrapper(**graph.kwargs)
+
+    def call_manual() -> None:
+        graph.manual(**graph.kwargs)
+
+    wrapper_time = _best(call_wrapper, repeat, number=1000)
+    manual_time = _best(call_manual, repeat, number=1000)
+    return [
+        Result("call_wrapper", params, wrapper_time, "s"),
+        Result("call_manual", params, manual_time, "s"),
+        Result("call_overhead", params, wrapper_time / manual_time, "ratio"),
+    ]
+
+
+def bench_app(commands: int, lazy: bool, repeat: int) -> List[Result]:
+    """
+    Time and peak memory of commands registration and click command construction.
+    """
+    params = {"commands": commands, "lazy": lazy}
+
+    def register() -> None:
+        clear_resolution_cache()
+        make_app(commands, lazy=lazy)
+
+    def startup() -> None:
+        clear_resolution_cache()
+        typer.main.get_command(make_app(commands, lazy=lazy))
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        startup()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return [
+        Result("app_register", params, _best(register, repeat), "s"),
+        Result("app_startup", params, _best(startup, repeat), "s"),
+        Result("app_peak_memory", params, peak, "bytes"),
+    ]
+
+
+def bench_import(repeat: int) -> List[Result]:
+    """
+    Time of `import typer_di` in a fresh interpreter.
+    """
+    code = (
+        "import time; start = time.perf_counter(); import typer_di; "
+        "print(time.perf_counter() - start)"
+    )
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=env,
+        ).stdout
+        timings.append(float(output))
+
+    return [Result("import", {}, min(timings), "s")]
+
+
+def to_json(results: List[Result]) -> Dict[str, Any]:
+    return {
+        "typer_di": _get_version(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "results": [asdict(r) for r in results],
+    }
+
+
+def compare(results: List[Result], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Format ratios of `results` to the same measurements in `baseline` JSON.
+    """
+    known = {
+        (r["name"], _params_key(r["params"])): r["value"] for r in baseline["results"]
+    }
+    lines = []
+    for r in results:
+        old = known.get((r.name, _params_key(r.params)))
+        if old:
+            lines.append(f"{_format_name(r):<46} {r.value / old:>8.2f}x")
+    return lines
+
+
+def format_result(r: Result) -> str:
+    return f"{_format_name(r):<46} {r.value:>14.6g} {r.unit}"
+
+
+def _format_name(r: Result) -> str:
+    params = " ".join(f"{k}={v}" for k, v in r.params.items())
+    return f"{r.name:<16} {params}"
+
+
+def _params_key(params: Dict[str, Any]) -> str:
+    return repr(sorted(params.items()))
+
+
+def _get_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("typer-di")
+    except Exception:
+        return "unknown"  # running from sources
+
+
+def _best(func: Callable[[], None], repeat: int, number: int = 1) -> float:
+    # the minimum is the least affected by other processes
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
@@ -1,4 +1,86 @@
-from ._create_di_wrapper import *
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+# `Depends` is used by shared dependency modules, that don't build CLI,
+# so it is imported eagerly and everything else (`typer` included) on first access
 from ._depends import *
-from ._method_builder import *
-from ._typer_di import *
+
+if TYPE_CHECKING:
+    from ._create_di_wrapper import *
+    from ._freeze import *
+    from ._instrumentation import *
+    from ._lazy import *
+    from ._memo import *
+    from ._method_builder import *
+    from ._parallel import *
+    from ._plan import *
+    from ._persist import *
+    from ._resolution_cache import *
+    from ._scopes import *
+    from ._sources import *
+    from ._typer_di import *
+
+_SUBMODULES: Dict[str, Tuple[str, ...]] = {
+    "._create_di_wrapper": ("TyperDIError", "compile_plan", "create_di_wrapper"),
+    "._freeze": ("freeze_app", "load_frozen_wrapper"),
+    "._instrumentation": ("DependencyInfo", "set_instrumentation_hooks"),
+    "._lazy": ("Lazy",),
+    "._memo": ("MemoInfo", "Memoize"),
+    "._method_builder": ("MethodBuilder", "MethodBuilderError", "copy_func_attrs"),
+    "._parallel": ("set_parallel_executor",),
+    "._plan": ("DependencyPlan", "PlanNode"),
+    "._persist": ("clear_persistent_cache", "set_persistent_cache"),
+    "._resolution_cache": ("clear_resolution_cache", "invalidate_resolution_cache"),
+    "._scopes": ("clear_process_scope", "dependency_context"),
+    "._sources": ("set_named_wrappers", "set_source_dump_dir"),
+    "._typer_di": ("TyperDI",),
+}
+
+_LAZY_NAMES: Dict[str, str] = {
+    name: module for module, names in _SUBMODULES.items() for name in names
+}
+
+__all__ = [
+    "Depends",
+    "DependsType",
+    "Scope",
+    "TyperDIError",
+    "compile_plan",
+    "create_di_wrapper",
+    "freeze_app",
+    "load_frozen_wrapper",
+    "DependencyInfo",
+    "set_instrumentation_hooks",
+    "Lazy",
+    "MemoInfo",
+    "Memoize",
+    "MethodBuilder",
+    "MethodBuilderError",
+    "copy_func_attrs",
+    "set_parallel_executor",
+    "DependencyPlan",
+    "PlanNode",
+    "clear_persistent_cache",
+    "set_persistent_cache",
+    "clear_resolution_cache",
+    "invalidate_resolution_cache",
+    "clear_process_scope",
+    "dependency_context",
+    "set_named_wrappers",
+    "set_source_dump_dir",
+    "TyperDI",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # don't get here next time
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_NAMES))
@@ -0,0 +1,148 @@
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Optional
+
+import typer
+
+from . import _persist, _server
+from ._batch import run_batch
+from ._depends import Depends
+from ._freeze import freeze_app
+from ._imports import import_object
+from ._typer_di import TyperDI
+from .compat import Annotated
+
+app = TyperDI(help="Tools for apps built with `typer_di`.", add_completion=False)
+
+cache_app = TyperDI(help="Inspect or clear results of `Depends(..., persist=True)`.")
+app.add_typer(cache_app, name="cache")
+
+
+@app.callback()
+def main() -> None:
+    ...
+
+
+@app.command()
+def freeze(
+    app_path: Annotated[
+        str, typer.Argument(help="TyperDI app to freeze in form 'module:app'.")
+    ],
+    output: Annotated[
+        Path, typer.Option("--output", "-o", help="Path of generated module.")
+    ],
+) -> None:
+    """
+    Generate a module with precompiled DI wrappers of all app commands.
+
+    Load it with `TyperDI(frozen="package.module")`.
+    """
+    target = import_object(app_path)
+    if not isinstance(target, TyperDI):
+        raise typer.BadParameter(f"'{app_path}' is not a TyperDI app")
+
+    output.write_text(freeze_app(target), encoding="utf-8")
+
+
+@app.command()
+def batch(
+    app_path: Annotated[
+        str, typer.Argument(help="Typer app to run in form 'module:app'.")
+    ],
+    input_file: Annotated[
+        Optional[Path],
+        typer.Argument(help="File with a command line per line (default: stdin)."),
+    ] = None,
+    output: Annotated[
+        Optional[Path],
+        typer.Option("--output", "-o", help="File of JSON results (default: stdout)."),
+    ] = None,
+    prog_name: Annotated[
+        Optional[str], typer.Option("--prog-name", help="Program name shown in usage.")
+    ] = None,
+) -> None:
+    """
+    Run command lines of an app in a single process and report results as JSON lines.
+
+    Exit code is 1 if any of the commands failed.
+    """
+    target = import_object(app_path)
+    if not isinstance(target, typer.Typer):
+        raise typer.BadParameter(f"'{app_path}' is not a Typer app")
+
+    with ExitStack() as stack:
+        lines = sys.stdin
+        if input_file is not None:
+            lines = stack.enter_context(input_file.open(encoding="utf-8"))
+        results = sys.stdout
+        if output is not None:
+            results = stack.enter_context(output.open("w", encoding="utf-8"))
+
+        failed = run_batch(target, lines, results, prog_name=prog_name)
+
+    if failed:
+        raise typer.Exit(1)
+
+
+@app.command()
+def serve(
+    app_path: Annotated[
+        str, typer.Argument(help="Typer app to serve in form 'module:app'.")
+    ],
+    idle_timeout: Annotated[
+        float,
+        typer.Option("--idle-timeout", help="Exit after this many seconds without requests."),
+    ] = _server.DEFAULT_IDLE_TIMEOUT,
+) -> None:
+    """
+    Keep the app loaded and run its commands for `python -m typer_di.client`.
+
+    Normally the server is started by the client itself.
+    """
+    _server.serve(app_path, idle_timeout=idle_timeout)
+
+
+def get_cache_dir(
+    directory: Annotated[
+        Optional[Path],
+        typer.Option("--dir", help="Cache directory (default: $TYPER_DI_CACHE_DIR)."),
+    ] = None,
+) -> Path:
+    if directory is not None:
+        _persist.set_persistent_cache(directory)
+    return _persist.get_cache_dir()
+
+
+@cache_app.command()
+def info(cache_dir: Path = Depends(get_cache_dir)) -> None:
+    """
+    Show location and size of the cache.
+    """
+    entries = _persist.list_entries()
+    size = sum(e.size for e in entries)
+    typer.echo(f"Directory: {cache_dir}")
+    typer.echo(f"Entries: {len(entries)}")
+    typer.echo(f"Size: {_format_size(size)} of {_format_size(_persist.get_max_size())}")
+
+
+@cache_app.command()
+def clear(cache_dir: Path = Depends(get_cache_dir)) -> None:
+    """
+    Remove all cached dependency results.
+    """
+    count = len(_persist.list_entries())
+    _persist.clear_persistent_cache()
+    typer.echo(f"Removed {count} entries from {cache_dir}")
+
+
+def _format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,100 @@
+import io
+import json
+import shlex
+import sys
+import traceback
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+
+import click
+import typer
+
+__all__ = ["get_exit_code", "run_batch"]
+
+
+def run_batch(
+    app: typer.Typer,
+    lines: Iterable[str],
+    output: TextIO,
+    *,
+    prog_name: Optional[str] = None,
+) -> int:
+    """
+    Run each line of `lines` as command line arguments of `app` in this process.
+
+    For every line a JSON object with `line`, `argv`, `exit_code`, `stdout` and
+    `stderr` is written to `output`. Empty lines and lines starting with `#` are
+    skipped. Return number of failed lines.
+    """
+    # click command and compiled wrappers are shared by all lines
+    command = typer.main.get_command(app)
+
+    failed = 0
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        result = _run_line(command, line, prog_name)
+        result["line"] = lineno
+        if result["exit_code"] != 0:
+            failed += 1
+
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+    return failed
+
+
+def _run_line(
+    command: click.Command, line: str, prog_name: Optional[str]
+) -> Dict[str, Any]:
+    try:
+        argv = shlex.split(line)
+    except ValueError as ex:  # unbalanced quotes
+        return {
+            "argv": None,
+            "exit_code": 2,
+            "stdout": "",
+            "stderr": f"Error: can't parse line: {ex}\n",
+        }
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    with _redirect_stdio(stdout, stderr):
+        try:
+            command.main(args=argv, prog_name=prog_name, standalone_mode=True)
+            exit_code = 0
+        except SystemExit as ex:
+            exit_code = get_exit_code(ex)
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+
+    return {
+        "argv": argv,
+        "exit_code": exit_code,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+    }
+
+
+def get_exit_code(ex: SystemExit) -> int:
+    if ex.code is None:
+        return 0
+    if isinstance(ex.code, int):
+        return ex.code
+    # `sys.exit("message")`
+    sys.stderr.write(f"{ex.code}\n")
+    return 1
+
+
+@contextmanager
+def _redirect_stdio(stdout: TextIO, stderr: TextIO) -> Iterator[None]:
+    # commands must not consume lines of the batch when it is read from stdin
+    saved = sys.stdin, sys.stdout, sys.stderr
+    sys.stdin, sys.stdout, sys.stderr = io.StringIO(), stdout, stderr
+    try:
+        yield
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = saved
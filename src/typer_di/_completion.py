@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Union
+
+import click
+import typer
+
+from .completion import INDEX_FORMAT
+
+__all__ = ["build_index"]
+
+
+def build_index(app: typer.Typer) -> Dict[str, Any]:
+    """
+    Describe commands, options and arguments of `app` for `typer_di.completion`.
+
+    Values of parameters with custom completion are marked "dynamic", completion
+    of them falls back to the app itself.
+    """
+    command = typer.main.get_command(app)
+    ctx = click.Context(command, info_name=command.name, resilient_parsing=True)
+    return {"format": INDEX_FORMAT, "root": _describe_command(command, ctx)}
+
+
+def _describe_command(command: click.Command, ctx: click.Context) -> Dict[str, Any]:
+    options: List[Dict[str, Any]] = []
+    arguments: List[Dict[str, Any]] = []
+    for param in command.get_params(ctx):
+        if isinstance(param, click.Option):
+            if param.hidden:
+                continue
+            options.append(
+                {
+                    "names": [*param.opts, *param.secondary_opts],
+                    "help": param.help,
+                    "takes_value": not (param.is_flag or param.count),
+                    "multiple": param.multiple,
+                    "values": _describe_values(param),
+                }
+            )
+        elif isinstance(param, click.Argument):
+            arguments.append({"nargs": param.nargs, "values": _describe_values(param)})
+
+    node: Dict[str, Any] = {
+        "help": command.get_short_help_str(),
+        "hidden": command.hidden,
+        "options": options,
+        "arguments": arguments,
+    }
+
+    if isinstance(command, click.MultiCommand):
+        commands = {}
+        for name in command.list_commands(ctx):
+            sub_command = command.get_command(ctx, name)
+            if sub_command is None:
+                continue
+            sub_ctx = click.Context(
+                sub_command, info_name=name, parent=ctx, resilient_parsing=True
+            )
+            commands[name] = _describe_command(sub_command, sub_ctx)
+        node["commands"] = commands
+
+    return node
+
+
+def _describe_values(param: click.Parameter) -> Union[None, str, Dict[str, Any]]:
+    if getattr(param, "_custom_shell_complete", None) is not None:
+        return "dynamic"
+
+    param_type = param.type
+    if isinstance(param_type, click.Choice):
+        return {
+            "choices": [str(c) for c in param_type.choices],
+            "case_sensitive": param_type.case_sensitive,
+        }
+    if isinstance(param_type, (click.Path, click.File)):
+        return "path"
+    if type(param_type).shell_complete is not click.ParamType.shell_complete:
+        return "dynamic"
+    return None
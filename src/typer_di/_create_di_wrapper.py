@@ -1,99 +1,288 @@
-from dataclasses import dataclass, field
-from inspect import Parameter, Signature
-from typing import Dict, Optional, Union
+from inspect import Parameter, iscoroutinefunction
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
+from . import _instrumentation
 from ._depends import Callback, DependsType
+from ._memo import Memoize, get_memo, get_override_cache
 from ._method_builder import MethodBuilder, copy_func_attrs
-from .compat import signature
+from ._plan import DependencyPlan, PlanNode, get_node
+from ._resolution_cache import resolve_callback
+from ._sources import get_named_wrappers
 
 __all__ = [
+    "compile_plan",
     "create_di_wrapper",
     "TyperDIError",
 ]
 
+_T = TypeVar("_T")
+
 
 class TyperDIError(Exception):
     def __init__(self, message: str):
         super().__init__(message)
 
 
-def create_di_wrapper(func: Callback) -> Callback:
-    ctx = _Context()
-    _invoke_recursive(ctx, func)
-    _sort_params(ctx)
-    wrapper = ctx.builder.build()
+def create_di_wrapper(
+    func: Callback,
+    *,
+    parallel: bool = False,
+    overrides: Optional[Mapping[Callback, Callback]] = None,
+) -> Callback:
+    """
+    Bake the whole dependency graph of `func` to a single function.
+
+    With `parallel=True` all blocking dependencies are treated as `Depends(..., parallel=True)`.
+    `overrides` replace dependencies (with their whole sub-graphs) by other callbacks.
+
+    Functions without dependencies are returned as is, there is nothing to inject.
+    """
+    plan = compile_plan(func, overrides=overrides)
+    instrument = _instrumentation.is_enabled()
+    if not instrument and _is_plain(plan):
+        return func
+
+    builder = MethodBuilder.from_plan(plan, parallel=parallel, instrument=instrument)
+    # named wrappers can't share code of identically shaped graphs
+    wrapper = builder.build(func if get_named_wrappers() else None)
     copy_func_attrs(wrapper, func)
     return wrapper
 
 
-@dataclass
-class _Context:
-    builder: MethodBuilder = field(default_factory=MethodBuilder)
-    known_invokes: Dict[Callback, Union[str, None]] = field(default_factory=dict)
+def create_di_builder(
+    func: Callback,
+    *,
+    parallel: bool = False,
+    instrument: Optional[bool] = None,
+    overrides: Optional[Mapping[Callback, Callback]] = None,
+) -> MethodBuilder:
+    """
+    Return builder with the whole dependency graph of `func` baked in.
+
+    Each callback is invoked once in dependency order, `func` is invoked last.
+    Calls are instrumented when hooks are set, unless `instrument` says otherwise.
+    """
+    if instrument is None:
+        instrument = _instrumentation.is_enabled()
+    return MethodBuilder.from_plan(
+        compile_plan(func, overrides=overrides), parallel=parallel, instrument=instrument
+    )
 
 
-def _invoke_recursive(ctx: _Context, func: Callback) -> str:
+def compile_plan(
+    func: Callback, *, overrides: Optional[Mapping[Callback, Callback]] = None
+) -> DependencyPlan:
     """
-    Invoke `func` recursively and return the name of the result variable.
+    Return plan of the wrapper of `func`.
+
+    Plans are cached, nodes of callbacks and sub-graphs of already compiled
+    callbacks are reused by all plans that include them. Plans with `overrides`
+    are compiled from scratch.
     """
-    # don't call the same dependency callback twice
-    if func in ctx.known_invokes:
-        result = ctx.known_invokes[func]
-        if result is None:
-            # cycle found
-            raise TyperDIError(
-                f'Found cycle in dependency graph around method "{func.__qualname__}"'
-            )
+    if overrides:
+        return _compile_plan(func, overrides)
 
-        return result
+    resolved = resolve_callback(func)
+    if resolved.plan is None:
+        resolved.plan = _compile_plan(func, {})
+    return resolved.plan
 
-    ctx.known_invokes[func] = None  # mark this dependency as being processed
 
-    sig = signature(func, eval_str=True)
+def _compile_plan(func: Callback, overrides: Mapping[Callback, Callback]) -> DependencyPlan:
+    nodes = tuple(
+        _override_node(get_node(callback), overrides)
+        for callback in _get_subgraph(func, overrides)
+    )
 
-    kwargs = {}
+    scopes: Dict[Callback, str] = {}
+    parallel_callbacks: Set[Callback] = set()
+    persistent_callbacks: Set[Callback] = set()
+    memo_caches: Dict[Callback, Optional[Memoize]] = {}
+    for node in nodes:
+        for _, depends_type in node.dependencies:
+            if depends_type.parallel:
+                parallel_callbacks.add(depends_type.callback)
+            if depends_type.persist:
+                persistent_callbacks.add(depends_type.callback)
+            _set_scope(scopes, depends_type)
+            _set_memo(memo_caches, depends_type)
 
-    for param in sig.parameters.values():
-        arg_name = param.name
-        depends_type = _parse_dependency(param)
-        if depends_type is not None:
-            kwargs[arg_name] = _invoke_recursive(ctx, depends_type.callback)
-            continue
+    # most plans have none of these, share empty containers between them
+    return DependencyPlan(
+        nodes=nodes,
+        parameters=_merge_params(nodes),
+        scopes=_freeze_mapping(
+            {cb: scope for cb, scope in scopes.items() if scope != "invocation"}
+        ),
+        parallel_callbacks=frozenset(parallel_callbacks) or _NO_CALLBACKS,
+        persistent_callbacks=frozenset(persistent_callbacks) or _NO_CALLBACKS,
+        memo_caches=_freeze_mapping(
+            {cb: memo for cb, memo in memo_caches.items() if memo is not None}
+        ),
+    )
 
-        # make sure that all name are unique
-        if any(param.name == p.name for p in ctx.builder.params):
-            raise TyperDIError(
-                f"Duplicated parameter name '{param.name}'.\n"
-                f"Please, make sure to have unique names in the whole dependency tree."
-            )
 
-        # add param to wrapper
-        ctx.builder.add_param(
-            param.name,
-            param.annotation,
-            default=param.default,
-        )
-        kwargs[arg_name] = param.name
+_NO_CALLBACKS: FrozenSet[Callback] = frozenset()
+_EMPTY_MAPPING: Mapping[Any, Any] = MappingProxyType({})
 
-    result = ctx.builder.invoke(func, kwargs)
-    ctx.known_invokes[func] = result
-    return result
 
+def _freeze_mapping(mapping: Dict[Callback, _T]) -> Mapping[Callback, _T]:
+    if not mapping:
+        return _EMPTY_MAPPING
+    return MappingProxyType(mapping)
 
-def _parse_dependency(param: Parameter) -> Optional[DependsType]:
-    if isinstance(param.default, DependsType):
-        return param.default
 
-    metadata = getattr(param.annotation, "__metadata__", ())
-    for p in metadata:
-        if isinstance(p, DependsType):
-            return p
+def _is_plain(plan: DependencyPlan) -> bool:
+    # `async` commands still need a wrapper that runs them
+    if len(plan.nodes) != 1 or iscoroutinefunction(plan.root.callback):
+        return False
+    return all(p.kind in _PLAIN_KINDS for p in plan.parameters)
 
-    return None
 
+_PLAIN_KINDS = (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY)
 
-def _sort_params(ctx: _Context) -> None:
-    # move params with defaults to the end
-    ctx.builder.params.sort(
-        key=lambda p: p.default != Signature.empty,
+
+def _override_node(node: PlanNode, overrides: Mapping[Callback, Callback]) -> PlanNode:
+    if not any(d.callback in overrides for _, d in node.dependencies):
+        return node
+
+    return PlanNode(
+        node.callback,
+        node.arguments,
+        node.params,
+        tuple((arg, _override_dependency(d, overrides)) for arg, d in node.dependencies),
+        node.lazy_args,
+    )
+
+
+def _override_dependency(
+    depends_type: DependsType, overrides: Mapping[Callback, Callback]
+) -> DependsType:
+    override = overrides.get(depends_type.callback)
+    if override is None:
+        return depends_type
+
+    return DependsType(
+        override,
+        parallel=depends_type.parallel,
+        scope=depends_type.scope,
+        lazy=depends_type.lazy,
+        persist=depends_type.persist,
+        cache=get_override_cache(depends_type.cache, override),
     )
+
+
+def _set_scope(scopes: Dict[Callback, str], depends_type: DependsType) -> None:
+    callback = depends_type.callback
+    scope = scopes.setdefault(callback, depends_type.scope)
+    if scope != depends_type.scope:
+        raise TyperDIError(
+            f'Conflicting scopes "{scope}" and "{depends_type.scope}" '
+            f'of dependency "{callback.__qualname__}"'
+        )
+
+
+def _set_memo(
+    memo_caches: Dict[Callback, Optional[Memoize]], depends_type: DependsType
+) -> None:
+    callback = depends_type.callback
+    memo = get_memo(depends_type)
+    if memo_caches.setdefault(callback, memo) is not memo:
+        raise TyperDIError(
+            f'Conflicting caches of dependency "{callback.__qualname__}", '
+            "use the same `cache` in all `Depends`"
+        )
+
+
+def _merge_params(nodes: Tuple[PlanNode, ...]) -> Tuple[Parameter, ...]:
+    params: List[Parameter] = []
+    names: Set[str] = set()
+    for node in nodes:
+        for param in node.params:
+            # make sure that all name are unique
+            if param.name in names:
+                raise TyperDIError(
+                    f"Duplicated parameter name '{param.name}'.\n"
+                    f"Please, make sure to have unique names in the whole dependency tree."
+                )
+            names.add(param.name)
+            params.append(param)
+
+    # move params with defaults to the end
+    params.sort(key=lambda p: p.default is not Parameter.empty)
+    return tuple(params)
+
+
+def _get_subgraph(
+    func: Callback, overrides: Mapping[Callback, Callback]
+) -> Tuple[Callback, ...]:
+    """
+    Return all callbacks that `func` depends on in invocation order (`func` is the last one).
+
+    Graph is walked depth-first with an explicit stack, so deep chains don't hit
+    the recursion limit. Result is cached, subgraphs cached by earlier walks are reused
+    (unless there are `overrides`, that may change sub-graphs of any callback).
+    """
+    resolved = resolve_callback(func)
+    if resolved.subgraph is not None and not overrides:
+        return resolved.subgraph
+
+    subgraph: List[Callback] = []
+    known: Set[Callback] = set()
+
+    # callbacks being processed and iterators over their remaining dependencies
+    path: List[Callback] = [func]
+    on_path: Set[Callback] = {func}
+    pending: List[Iterator[DependsType]] = [iter(resolved.dependencies.values())]
+
+    while pending:
+        depends_type = next(pending[-1], None)
+        if depends_type is None:
+            # all dependencies are known, invoke callback after them
+            pending.pop()
+            callback = path.pop()
+            on_path.discard(callback)
+            known.add(callback)
+            subgraph.append(callback)
+            continue
+
+        callback = overrides.get(depends_type.callback, depends_type.callback)
+        if callback in known:
+            continue  # don't call the same dependency callback twice
+
+        if callback in on_path:
+            cycle = path[path.index(callback) :] + [callback]
+            raise TyperDIError(
+                f'Found cycle in dependency graph around method "{callback.__qualname__}": '
+                + " -> ".join(cb.__qualname__ for cb in cycle)
+            )
+
+        dep_resolved = resolve_callback(callback)
+        if dep_resolved.subgraph is not None and not overrides:
+            for cb in dep_resolved.subgraph:
+                if cb not in known:
+                    known.add(cb)
+                    subgraph.append(cb)
+            continue
+
+        path.append(callback)
+        on_path.add(callback)
+        pending.append(iter(dep_resolved.dependencies.values()))
+
+    if overrides:
+        return tuple(subgraph)
+
+    resolved.subgraph = tuple(subgraph)
+    return resolved.subgraph
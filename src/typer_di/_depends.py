@@ -1,28 +1,184 @@
-from typing import TYPE_CHECKING, Any, Callable, TypeVar
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Literal,
+    Optional,
+    TypeVar,
+    Union,
+    overload,
+)
 
-from .compat import TypeAlias
+# keep this module import-light, it is imported by `typer_di` eagerly
+if TYPE_CHECKING:
+    from ._memo import Memoize
+    from .compat import TypeAlias
 
 __all__ = [
     "Depends",
     "DependsType",
+    "Scope",
 ]
 
 
-Callback: TypeAlias = Callable[..., Any]
+Callback: "TypeAlias" = Callable[..., Any]
+
+# "invocation" - called once per wrapper call,
+# "context" - shared by group callbacks and commands of a single click invocation,
+# "process" - called once per process
+Scope: "TypeAlias" = Literal["invocation", "context", "process"]
+
+_SCOPES = ("invocation", "context", "process")
 
 
 class DependsType:
-    def __init__(self, callback: Callback) -> None:
-        self.callback = callback
+    def __init__(
+        self,
+        callback: Union[Callback, str],
+        *,
+        parallel: bool = False,
+        scope: Scope = "invocation",
+        lazy: bool = False,
+        persist: bool = False,
+        cache: "Union[bool, Memoize]" = False,
+        stub: Optional[Callback] = None,
+    ) -> None:
+        if scope not in _SCOPES:
+            raise ValueError(f"Unknown scope {scope!r}, expected one of {_SCOPES}")
+        if cache is not False and scope != "invocation":
+            raise ValueError(f"Cached dependency can't have {scope!r} scope")
+
+        # dependencies referenced as "module:func" are imported on demand
+        self.path: Optional[str] = None
+        self._callback: Optional[Callback] = None
+        if isinstance(callback, str):
+            module_name, sep, qualname = callback.partition(":")
+            if not sep or not module_name or not qualname:
+                raise ValueError(
+                    f"Invalid dependency path '{callback}', expected 'module:func'"
+                )
+            self.path = callback
+            if stub is not None:
+                from ._references import make_reference
+
+                self._callback = make_reference(callback, stub)
+        elif stub is not None:
+            raise ValueError("`stub` is supported only by dependencies passed by path")
+        else:
+            self._callback = callback
+
+        self.parallel = parallel
+        self.scope = scope
+        self.lazy = lazy
+        self.persist = persist
+        self.cache = cache
+
+    @property
+    def callback(self) -> Callback:
+        """
+        Dependency callback, ones passed by path without `stub` are imported here.
+        """
+        if self._callback is None:
+            from ._imports import import_object
+
+            assert self.path is not None
+            self._callback = import_object(self.path)
+        return self._callback
+
+    def __repr__(self) -> str:
+        # keep it stable between runs, it is a part of frozen wrappers fingerprint
+        if self.path is not None:
+            target = self.path
+        else:
+            module = getattr(self.callback, "__module__", None)
+            qualname = getattr(self.callback, "__qualname__", repr(self.callback))
+            target = f"{module}:{qualname}"
+        options = ""
+        if self.parallel:
+            options += ", parallel=True"
+        if self.scope != "invocation":
+            options += f", scope={self.scope!r}"
+        if self.lazy:
+            options += ", lazy=True"
+        if self.persist:
+            options += ", persist=True"
+        if self.cache is not False:
+            options += f", cache={self.cache!r}"
+        return f"Depends({target}{options})"
 
 
 if TYPE_CHECKING:
+    from ._lazy import Lazy
+
     _T = TypeVar("_T")
 
-    def Depends(func: Callable[..., _T]) -> _T:
+    @overload
+    def Depends(
+        func: Callable[..., _T],
+        *,
+        parallel: bool = False,
+        scope: Scope = "invocation",
+        lazy: Literal[False] = False,
+        persist: bool = False,
+        cache: "Union[bool, Memoize]" = False,
+    ) -> _T:
+        ...
+
+    @overload
+    def Depends(
+        func: Callable[..., _T],
+        *,
+        parallel: bool = False,
+        scope: Scope = "invocation",
+        lazy: Literal[True],
+        persist: bool = False,
+        cache: "Union[bool, Memoize]" = False,
+    ) -> Lazy[_T]:
+        ...
+
+    @overload
+    def Depends(
+        func: str,
+        *,
+        parallel: bool = False,
+        scope: Scope = "invocation",
+        lazy: bool = False,
+        persist: bool = False,
+        cache: "Union[bool, Memoize]" = False,
+        stub: Optional[Callback] = None,
+    ) -> Any:
+        ...
+
+    def Depends(
+        func: Union[Callable[..., _T], str],
+        *,
+        parallel: bool = False,
+        scope: Scope = "invocation",
+        lazy: bool = False,
+        persist: bool = False,
+        cache: "Union[bool, Memoize]" = False,
+        stub: Optional[Callback] = None,
+    ) -> Any:
         ...
 
 else:
 
-    def Depends(func: Callback):
-        return DependsType(func)  # type: ignore
+    def Depends(
+        func: Union[Callback, str],
+        *,
+        parallel: bool = False,
+        scope: Scope = "invocation",
+        lazy: bool = False,
+        persist: bool = False,
+        cache=False,
+        stub=None,
+    ):
+        return DependsType(  # type: ignore
+            func,
+            parallel=parallel,
+            scope=scope,
+            lazy=lazy,
+            persist=persist,
+            cache=cache,
+            stub=stub,
+        )
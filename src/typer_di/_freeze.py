@@ -0,0 +1,278 @@
+import hashlib
+import importlib
+import textwrap
+from inspect import Parameter, Signature
+from types import FunctionType
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import _instrumentation
+from ._create_di_wrapper import create_di_builder
+from ._depends import Callback, DependsType
+from ._imports import get_import_path, import_object
+from ._lazy import is_lazy_annotation
+from ._method_builder import copy_func_attrs
+from ._plan import get_node
+from ._references import is_reference
+
+if TYPE_CHECKING:
+    from ._typer_di import TyperDI
+
+__all__ = [
+    "freeze_app",
+    "load_frozen_wrapper",
+]
+
+
+# bump on every change of generated code or `WRAPPERS` layout
+FROZEN_FORMAT = 10
+
+_HEADER = '''\
+# Generated by `python -m typer_di freeze`, do not edit.
+#
+# Every entry maps `module:qualname` of a command to
+# (fingerprint, wrapper factory, factory args, (param name, owner arg index)).
+
+FROZEN_FORMAT = {format}
+'''
+
+_FACTORY_TEMPLATE = '''
+
+def _make_{idx}({args}):
+{program}
+    return func
+'''
+
+FrozenEntry = Tuple[
+    str, Callback, Tuple[Optional[str], ...], Tuple[Tuple[str, int], ...]
+]
+
+
+def freeze_app(app: "TyperDI") -> str:
+    """
+    Generate source of a module with precompiled wrappers of all `app` callbacks.
+
+    Callbacks that can't be imported by their qualified name (lambdas, local functions)
+    are skipped and compiled at runtime as usual.
+    """
+    chunks = [_HEADER.format(format=FROZEN_FORMAT)]
+    entries: List[str] = []
+
+    for owner, func in _iter_di_functions(app):
+        key = get_import_path(func)
+        if key is None:
+            continue
+
+        frozen = _freeze_function(len(entries), func, parallel=owner.parallel)
+        if frozen is None:
+            continue
+
+        factory_source, entry = frozen
+        chunks.append(factory_source)
+        entries.append(f"    {key!r}: {entry},\n")
+
+    chunks.append("\n\nWRAPPERS = {\n" + "".join(entries) + "}\n")
+    return "".join(chunks)
+
+
+def load_frozen_wrapper(
+    module_name: str, func: Callback, *, parallel: bool = False
+) -> Optional[Callback]:
+    """
+    Return wrapper of `func` from a module generated by `freeze_app`.
+
+    Returns `None` when module is missing or the frozen entry is stale.
+    Frozen wrappers are not instrumented, so they are skipped while hooks are set.
+    """
+    key = get_import_path(func)
+    if key is None or _instrumentation.is_enabled():
+        return None
+
+    entry = _load_entries(module_name).get(key)
+    if entry is None:
+        return None
+
+    fingerprint, factory, paths, params = entry
+
+    try:
+        args = [func if p is None else import_object(p) for p in paths]
+    except (ImportError, AttributeError, ValueError):
+        return None
+
+    if _fingerprint(args, parallel=parallel) != fingerprint:
+        return None
+
+    parameters = [_make_parameter(args[owner], name) for name, owner in params]
+
+    wrapper = factory(*args)
+    wrapper.__signature__ = Signature(
+        parameters,
+        return_annotation=_get_annotation(func, "return"),
+    )
+    wrapper.__defaults__ = tuple(
+        p.default for p in parameters if p.default is not Signature.empty
+    )
+    copy_func_attrs(wrapper, func)
+    return wrapper  # type: ignore[no-any-return]
+
+
+_loaded_modules: Dict[str, Dict[str, FrozenEntry]] = {}
+
+
+def _load_entries(module_name: str) -> Dict[str, FrozenEntry]:
+    try:
+        return _loaded_modules[module_name]
+    except KeyError:
+        pass
+
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        entries: Dict[str, FrozenEntry] = {}
+    else:
+        if getattr(module, "FROZEN_FORMAT", None) == FROZEN_FORMAT:
+            entries = module.WRAPPERS
+        else:
+            entries = {}
+
+    _loaded_modules[module_name] = entries
+    return entries
+
+
+def _iter_di_functions(app: "TyperDI") -> Iterator[Tuple["TyperDI", Callback]]:
+    for func in getattr(app, "di_functions", ()):
+        yield app, func
+    for group_info in app.registered_groups:
+        # sub-apps registered by import path
+        import_path = getattr(group_info.cls, "di_import_path", None)
+        if import_path is not None:
+            yield from _iter_di_functions(import_object(import_path))
+        elif group_info.typer_instance is not None:
+            yield from _iter_di_functions(group_info.typer_instance)  # type: ignore[arg-type]
+
+
+def _freeze_function(
+    idx: int, func: Callback, *, parallel: bool
+) -> Optional[Tuple[str, str]]:
+    builder = create_di_builder(func, parallel=parallel, instrument=False)
+
+    globs = builder.globals()
+    paths: List[Optional[str]] = []
+    args: List[Any] = []
+    for value in globs.values():
+        if is_reference(value):
+            return None  # don't import dependencies passed by path on load
+        path = None if value is func else get_import_path(value)
+        if path is None and value is not func:
+            return None
+        paths.append(path)
+        args.append(value)
+
+    fingerprint = _fingerprint(args, parallel=parallel)
+    if fingerprint is None:
+        return None
+
+    # dependency arguments may share names with wrapper params of other callbacks
+    owners: Dict[str, int] = {}
+    for owner_idx, value in enumerate(args):
+        if not isinstance(value, FunctionType):
+            continue
+        for param in get_node(value).params:
+            owners.setdefault(param.name, owner_idx)
+
+    if any(p.name not in owners for p in builder.params):
+        return None  # e.g. params of class dependencies, read from `__init__`
+    params = tuple((p.name, owners[p.name]) for p in builder.params)
+
+    source = _FACTORY_TEMPLATE.format(
+        idx=idx,
+        args=", ".join(globs),
+        program=textwrap.indent(builder.format_program().rstrip(), "    "),
+    )
+    entry = f"({fingerprint!r}, _make_{idx}, {tuple(paths)!r}, {params!r})"
+    return source, entry
+
+
+def _fingerprint(callbacks: Sequence[Any], *, parallel: bool) -> Optional[str]:
+    """
+    Hash everything that affects the shape of generated wrapper.
+
+    Function bodies, defaults and annotations are read at load time,
+    so changing them doesn't make frozen wrappers stale.
+    """
+    digest = hashlib.sha1(repr(parallel).encode())
+    for cb in callbacks:
+        if isinstance(cb, type):
+            # helper classes are referenced only by their import path
+            digest.update(repr(get_import_path(cb)).encode())
+            continue
+
+        if not isinstance(cb, FunctionType):
+            return None
+
+        code = cb.__code__
+        names = code.co_varnames[: code.co_argcount + code.co_kwonlyargcount]
+        defaults = list(cb.__defaults__ or ()) + list((cb.__kwdefaults__ or {}).values())
+        annotations = cb.__annotations__
+
+        digest.update(
+            repr(
+                (
+                    get_import_path(cb),
+                    names,
+                    code.co_argcount,
+                    code.co_flags,
+                    len(cb.__defaults__ or ()),
+                    sorted(cb.__kwdefaults__ or ()),
+                    [_depends_target(v) for v in defaults],
+                    [
+                        a if isinstance(a, str) else _annotation_target(a)
+                        for a in (annotations.get(n) for n in names)
+                    ],
+                )
+            ).encode()
+        )
+
+    return digest.hexdigest()
+
+
+def _depends_target(value: Any) -> Optional[str]:
+    if isinstance(value, DependsType):
+        return repr(value)
+    return None
+
+
+def _annotation_target(annotation: Any) -> Tuple[Optional[str], bool]:
+    lazy = is_lazy_annotation(annotation)
+    for p in getattr(annotation, "__metadata__", ()):
+        target = _depends_target(p)
+        if target is not None:
+            return target, lazy
+    return None, lazy
+
+
+def _make_parameter(owner: Callback, name: str) -> Parameter:
+    code = owner.__code__
+    positional = code.co_varnames[: code.co_argcount]
+
+    default: Any = Signature.empty
+    if name in positional:
+        defaults = owner.__defaults__ or ()
+        offset = positional.index(name) - (len(positional) - len(defaults))
+        if offset >= 0:
+            default = defaults[offset]
+    else:
+        default = (owner.__kwdefaults__ or {}).get(name, Signature.empty)
+
+    return Parameter(
+        name,
+        Parameter.POSITIONAL_OR_KEYWORD,
+        default=default,
+        annotation=_get_annotation(owner, name),
+    )
+
+
+def _get_annotation(func: Callback, name: str) -> Any:
+    annotation = func.__annotations__.get(name, Signature.empty)
+    if isinstance(annotation, str):
+        return eval(annotation, func.__globals__)
+    return annotation
@@ -0,0 +1,62 @@
+from contextlib import (
+    AsyncExitStack,
+    ExitStack,
+    asynccontextmanager,
+    contextmanager,
+    nullcontext,
+)
+from contextvars import ContextVar
+from inspect import isasyncgenfunction, isgeneratorfunction
+from typing import Any, AsyncContextManager, ContextManager, Iterator, List, Optional
+
+from ._depends import Callback
+
+__all__: List[str] = []
+
+
+_outer_stack: "ContextVar[Optional[ExitStack]]" = ContextVar(
+    "typer_di_outer_stack", default=None
+)
+
+
+def is_generator_dependency(callback: Callback) -> bool:
+    return isgeneratorfunction(callback) or isasyncgenfunction(callback)
+
+
+def enter(stack: ExitStack, callback: Callback, /, *args: Any, **kwargs: Any) -> Any:
+    """
+    Run generator `callback` up to `yield`, the rest runs when `stack` is closed.
+    """
+    return stack.enter_context(contextmanager(callback)(*args, **kwargs))
+
+
+async def enter_async(
+    stack: AsyncExitStack, callback: Callback, /, *args: Any, **kwargs: Any
+) -> Any:
+    return await stack.enter_async_context(asynccontextmanager(callback)(*args, **kwargs))
+
+
+def open_stack() -> ContextManager[ExitStack]:
+    """
+    Return stack of the wrapper call, it is closed when the wrapped function returns.
+    """
+    stack = _outer_stack.get()
+    if stack is not None:
+        return nullcontext(stack)
+    return ExitStack()
+
+
+def open_async_stack() -> AsyncContextManager[AsyncExitStack]:
+    return AsyncExitStack()
+
+
+@contextmanager
+def defer_teardown(stack: ExitStack) -> Iterator[None]:
+    """
+    Leave teardown of generator dependencies of sync wrappers called inside to `stack`.
+    """
+    token = _outer_stack.set(stack)
+    try:
+        yield
+    finally:
+        _outer_stack.reset(token)
@@ -0,0 +1,65 @@
+import importlib
+import os
+import sys
+import sysconfig
+from typing import Any, Dict, Optional
+
+__all__ = ["import_object", "get_import_path", "collect_sources", "sources_changed"]
+
+
+def import_object(path: str) -> Any:
+    """
+    Import object by path in form `package.module:attr.nested_attr`.
+    """
+    module_name, sep, qualname = path.partition(":")
+    if not sep or not module_name or not qualname:
+        raise ValueError(f"Invalid import path '{path}', expected 'module:attr'")
+
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+
+    obj: Any = module
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def get_import_path(obj: Any) -> Optional[str]:
+    """
+    Return path that can be passed to `import_object` or `None` for local objects.
+    """
+    module_name = getattr(obj, "__module__", None)
+    qualname = getattr(obj, "__qualname__", None)
+    if not module_name or not qualname or "<" in qualname:
+        return None
+    return f"{module_name}:{qualname}"
+
+
+def collect_sources(sources: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    Add modification times of loaded modules (except stdlib ones) to `sources`.
+    """
+    if sources is None:
+        sources = {}
+
+    stdlib = tuple({sysconfig.get_path("stdlib"), sysconfig.get_path("platstdlib")})
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if not path or path in sources or path.startswith(stdlib):
+            continue
+        try:
+            sources[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+    return sources
+
+
+def sources_changed(sources: Dict[str, int]) -> bool:
+    for path, mtime in sources.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return True
+        except OSError:
+            return True
+    return False
@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Optional, Tuple
+
+from ._depends import Callback
+from .compat import TypeAlias
+
+__all__ = [
+    "DependencyInfo",
+    "set_instrumentation_hooks",
+]
+
+
+@dataclass(frozen=True)
+class DependencyInfo:
+    """
+    Position of a dependency call in the graph of a wrapper.
+    """
+
+    name: str  # qualname of the callback
+    index: int  # invocation order in the wrapper, `command` is the last one
+    dependencies: Tuple[int, ...]  # indexes of dependencies passed to the callback
+    command: str  # qualname of the wrapped command or callback
+    is_command: bool = False  # call of the wrapped function itself
+
+
+OnStart: TypeAlias = Callable[[DependencyInfo], None]
+OnEnd: TypeAlias = Callable[[DependencyInfo, float, Optional[BaseException]], None]
+
+_on_start: Optional[OnStart] = None
+_on_end: Optional[OnEnd] = None
+
+
+def set_instrumentation_hooks(
+    on_start: Optional[OnStart] = None, on_end: Optional[OnEnd] = None
+) -> None:
+    """
+    Call hooks around every dependency call of wrappers built after this point.
+
+    `on_end` receives duration in seconds and exception raised by the callback
+    (if any). Without hooks wrappers are built without any instrumentation code.
+    """
+    global _on_start, _on_end
+    _on_start = on_start
+    _on_end = on_end
+
+
+def is_enabled() -> bool:
+    return _on_start is not None or _on_end is not None
+
+
+def call_instrumented(
+    info: DependencyInfo, callback: Callback, /, *args: Any, **kwargs: Any
+) -> Any:
+    on_start, on_end = _on_start, _on_end
+    if on_start is not None:
+        on_start(info)
+
+    start = perf_counter()
+    try:
+        result = callback(*args, **kwargs)
+    except BaseException as ex:
+        if on_end is not None:
+            on_end(info, perf_counter() - start, ex)
+        raise
+
+    if on_end is not None:
+        on_end(info, perf_counter() - start, None)
+    return result
+
+
+async def call_instrumented_async(
+    info: DependencyInfo, callback: Callback, /, *args: Any, **kwargs: Any
+) -> Any:
+    on_start, on_end = _on_start, _on_end
+    if on_start is not None:
+        on_start(info)
+
+    start = perf_counter()
+    try:
+        result = await callback(*args, **kwargs)
+    except BaseException as ex:
+        if on_end is not None:
+            on_end(info, perf_counter() - start, ex)
+        raise
+
+    if on_end is not None:
+        on_end(info, perf_counter() - start, None)
+    return result
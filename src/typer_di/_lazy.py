@@ -0,0 +1,49 @@
+from typing import Any, Callable, Generic, Optional, TypeVar, get_origin
+
+__all__ = ["Lazy"]
+
+
+_T = TypeVar("_T")
+
+_UNSET: Any = object()
+
+
+class Lazy(Generic[_T]):
+    """
+    Dependency that is evaluated (together with its own dependencies) on first `get()`.
+
+    Request it with `Lazy[T]` annotation of a dependency or `Depends(..., lazy=True)`:
+
+        def command(db: Annotated[Lazy[Connection], Depends(connect)]):
+            if sync:
+                db.get().execute(...)
+    """
+
+    __slots__ = ("_thunk", "_value")
+
+    def __init__(self, thunk: Callable[[], _T]) -> None:
+        self._thunk: Optional[Callable[[], _T]] = thunk
+        self._value: _T = _UNSET
+
+    @property
+    def evaluated(self) -> bool:
+        return self._value is not _UNSET
+
+    def get(self) -> _T:
+        if self._value is _UNSET:
+            assert self._thunk is not None
+            self._value = self._thunk()
+            self._thunk = None  # release captured arguments
+        return self._value
+
+    def __repr__(self) -> str:
+        if self._value is _UNSET:
+            return "Lazy(<not evaluated>)"
+        return f"Lazy({self._value!r})"
+
+
+def is_lazy_annotation(annotation: Any) -> bool:
+    if hasattr(annotation, "__metadata__"):
+        # `Annotated[Lazy[T], ...]`
+        annotation = annotation.__origin__
+    return annotation is Lazy or get_origin(annotation) is Lazy
@@ -0,0 +1,243 @@
+import os
+from contextlib import ExitStack
+from functools import partial
+from inspect import Parameter, Signature, isawaitable
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence
+
+import typer
+
+from ._create_di_wrapper import TyperDIError, create_di_builder, create_di_wrapper
+from ._depends import Callback
+from ._generators import defer_teardown
+from ._method_builder import copy_func_attrs
+from ._resolution_cache import resolve_callback
+from .compat import Annotated, signature
+
+__all__ = ["create_map_wrapper"]
+
+
+_MAP_PARAMS = (
+    Parameter(
+        "di_jobs",
+        Parameter.KEYWORD_ONLY,
+        default=None,
+        annotation=Annotated[
+            Optional[int],
+            typer.Option(
+                "--jobs",
+                "-j",
+                min=1,
+                help="Number of worker processes [default: number of CPUs].",
+            ),
+        ],
+    ),
+    Parameter(
+        "di_chunk_size",
+        Parameter.KEYWORD_ONLY,
+        default=1,
+        annotation=Annotated[
+            int, typer.Option("--chunk-size", min=1, help="Items sent to a worker at once.")
+        ],
+    ),
+    Parameter(
+        "di_as_completed",
+        Parameter.KEYWORD_ONLY,
+        default=False,
+        annotation=Annotated[
+            bool,
+            typer.Option(
+                "--as-completed", help="Report results when ready, not in order of inputs."
+            ),
+        ],
+    ),
+)
+
+
+def create_map_wrapper(
+    func: Callback,
+    item_name: str,
+    *,
+    parallel: bool = False,
+    overrides: Optional[Mapping[Callback, Callback]] = None,
+) -> Callback:
+    """
+    Wrap `func` into a command that calls it for each of many `item_name` values.
+
+    Dependencies (and options they take) are evaluated once per worker process,
+    the item parameter becomes a list and `--jobs`, `--chunk-size` and
+    `--as-completed` options are added. Results other than `None` are printed.
+    Generator dependencies are torn down when the worker exits, so they can't be
+    mixed with async dependencies, which run in a loop of their own.
+    """
+    resolved = resolve_callback(func)
+    item_param = resolved.signature.parameters.get(item_name)
+    if item_param is None or item_name in resolved.dependencies:
+        raise TyperDIError(
+            f'Method "{func.__qualname__}" has no parameter "{item_name}" to map over'
+        )
+
+    binder = _make_binder(func, item_name)
+    builder = create_di_builder(binder, parallel=parallel, overrides=overrides)
+    if builder.is_async and builder.has_teardown:
+        # the loop of async dependencies is closed before the first item
+        raise TyperDIError(
+            f'Method "{func.__qualname__}" can\'t map over "{item_name}" '
+            "with both async and generator dependencies"
+        )
+
+    setup = create_di_wrapper(binder, parallel=parallel, overrides=overrides)
+    params = [
+        p.replace(kind=Parameter.KEYWORD_ONLY) for p in signature(setup).parameters.values()
+    ]
+    params.append(_as_list_param(item_param))
+    params.extend(_MAP_PARAMS)
+
+    names = [p.name for p in params]
+    if len(set(names)) != len(names):
+        raise TyperDIError(
+            f'Method "{func.__qualname__}" uses names reserved by `map_over`: '
+            + ", ".join(p.name for p in _MAP_PARAMS)
+        )
+
+    def wrapper(**kwargs: Any) -> None:
+        items = list(kwargs.pop(item_name))
+        results = map_items(
+            func,
+            item_name,
+            items,
+            jobs=kwargs.pop("di_jobs"),
+            chunk_size=kwargs.pop("di_chunk_size"),
+            ordered=not kwargs.pop("di_as_completed"),
+            setup_kwargs=kwargs,
+            parallel=parallel,
+            overrides=overrides,
+        )
+        for result in results:
+            if result is not None:
+                typer.echo(result)
+
+    copy_func_attrs(wrapper, func)
+    wrapper.__signature__ = Signature(params)  # type: ignore[attr-defined]
+    return wrapper
+
+
+def map_items(
+    func: Callback,
+    item_name: str,
+    items: Sequence[Any],
+    *,
+    jobs: Optional[int] = None,
+    chunk_size: int = 1,
+    ordered: bool = True,
+    setup_kwargs: Dict[str, Any],
+    parallel: bool = False,
+    overrides: Optional[Mapping[Callback, Callback]] = None,
+) -> Iterator[Any]:
+    """
+    Yield results of `func` for each item, its dependencies are evaluated once
+    per worker from `setup_kwargs`.
+    """
+    setup_args = (func, item_name, setup_kwargs, parallel, overrides)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, -(-len(items) // chunk_size))
+
+    if jobs <= 1:
+        with ExitStack() as stack:
+            call = _setup(*setup_args, stack=stack)
+            for item in items:
+                yield call(item)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=setup_args) as pool:
+        if ordered:
+            for results in pool.map(_call_chunk, chunks):
+                yield from results
+        else:
+            futures = [pool.submit(_call_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                yield from future.result()
+
+
+def _make_binder(func: Callback, item_name: str) -> Callback:
+    # takes all arguments except the item and returns `func` bound to them
+    def bind(**kwargs: Any) -> Callback:
+        return partial(func, **kwargs)
+
+    sig = resolve_callback(func).signature
+    copy_func_attrs(bind, func)
+    bind.__signature__ = sig.replace(  # type: ignore[attr-defined]
+        parameters=[p for p in sig.parameters.values() if p.name != item_name],
+        return_annotation=Signature.empty,
+    )
+    return bind
+
+
+def _as_list_param(param: Parameter) -> Parameter:
+    annotation = param.annotation
+    if annotation is Parameter.empty:
+        annotation = str
+
+    metadata = getattr(annotation, "__metadata__", None)
+    if metadata is not None:
+        # `Annotated[T, typer.Argument(...)]`
+        annotation = Annotated[(List[annotation.__origin__], *metadata)]  # type: ignore
+    else:
+        annotation = List[annotation]  # type: ignore[valid-type]
+
+    # plain defaults of a single item make no sense for the list
+    default = param.default
+    if not isinstance(default, typer.models.ParameterInfo):
+        default = Parameter.empty
+
+    return param.replace(
+        kind=Parameter.KEYWORD_ONLY, annotation=annotation, default=default
+    )
+
+
+def _setup(
+    func: Callback,
+    item_name: str,
+    setup_kwargs: Dict[str, Any],
+    parallel: bool,
+    overrides: Optional[Mapping[Callback, Callback]],
+    *,
+    stack: ExitStack,
+) -> Callable[[Any], Any]:
+    binder = _make_binder(func, item_name)
+    setup = create_di_wrapper(binder, parallel=parallel, overrides=overrides)
+    # keep generator dependencies open for all items
+    with defer_teardown(stack):
+        bound = _run(setup(**setup_kwargs))
+    return lambda item: _run(bound(**{item_name: item}))
+
+
+def _run(result: Any) -> Any:
+    # async commands and dependencies run in a loop of their own
+    if isawaitable(result):
+        import asyncio
+
+        return asyncio.run(result)  # type: ignore[arg-type]
+    return result
+
+
+# the bound command of this worker process
+_worker_call: Optional[Callable[[Any], Any]] = None
+
+
+def _init_worker(*setup_args: Any) -> None:
+    from multiprocessing.util import Finalize
+
+    global _worker_call
+    stack = ExitStack()
+    # worker processes skip `atexit` handlers, but run finalizers
+    Finalize(None, stack.close, exitpriority=10)
+    _worker_call = _setup(*setup_args, stack=stack)
+
+
+def _call_chunk(chunk: Sequence[Any]) -> List[Any]:
+    assert _worker_call is not None
+    return [_worker_call(item) for item in chunk]
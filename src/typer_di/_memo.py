@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
+
+from ._depends import Callback, DependsType
+
+__all__ = [
+    "MemoInfo",
+    "Memoize",
+]
+
+
+DEFAULT_MAX_SIZE = 128
+
+
+class MemoInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int  # entries dropped by `maxsize` or expired by `ttl`
+    maxsize: Optional[int]
+    currsize: int
+
+
+class Memoize:
+    """
+    In-memory cache of dependency results for `Depends(..., cache=Memoize(...))`.
+
+    Results are keyed by values of CLI params the dependency (transitively) takes,
+    a hit skips the dependency together with dependencies used only by it.
+    The least recently used entries are evicted above `maxsize` (`None` - unbounded),
+    entries older than `ttl` seconds are recomputed. `key` is called with these
+    params as keyword arguments and returns a hashable key, e.g. for list options.
+    """
+
+    def __init__(
+        self,
+        *,
+        maxsize: Optional[int] = DEFAULT_MAX_SIZE,
+        ttl: Optional[float] = None,
+        key: Optional[Callable[..., Hashable]] = None,
+    ) -> None:
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"Invalid maxsize {maxsize!r}, expected positive or None")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.key = key
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __repr__(self) -> str:
+        # keep it stable between runs, it is a part of `Depends` repr
+        key = getattr(self.key, "__qualname__", None)
+        return f"Memoize(maxsize={self.maxsize!r}, ttl={self.ttl!r}, key={key})"
+
+    def make_key(self, **params: Any) -> Hashable:
+        if self.key is not None:
+            return self.key(**params)
+
+        key = tuple(params.values())
+        try:
+            hash(key)
+        except TypeError:
+            raise TypeError(
+                f"Can't cache by unhashable params {', '.join(params)}, "
+                "pass `Memoize(key=...)`"
+            ) from None
+        return key
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if time.monotonic() < expires:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._evictions += 1
+            self._misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """
+        Store `value` and return it.
+        """
+        expires = float("inf") if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = value, expires
+            self._entries.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return value
+
+    def cache_info(self) -> MemoInfo:
+        with self._lock:
+            return MemoInfo(
+                self._hits, self._misses, self._evictions, self.maxsize, len(self._entries)
+            )
+
+    def clear(self) -> None:
+        """
+        Forget all results and statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
+# caches of `Depends(..., cache=True)`, shared by all usages of the callback
+_default_caches: "WeakKeyDictionary[Callback, Memoize]" = WeakKeyDictionary()
+
+
+# copies of `Memoize` instances used by overrides of memoized dependencies
+_override_caches: "WeakKeyDictionary[Callback, Dict[Memoize, Memoize]]" = (
+    WeakKeyDictionary()
+)
+
+
+def get_override_cache(
+    cache: Union[bool, Memoize], override: Callback
+) -> Union[bool, Memoize]:
+    """
+    Return `cache` of `Depends` of dependency replaced by `override`.
+
+    Overrides don't share results with the original dependency, so they get
+    their own copy of `Memoize` (default caches are kept per callback anyway).
+    """
+    if not isinstance(cache, Memoize):
+        return cache
+
+    copies = _override_caches.setdefault(override, {})
+    memo = copies.get(cache)
+    if memo is None:
+        memo = copies[cache] = Memoize(maxsize=cache.maxsize, ttl=cache.ttl, key=cache.key)
+    return memo
+
+
+def get_memo(depends_type: DependsType) -> Optional[Memoize]:
+    """
+    Return cache of the dependency, if it is memoized.
+    """
+    cache: Union[bool, Memoize] = depends_type.cache
+    if cache is False:
+        return None
+    if cache is True:
+        memo = _default_caches.get(depends_type.callback)
+        if memo is None:
+            memo = _default_caches[depends_type.callback] = Memoize()
+        return memo
+    return cache
@@ -1,10 +1,30 @@
-from dataclasses import dataclass
-from functools import WRAPPER_ASSIGNMENTS
-from inspect import Parameter, Signature
-from typing import Any, Dict, List
+import sys
+import textwrap
+from dataclasses import dataclass, field
+from functools import WRAPPER_ASSIGNMENTS, lru_cache
+from inspect import Parameter, Signature, isasyncgenfunction, iscoroutinefunction
+from types import CodeType, FunctionType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    NamedTuple,
+    Set,
+    Tuple,
+)
 
 from ._depends import Callback
-from .compat import signature
+from ._generators import is_generator_dependency
+from ._resolution_cache import resolve_callback
+from ._sources import register_source
+
+if TYPE_CHECKING:
+    from ._memo import Memoize
+    from ._plan import DependencyPlan
 
 __all__ = [
     "MethodBuilder",
@@ -17,8 +37,7 @@ class MethodBuilderError(Exception):
     pass
 
 
-@dataclass
-class ParamInfo:
+class ParamInfo(NamedTuple):
     name: str
     default: Any = Signature.empty
     annotation: Any = Signature.empty
@@ -32,11 +51,22 @@ class ParamInfo:
         )
 
 
-@dataclass
-class InvokeInfo:
+class InvokeInfo(NamedTuple):
     callback: Callback
     kwargs: Dict[str, str]  # arguments `k=v` that will be passed to the callback
     result: str  # variable that holds invocation result
+    is_async: bool = False  # callback returns awaitable
+    is_generator: bool = False  # code after `yield` runs when the wrapper returns
+    parallel: bool = False  # callback can be run in a thread pool
+    scope: str = "invocation"  # results of other scopes are reused between calls
+    lazy_args: FrozenSet[str] = frozenset()  # arguments passed as `Lazy` cells
+    persist: bool = False  # result is stored on disk between processes
+    memo: Optional["Memoize"] = None  # results are cached by params they depend on
+
+    @property
+    def is_guarded(self) -> bool:
+        # invocation is skipped together with its exclusive dependencies on cache hit
+        return self.scope != "invocation" or self.memo is not None
 
 
 _METHOD_TEMPLATE = """\
@@ -53,6 +83,77 @@ _RESULT_TEMPLATE = """\
     return {result}
 """
 
+_ASYNC_METHOD_TEMPLATE = """\
+async def __async_func({vars}):
+{invokes}
+{result}
+def func({vars}):
+    return __run(__async_func({vars}))
+"""
+
+_GATHER_TEMPLATE = """\
+    {results}, = await __gather(
+{calls}\
+    )
+"""
+
+_GATHER_CALL_TEMPLATE = """\
+        {call},
+"""
+
+_SUBMIT_TEMPLATE = """\
+    __f{idx} = __submit({args})
+"""
+
+_WAIT_TEMPLATE = """\
+    {results}, = __wait({futures})
+"""
+
+_CELL_TEMPLATE = """\
+    def __t{idx}():
+{body}\
+        return {result}
+    __l{idx} = __Lazy(__t{idx})
+"""
+
+_CELL_GET_TEMPLATE = """\
+    {result} = __l{idx}.get()
+"""
+
+_SCOPE_GUARD_TEMPLATE = """\
+    __c{idx} = __scope_cache({scope!r})
+    {result} = __c{idx}.get(__cb{idx}, __missing)
+    if {result} is __missing:
+{body}\
+        {result} = __c{idx}[__cb{idx}] = {callback}({args})
+"""
+
+_SCOPE_KEY_GUARD_TEMPLATE = """\
+    __c{idx}, __k{idx} = __scope_entry(
+        {scope!r}, __cb{idx}, {names!r}, ({values},), {required!r}
+    )
+    {result} = __c{idx}.get(__k{idx}, __missing)
+    if {result} is __missing:
+{body}\
+        {result} = __c{idx}[__k{idx}] = {callback}({args})
+"""
+
+_STACK_TEMPLATE = """\
+    with __open_stack() as __stack:
+"""
+
+_ASYNC_STACK_TEMPLATE = """\
+    async with __open_async_stack() as __stack:
+"""
+
+_MEMO_GUARD_TEMPLATE = """\
+    __k{idx} = __m{idx}.make_key({params})
+    {result} = __m{idx}.get(__k{idx}, __missing)
+    if {result} is __missing:
+{body}\
+        {result} = __m{idx}.put(__k{idx}, {callback}({args}))
+"""
+
 
 class MethodBuilder:
     """
@@ -64,14 +165,107 @@ class MethodBuilder:
 
     This allows us to bake whole dependency tree to a single function.
 
+    When any callback is a coroutine function, invokes are placed to `async def`
+    and each "level" of independent async callbacks is awaited with `asyncio.gather`,
+    `func` runs the whole graph on a single event loop with `asyncio.run`.
+
+    Independent `parallel` callbacks of the same level are submitted to a shared
+    thread pool (or `run_in_executor` in async mode) and joined before the next level.
+
+    Results of callbacks with "context" or "process" `scope` are looked up in the scope
+    cache first, dependencies used only by such callback are invoked only on cache miss:
+
+        __r1 = __c1.get(__cb1, __missing)
+        if __r1 is __missing:
+            __r0 = __cb0(x=x)
+            __r1 = __c1[__cb1] = __cb1(y=__r0)
+
+    Results that (transitively) depend on wrapper params are cached by their values,
+    `__scope_entry` returns the cache and the key (see `get_scope_entry`).
+
+    Arguments listed in `lazy_args` receive `Lazy` cells instead of values. Invokes that
+    are needed only through such arguments (directly or by other deferred invokes) are
+    deferred: their code is moved to a thunk evaluated on first `get()`:
+
+        def __t0():
+            __r0 = __cb0(x=x)
+            return __r0
+        __l0 = __Lazy(__t0)
+        __r1 = __cb1(y=__l0)
+
+    `persist` callbacks are called through `__persist(__cb0, x=x)`, that loads
+    their results from the on-disk cache.
+
+    Callbacks with `memo` are guarded the same way, their results are looked up
+    by values of wrapper params they (transitively) depend on:
+
+        __k1 = __m1.make_key(x=x)
+        __r1 = __m1.get(__k1, __missing)
+        if __r1 is __missing:
+            __r0 = __cb0(x=x)
+            __r1 = __m1.put(__k1, __cb1(y=__r0))
+
+    Arguments are passed positionally as long as they match leading positional
+    parameters of the callee (`__cb1(__r0, verbose)`), the rest by keyword.
+
+    Generator callbacks (sync or async) are run up to `yield` by `__enter(__stack, __cb0)`,
+    the rest of them runs in reverse order when the wrapped function returns or raises:
+
+        with __open_stack() as __stack:
+            __r0 = __enter(__stack, __cb0, x)
+            __r1 = __cb1(__r0)
+            return __r1
+
+    Generators of "context" and "process" scope are torn down with their scope instead.
+
+    With `instrument=True` every call is wrapped to `__instrument(__i0, __cb0, x=x)`,
+    that reports `DependencyInfo` and duration to instrumentation hooks. Otherwise
+    callbacks are called directly.
+
     Builder preserves:
      * params type annotations
      * return type annotation and other `wraps` props from `func`
+
+    The wrapper keeps only its globals, defaults and annotations: `inspect.signature`
+    is computed from them on demand, so thousands of wrappers stay cheap.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, *, instrument: bool = False) -> None:
         self._params: List[ParamInfo] = []
         self._invokes: List[InvokeInfo] = []
+        self._instrument = instrument
+
+    @classmethod
+    def from_plan(
+        cls, plan: "DependencyPlan", *, parallel: bool = False, instrument: bool = False
+    ) -> "MethodBuilder":
+        """
+        Return builder that invokes all nodes of `plan` in order.
+
+        With `parallel=True` all blocking callbacks are treated as `parallel` ones.
+        """
+        builder = cls(instrument=instrument)
+        for param in plan.parameters:
+            builder.add_param(param.name, param.annotation, default=param.default)
+
+        results: Dict[Callback, str] = {}
+        for node in plan.nodes:
+            dependencies = dict(node.dependencies)
+            kwargs = {
+                arg: results[dependencies[arg].callback] if arg in dependencies else arg
+                for arg in node.arguments
+            }
+            callback = node.callback
+            results[callback] = builder.invoke(
+                callback,
+                kwargs,
+                parallel=parallel or callback in plan.parallel_callbacks,
+                scope=plan.scopes.get(callback, "invocation"),
+                lazy_args=node.lazy_args,
+                persist=callback in plan.persistent_callbacks,
+                memo=plan.memo_caches.get(callback),
+            )
+        return builder
 
     @property
     def params(self) -> List[ParamInfo]:
@@ -87,67 +281,577 @@ class MethodBuilder:
             ParamInfo(name=name, default=default, annotation=annotation)
         )
 
-    def invoke(self, callback: Callback, kwargs: Dict[str, str]) -> str:
+    def invoke(
+        self,
+        callback: Callback,
+        kwargs: Dict[str, str],
+        *,
+        parallel: bool = False,
+        scope: str = "invocation",
+        lazy_args: Iterable[str] = (),
+        persist: bool = False,
+        memo: Optional["Memoize"] = None,
+    ) -> str:
+        """
+        Add invocation of `callback` and return name of its result variable.
+
+        `parallel` callbacks are run in a shared thread pool when other callbacks
+        independent of them are invoked at the same time.
+
+        `scope` other than "invocation" reuses callback result between wrapper calls.
+
+        `lazy_args` are passed as `Lazy` cells, that evaluate the invoke on first access.
+
+        `persist` results are stored on disk and reused by later processes.
+
+        `memo` caches results by values of wrapper params the callback depends on.
+        """
         # FIXME: validate that `kwargs.values()` are either in `params` or `calls.result`s
         result = f"__r{len(self._invokes)}"
-        self._invokes.append(InvokeInfo(callback, kwargs, result))
+        is_async = iscoroutinefunction(callback) or isasyncgenfunction(callback)
+        is_generator = is_generator_dependency(callback)
+        if persist and is_async:
+            raise MethodBuilderError(
+                f'Persistent dependency "{callback.__qualname__}" can\'t be async'
+            )
+        if is_generator and (persist or memo is not None):
+            raise MethodBuilderError(
+                f'Cached dependency "{callback.__qualname__}" can\'t be a generator'
+            )
+        if isasyncgenfunction(callback) and scope != "invocation":
+            raise MethodBuilderError(
+                f'Async generator dependency "{callback.__qualname__}" '
+                f"can't have {scope!r} scope"
+            )
+
+        self._invokes.append(
+            InvokeInfo(
+                callback,
+                kwargs,
+                result,
+                is_async=is_async,
+                is_generator=is_generator,
+                parallel=parallel,
+                scope=scope,
+                lazy_args=frozenset(lazy_args),
+                persist=persist,
+                memo=memo,
+            )
+        )
         return result
 
-    def build(self) -> Callback:
-        program_text = self._format_func_program()
-        globs = {f"__cb{idx}": p.callback for idx, p in enumerate(self._invokes)}
+    @property
+    def is_async(self) -> bool:
+        return any(p.is_async for p in self._invokes)
+
+    @property
+    def has_teardown(self) -> bool:
+        return any(p.is_generator for p in self._invokes)
+
+    @property
+    def is_parallel(self) -> bool:
+        return any(p.parallel and not p.is_async for p in self._invokes)
+
+    @property
+    def invokes(self) -> List[InvokeInfo]:
+        return self._invokes
+
+    def build(self, origin: Optional[Callback] = None) -> Callback:
+        """
+        Compile the wrapper.
+
+        Wrapper of `origin` is named after it in tracebacks and profiles,
+        its source is registered in `linecache`.
+        """
+        program_text = self.format_program()
+        globs = self.globals()
 
         try:
-            exec(program_text, globs)
+            code = _compile_program(program_text)
         except Exception as ex:
             raise MethodBuilderError(f"Compilation failed: {ex}\n\n{program_text}")
 
-        func = globs["func"]
+        if origin is not None:
+            module = getattr(origin, "__module__", None) or "__main__"
+            qualname = getattr(origin, "__qualname__", None) or "func"
+            filename = register_source(f"{module}.{qualname}", program_text)
+            code = _relocate_code(code, filename, qualname)
+
+        exec(code, globs)
+        func: Callback = globs["func"]
         self._update_signature(func)
         return func
 
-    def _format_func_program(self) -> str:
-        invokes = []
+    def globals(self) -> Dict[str, Any]:
+        """
+        Objects referenced by the program text.
+        """
+        globs: Dict[str, Any] = {
+            f"__cb{idx}": p.callback for idx, p in enumerate(self._invokes)
+        }
+        if self.is_async:
+            import asyncio
+
+            globs["__gather"] = asyncio.gather
+            globs["__run"] = asyncio.run
+        if self.is_parallel:
+            from . import _parallel
+
+            if self.is_async:
+                globs["__to_thread"] = _parallel.run_in_executor
+            else:
+                globs["__submit"] = _parallel.submit
+                globs["__wait"] = _parallel.wait_all
+        if any(p.is_guarded for p in self._invokes):
+            from . import _scopes
+
+            globs["__scope_cache"] = _scopes.get_scope_cache
+            globs["__scope_entry"] = _scopes.get_scope_entry
+            globs["__missing"] = _scopes.Missing
+            globs.update(
+                (f"__m{idx}", p.memo) for idx, p in enumerate(self._invokes) if p.memo
+            )
+        if any(p.lazy_args for p in self._invokes):
+            from ._lazy import Lazy
+
+            globs["__Lazy"] = Lazy
+        if self.has_teardown:
+            from . import _generators, _scopes
+
+            globs["__open_stack"] = _generators.open_stack
+            globs["__open_async_stack"] = _generators.open_async_stack
+            globs["__enter"] = _generators.enter
+            globs["__enter_async"] = _generators.enter_async
+            globs["__scope_stack"] = _scopes.get_scope_stack
+        if any(p.persist for p in self._invokes):
+            from ._persist import call_persistent
+
+            globs["__persist"] = call_persistent
+        if self._instrument:
+            globs.update(self._instrumentation_globals())
+        return globs
+
+    def _instrumentation_globals(self) -> Dict[str, Any]:
+        from . import _instrumentation
+
+        result_idx = {p.result: idx for idx, p in enumerate(self._invokes)}
+        command = _get_name(self._invokes[-1].callback) if self._invokes else ""
+
+        globs: Dict[str, Any] = {
+            "__instrument": _instrumentation.call_instrumented,
+            "__instrument_async": _instrumentation.call_instrumented_async,
+        }
         for idx, invoke_info in enumerate(self._invokes):
-            invokes.append(
-                _INVOKE_TEMPLATE.format(
-                    result=invoke_info.result,
-                    callback=f"__cb{idx}",
-                    args=", ".join(f"{k}={v}" for k, v in invoke_info.kwargs.items()),
-                )
+            globs[f"__i{idx}"] = _instrumentation.DependencyInfo(
+                name=_get_name(invoke_info.callback),
+                index=idx,
+                dependencies=tuple(
+                    result_idx[v] for v in invoke_info.kwargs.values() if v in result_idx
+                ),
+                command=command,
+                is_command=idx == len(self._invokes) - 1,
+            )
+        return globs
+
+    def format_program(self) -> str:
+        if not self._invokes:
+            return _METHOD_TEMPLATE.format(
+                vars=", ".join(p.name for p in self._params),
+                invokes="",
+                result=_RESULT_TEMPLATE.format(result=""),
             )
 
-        if self._invokes:
-            # use result of last invokation
-            result = _RESULT_TEMPLATE.format(result=self._invokes[-1].result)
+        layout = self._get_layout()
+
+        invokes = [
+            _CELL_TEMPLATE.format(
+                idx=idx,
+                result=self._invokes[idx].result,
+                body=textwrap.indent(
+                    self._format_unit(idx, layout, in_thunk=True), "    "
+                ),
+            )
+            for idx in sorted(layout.cells)
+        ]
+
+        top_level = [idx for idx in layout.top_level if idx not in layout.deferred]
+        if self.is_async or self.is_parallel:
+            invokes += self._format_levels(top_level, layout)
         else:
-            result = _RESULT_TEMPLATE.format(result="")
+            invokes += [self._format_unit(idx, layout) for idx in top_level]
 
-        return _METHOD_TEMPLATE.format(
+        body = "".join(invokes).rstrip()
+        # use result of last invokation
+        result = _RESULT_TEMPLATE.format(result=self._invokes[-1].result)
+        if self.has_teardown:
+            stack = _ASYNC_STACK_TEMPLATE if self.is_async else _STACK_TEMPLATE
+            body = stack + textwrap.indent(body, "    ")
+            result = textwrap.indent(result, "    ")
+
+        return (_ASYNC_METHOD_TEMPLATE if self.is_async else _METHOD_TEMPLATE).format(
             vars=", ".join(p.name for p in self._params),
-            invokes="".join(invokes).rstrip(),
+            invokes=body,
             result=result,
         )
 
+    def _format_levels(self, top_level: List[int], layout: "_Layout") -> List[str]:
+        invokes = []
+        top_level_set = set(top_level)
+        for level in self._get_levels():
+            level = [idx for idx in level if idx in top_level_set]
+            # there is nothing to overlap with a single invoke
+            overlap = len(level) > 1
+            concurrent = [
+                idx
+                for idx in level
+                if not self._invokes[idx].is_guarded and idx not in layout.cells
+            ]
+            # async callbacks are awaited, even when they are `parallel`
+            offload = [
+                idx
+                for idx in concurrent
+                if overlap
+                and self._invokes[idx].parallel
+                and not self._invokes[idx].is_async
+            ]
+            awaits = [
+                idx
+                for idx in concurrent
+                if self._invokes[idx].is_async or (self.is_async and idx in offload)
+            ]
+            if self.is_async:
+                offload = []
+            scheduled = set(awaits) | set(offload)
+            inline = [idx for idx in level if idx not in scheduled]
+
+            for idx in offload:
+                invokes.append(
+                    _SUBMIT_TEMPLATE.format(
+                        idx=idx,
+                        args=self._format_args(idx, layout, *self._callee(idx)),
+                    )
+                )
+
+            if len(awaits) == 1 and self._invokes[awaits[0]].is_async:
+                [idx] = awaits
+                invokes.append(self._format_invoke(idx, layout, "await "))
+            elif awaits:
+                invokes.append(
+                    _GATHER_TEMPLATE.format(
+                        results=", ".join(self._invokes[idx].result for idx in awaits),
+                        calls="".join(
+                            _GATHER_CALL_TEMPLATE.format(
+                                call=self._format_awaitable(idx, layout)
+                            )
+                            for idx in awaits
+                        ),
+                    )
+                )
+
+            for idx in inline:
+                invokes.append(self._format_unit(idx, layout))
+
+            if offload:
+                invokes.append(
+                    _WAIT_TEMPLATE.format(
+                        results=", ".join(self._invokes[idx].result for idx in offload),
+                        futures=", ".join(f"__f{idx}" for idx in offload),
+                    )
+                )
+
+        return invokes
+
+    def _format_unit(self, idx: int, layout: "_Layout", in_thunk: bool = False) -> str:
+        """
+        Format sequential invocation of `idx` with all invokes nested to it.
+        """
+        invoke_info = self._invokes[idx]
+        if idx in layout.cells and not in_thunk:
+            return _CELL_GET_TEMPLATE.format(idx=idx, result=invoke_info.result)
+
+        prefix = "await " if invoke_info.is_async else ""
+        if not invoke_info.is_guarded:
+            return self._format_invoke(idx, layout, prefix, in_thunk=in_thunk)
+
+        body = "".join(
+            self._format_unit(p, layout, in_thunk) for p in layout.nested.get(idx, ())
+        )
+        callee, *leading = self._callee(idx)
+        if invoke_info.memo is not None:
+            return _MEMO_GUARD_TEMPLATE.format(
+                idx=idx,
+                params=", ".join(f"{p}={p}" for p in self._get_memo_params(idx)),
+                result=invoke_info.result,
+                body=textwrap.indent(body, "    "),
+                callback=f"{prefix}{callee}",
+                args=self._format_args(idx, layout, *leading, in_thunk=in_thunk),
+            )
+        params = self._get_memo_params(idx)
+        if params:
+            required = {p.name for p in self._params if p.default is Signature.empty}
+            return _SCOPE_KEY_GUARD_TEMPLATE.format(
+                idx=idx,
+                scope=invoke_info.scope,
+                names=tuple(params),
+                values=", ".join(params),
+                required=tuple(p for p in params if p in required),
+                result=invoke_info.result,
+                body=textwrap.indent(body, "    "),
+                callback=f"{prefix}{callee}",
+                args=self._format_args(idx, layout, *leading, in_thunk=in_thunk),
+            )
+        return _SCOPE_GUARD_TEMPLATE.format(
+            idx=idx,
+            scope=invoke_info.scope,
+            result=invoke_info.result,
+            body=textwrap.indent(body, "    "),
+            callback=f"{prefix}{callee}",
+            args=self._format_args(idx, layout, *leading, in_thunk=in_thunk),
+        )
+
+    def _format_awaitable(self, idx: int, layout: "_Layout") -> str:
+        if self._invokes[idx].is_async:
+            callee, *leading = self._callee(idx)
+            return f"{callee}({self._format_args(idx, layout, *leading)})"
+        # offload blocking callback to the thread pool
+        return f"__to_thread({self._format_args(idx, layout, *self._callee(idx))})"
+
+    def _format_invoke(
+        self, idx: int, layout: "_Layout", prefix: str = "", in_thunk: bool = False
+    ) -> str:
+        callee, *leading = self._callee(idx)
+        return _INVOKE_TEMPLATE.format(
+            result=self._invokes[idx].result,
+            callback=f"{prefix}{callee}",
+            args=self._format_args(idx, layout, *leading, in_thunk=in_thunk),
+        )
+
+    def _callee(self, idx: int) -> List[str]:
+        """
+        Return function to call and its leading positional arguments.
+        """
+        invoke_info = self._invokes[idx]
+        callee = [f"__cb{idx}"]
+        if invoke_info.persist:
+            callee = ["__persist", *callee]
+        if invoke_info.is_generator:
+            stack = "__stack"
+            if invoke_info.scope != "invocation":
+                stack = f"__scope_stack({invoke_info.scope!r}, __stack)"
+            enter = "__enter_async" if invoke_info.is_async else "__enter"
+            callee = [enter, stack, *callee]
+        if self._instrument:
+            wrapper = "__instrument_async" if invoke_info.is_async else "__instrument"
+            callee = [wrapper, f"__i{idx}", *callee]
+        return callee
+
+    def _format_args(
+        self, idx: int, layout: "_Layout", *leading: str, in_thunk: bool = False
+    ) -> str:
+        invoke_info = self._invokes[idx]
+        args = list(leading)
+        positional = self._get_positional_count(idx)
+        for pos, (k, v) in enumerate(invoke_info.kwargs.items()):
+            dep = layout.result_idx.get(v)
+            if dep is not None and dep in layout.cells:
+                if k in invoke_info.lazy_args:
+                    v = f"__l{dep}"
+                elif in_thunk:
+                    # thunk may be evaluated before eager code reaches `dep`
+                    v = f"__l{dep}.get()"
+            args.append(v if pos < positional else f"{k}={v}")
+        return ", ".join(args)
+
+    def _get_positional_count(self, idx: int) -> int:
+        """
+        Return number of leading arguments of `idx` that can be passed positionally.
+        """
+        invoke_info = self._invokes[idx]
+        if invoke_info.persist:
+            # on-disk cache keys results by argument names
+            return 0
+
+        count = 0
+        positional = get_positional_params(invoke_info.callback)
+        for name, param_name in zip(invoke_info.kwargs, positional):
+            if name != param_name:
+                break
+            count += 1
+        return count
+
+    def _get_layout(self) -> "_Layout":
+        result_idx = {p.result: idx for idx, p in enumerate(self._invokes)}
+        # (consumer, is lazy) for each usage of invoke result
+        consumers: List[List[Tuple[int, bool]]] = [[] for _ in self._invokes]
+        for idx, invoke_info in enumerate(self._invokes):
+            for k, v in invoke_info.kwargs.items():
+                if v in result_idx:
+                    consumers[result_idx[v]].append((idx, k in invoke_info.lazy_args))
+
+        cells: Set[int] = set()
+        deferred: Set[int] = set()
+        for idx in reversed(range(len(self._invokes))):
+            usages = consumers[idx]
+            if any(is_lazy for _, is_lazy in usages):
+                cells.add(idx)
+            if usages and all(is_lazy or c in deferred for c, is_lazy in usages):
+                deferred.add(idx)
+        cells |= deferred
+
+        # invokes that are needed only by guarded ones are placed inside the guard
+        layout = _Layout(result_idx=result_idx, cells=cells, deferred=deferred)
+        for idx, guard in enumerate(self._get_guards(consumers, cells)):
+            if guard is None:
+                layout.top_level.append(idx)
+            else:
+                layout.nested.setdefault(guard, []).append(idx)
+
+        for idx in cells:
+            self._check_sync(idx, layout)
+
+        return layout
+
+    def _check_sync(self, idx: int, layout: "_Layout") -> None:
+        # `Lazy.get()` is a plain call, it can't await
+        if self._invokes[idx].is_async:
+            raise MethodBuilderError(
+                f'Lazy dependency "{self._invokes[idx].callback.__qualname__}" '
+                f"can't be async"
+            )
+        for p in layout.nested.get(idx, ()):
+            self._check_sync(p, layout)
+
+    def _get_guards(
+        self, consumers: List[List[Tuple[int, bool]]], cells: Set[int]
+    ) -> List[Optional[int]]:
+        """
+        For each invoke return the innermost guarded invoke that exclusively uses it.
+
+        `Lazy` cells are never nested, they can be evaluated by any consumer.
+        """
+        # enclosing guards of each invoke, the innermost first
+        chains: List[List[int]] = [[] for _ in self._invokes]
+        for idx in reversed(range(len(self._invokes))):
+            if idx in cells:
+                continue
+            enclosing = [
+                ([c] if self._invokes[c].is_guarded else []) + chains[c]
+                for c, _ in consumers[idx]
+            ]
+            if enclosing:
+                chains[idx] = [
+                    g for g in enclosing[0] if all(g in e for e in enclosing[1:])
+                ]
+
+        return [chain[0] if chain else None for chain in chains]
+
+    def _get_memo_params(self, idx: int) -> List[str]:
+        """
+        Return wrapper params that result of `idx` depends on, in signature order.
+        """
+        result_idx = {p.result: i for i, p in enumerate(self._invokes)}
+        used: Set[str] = set()
+        queue = [idx]
+        seen = {idx}
+        while queue:
+            for v in self._invokes[queue.pop()].kwargs.values():
+                dep = result_idx.get(v)
+                if dep is None:
+                    used.add(v)
+                elif dep not in seen:
+                    seen.add(dep)
+                    queue.append(dep)
+        return [p.name for p in self._params if p.name in used]
+
+    def _get_levels(self) -> List[List[int]]:
+        """
+        Group invokes by the length of the longest path to them from wrapper params,
+        invokes of the same level don't depend on each other.
+        """
+        result_levels: Dict[str, int] = {}
+        levels: List[List[int]] = []
+        for idx, invoke_info in enumerate(self._invokes):
+            level = max(
+                (result_levels.get(v, -1) + 1 for v in invoke_info.kwargs.values()),
+                default=0,
+            )
+            result_levels[invoke_info.result] = level
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(idx)
+        return levels
+
     def _update_signature(self, func: Callback) -> None:
         # take return type from the signature of the last callback
         return_type = Signature.empty
         if self._invokes:
-            last_sig = signature(self._invokes[-1].callback, eval_str=True)
-            return_type = last_sig.return_annotation
+            return_type = resolve_callback(self._invokes[-1].callback).return_annotation
 
-        # setup wrapper signature
-        func.__signature__ = Signature(  # type: ignore
-            [p.to_parameter() for p in self._params],
-            return_annotation=return_type,
-        )
+        # `inspect.signature` builds signature from them, without storing it per wrapper
+        annotations = {
+            p.name: p.annotation for p in self._params if p.annotation is not Signature.empty
+        }
+        if return_type is not Signature.empty:
+            annotations["return"] = return_type
+        func.__annotations__ = annotations
 
-        # setup defaults
-        func.__defaults__ = tuple(
+        defaults = tuple(
             param.default
             for param in self._params
             if param.default is not Signature.empty
         )
+        tail = self._params[len(self._params) - len(defaults) :]
+        if any(p.default is Signature.empty for p in tail):
+            raise MethodBuilderError("Params with defaults must follow ones without them")
+        func.__defaults__ = defaults or None
+
+
+@dataclass
+class _Layout:
+    result_idx: Dict[str, int]  # result variable -> invoke index
+    cells: Set[int]  # invokes wrapped to `Lazy` cells
+    deferred: Set[int]  # cells that are evaluated only on first `get()`
+    top_level: List[int] = field(default_factory=list)
+    nested: Dict[int, List[int]] = field(default_factory=dict)  # guard -> owned invokes
+
+
+def get_positional_params(callback: Callback) -> Tuple[str, ...]:
+    """
+    Return names of parameters that `callback` accepts positionally.
+    """
+    # `__signature__` and `__wrapped__` may hide how the callback is really called,
+    # so only plain functions are trusted
+    if not isinstance(callback, FunctionType):
+        return ()
+    code = callback.__code__
+    return code.co_varnames[: code.co_argcount]
+
+
+@lru_cache(maxsize=1024)
+def _compile_program(program_text: str) -> CodeType:
+    # wrappers of identically shaped graphs share code, only their globals differ
+    return compile(program_text, "<string>", "exec")
+
+
+def _get_name(callback: Callback) -> str:
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+def _relocate_code(code: CodeType, filename: str, qualname: str) -> CodeType:
+    # cached code is shared, so rename copies of it
+    consts = tuple(
+        _relocate_code(c, filename, qualname) if isinstance(c, CodeType) else c
+        for c in code.co_consts
+    )
+    if code.co_name != "func":
+        return code.replace(co_filename=filename, co_consts=consts)
+
+    name = qualname.rpartition(".")[2]
+    if sys.version_info >= (3, 11):
+        return code.replace(
+            co_filename=filename, co_consts=consts, co_name=name, co_qualname=qualname
+        )
+    return code.replace(co_filename=filename, co_consts=consts, co_name=name)
 
 
 def copy_func_attrs(wrapper: Callback, func: Callback) -> None:
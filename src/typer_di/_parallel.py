@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Any, Awaitable, List, Optional
+
+from ._depends import Callback
+
+__all__ = [
+    "set_parallel_executor",
+]
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def set_parallel_executor(executor: Optional[ThreadPoolExecutor]) -> None:
+    """
+    Replace executor of parallel dependencies (`None` restores the default one).
+    """
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(thread_name_prefix="typer_di")
+    return _executor
+
+
+def submit(callback: Callback, /, *args: Any, **kwargs: Any) -> "Future[Any]":
+    return get_executor().submit(callback, *args, **kwargs)
+
+
+def wait_all(*futures: "Future[Any]") -> List[Any]:
+    """
+    Wait for all futures and return their results.
+
+    When several callbacks fail, exception of the first one (in invocation order)
+    is raised, so errors don't depend on threads scheduling.
+    """
+    wait(futures)
+    return [f.result() for f in futures]
+
+
+def run_in_executor(callback: Callback, /, *args: Any, **kwargs: Any) -> Awaitable[Any]:
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(get_executor(), partial(callback, *args, **kwargs))
@@ -0,0 +1,226 @@
+import hashlib
+import mmap
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from types import CodeType
+from typing import Any, List, Optional, Union
+
+from ._depends import Callback
+from ._imports import get_import_path
+from ._references import resolve_reference
+
+__all__ = [
+    "clear_persistent_cache",
+    "set_persistent_cache",
+]
+
+
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+_SUFFIX = ".pickle"
+
+_directory: Optional[Path] = None
+_max_size: int = DEFAULT_MAX_SIZE
+
+
+def set_persistent_cache(
+    directory: Union[str, "os.PathLike[str]", None] = None,
+    *,
+    max_size: Optional[int] = None,
+) -> None:
+    """
+    Configure storage of `Depends(..., persist=True)` results.
+
+    `directory` defaults to `$TYPER_DI_CACHE_DIR` or `~/.cache/typer_di`, the least
+    recently used entries are evicted when total size exceeds `max_size` bytes.
+    """
+    global _directory, _max_size
+    _directory = None if directory is None else Path(directory)
+    _max_size = DEFAULT_MAX_SIZE if max_size is None else max_size
+
+
+def get_cache_dir() -> Path:
+    if _directory is not None:
+        return _directory
+
+    env_dir = os.environ.get("TYPER_DI_CACHE_DIR")
+    if env_dir:
+        return Path(env_dir)
+
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "typer_di"
+
+
+def get_max_size() -> int:
+    return _max_size
+
+
+def clear_persistent_cache() -> None:
+    """
+    Remove all stored dependency results.
+    """
+    for entry in list_entries():
+        _remove(entry.path)
+
+
+@dataclass
+class CacheEntry:
+    path: Path
+    size: int
+    mtime: float  # time of the last access
+
+
+def list_entries() -> List[CacheEntry]:
+    """
+    Return stored results, the least recently used first.
+    """
+    try:
+        files = list(os.scandir(get_cache_dir()))
+    except FileNotFoundError:
+        return []
+
+    entries = []
+    for f in files:
+        if not f.name.endswith(_SUFFIX):
+            continue
+        try:
+            st = f.stat()
+        except FileNotFoundError:  # removed by a concurrent process
+            continue
+        entries.append(CacheEntry(Path(f.path), st.st_size, st.st_mtime))
+
+    entries.sort(key=lambda e: e.mtime)
+    return entries
+
+
+def call_persistent(callback: Callback, /, **kwargs: Any) -> Any:
+    """
+    Load result of `callback(**kwargs)` from the cache directory or call it and store.
+
+    Arguments that can't be pickled disable caching of the call.
+    """
+    key = _make_key(callback, kwargs)
+    if key is None:
+        return callback(**kwargs)
+
+    path = get_cache_dir() / f"{key}{_SUFFIX}"
+    try:
+        result = _load(path)
+    except FileNotFoundError:
+        pass
+    except Exception:
+        # truncated or incompatible entry, recompute it
+        _remove(path)
+    else:
+        _touch(path)
+        return result
+
+    result = callback(**kwargs)
+    _store(path, result)
+    return result
+
+
+def _make_key(callback: Callback, kwargs: Any) -> Optional[str]:
+    digest = hashlib.sha256()
+
+    name = get_import_path(callback) or repr(callback)
+    digest.update(name.encode())
+
+    # changing implementation of the callback invalidates its results
+    code = getattr(resolve_reference(callback), "__code__", None)
+    if code is not None:
+        _hash_code(digest, code)
+
+    for k in sorted(kwargs):
+        value = kwargs[k]
+        try:
+            digest.update(pickle.dumps((k, value), protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return None
+
+        # input files are identified by their size and modification time
+        if isinstance(value, os.PathLike):
+            try:
+                st = os.stat(value)
+            except OSError:
+                continue
+            digest.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+
+    return digest.hexdigest()
+
+
+def _hash_code(digest: "hashlib._Hash", code: CodeType) -> None:
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            # nested functions and comprehensions, their repr contains address
+            _hash_code(digest, const)
+        else:
+            digest.update(_stable_repr(const).encode())
+
+
+def _stable_repr(const: Any) -> str:
+    # order of `frozenset` (e.g. `x in {"a", "b"}`) depends on `PYTHONHASHSEED`
+    if isinstance(const, frozenset):
+        return "frozenset({" + ", ".join(sorted(map(_stable_repr, const))) + "})"
+    if isinstance(const, tuple):
+        return "(" + "".join(f"{_stable_repr(c)}, " for c in const) + ")"
+    return repr(const)
+
+
+def _load(path: Path) -> Any:
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return pickle.loads(data)
+
+
+def _store(path: Path, value: Any) -> None:
+    try:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return  # result can't be persisted, just return it
+
+    # cache is an optimization, read-only or full disk is not an error
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temp file first, so concurrent runs never see partial entries
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    except OSError:
+        return
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except OSError:
+        _remove(Path(tmp_name))
+        return
+
+    _evict(get_max_size())
+
+
+def _evict(max_size: int) -> None:
+    entries = list_entries()
+    total = sum(e.size for e in entries)
+    for entry in entries:
+        if total <= max_size:
+            break
+        _remove(entry.path)
+        total -= entry.size
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _remove(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,158 @@
+from dataclasses import dataclass, field
+from inspect import Parameter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from ._depends import Callback, DependsType
+from ._resolution_cache import make_ref, resolve_callback
+
+if TYPE_CHECKING:
+    from ._memo import Memoize
+
+__all__ = [
+    "DependencyPlan",
+    "PlanNode",
+]
+
+
+@dataclass(frozen=True, init=False)
+class PlanNode:
+    """
+    Invocation of a single callback, shared by plans of all commands that use it.
+
+    Nodes are cached by their callbacks, so they reference them weakly.
+    """
+
+    __slots__ = ("_callback", "arguments", "params", "dependencies", "lazy_args")
+
+    _callback: Callable[[], Optional[Callback]]
+    arguments: Tuple[str, ...]  # all arguments in signature order
+    params: Tuple[Parameter, ...]  # arguments passed from wrapper params
+    dependencies: Tuple[Tuple[str, DependsType], ...]  # arguments passed from nodes
+    lazy_args: FrozenSet[str]  # dependencies passed as `Lazy` cells
+
+    def __init__(
+        self,
+        callback: Callback,
+        arguments: Tuple[str, ...],
+        params: Tuple[Parameter, ...],
+        dependencies: Tuple[Tuple[str, DependsType], ...],
+        lazy_args: FrozenSet[str],
+    ) -> None:
+        object.__setattr__(self, "_callback", make_ref(callback))
+        object.__setattr__(self, "arguments", arguments)
+        object.__setattr__(self, "params", params)
+        object.__setattr__(self, "dependencies", dependencies)
+        object.__setattr__(self, "lazy_args", lazy_args)
+
+    @property
+    def callback(self) -> Callback:
+        callback = self._callback()
+        if callback is None:
+            raise ReferenceError("Callback of the plan node was garbage collected")
+        return callback
+
+    @property
+    def name(self) -> str:
+        return getattr(self.callback, "__qualname__", None) or repr(self.callback)
+
+
+@dataclass(frozen=True)
+class DependencyPlan:
+    """
+    Immutable description of a DI wrapper: callbacks in invocation order and merged params.
+
+    Plans are compiled once per callback with `compile_plan` (plans of shared
+    dependencies are reused) and turned into a function with `MethodBuilder.from_plan`.
+    """
+
+    nodes: Tuple[PlanNode, ...]  # topological order, wrapped callback is the last one
+    parameters: Tuple[Parameter, ...]  # params of wrapper, ones with defaults last
+    scopes: Mapping[Callback, str]  # scopes other than "invocation"
+    parallel_callbacks: FrozenSet[Callback]
+    persistent_callbacks: FrozenSet[Callback]
+    memo_caches: Mapping[Callback, "Memoize"]  # caches of memoized callbacks
+
+    # built on first use, plans of registered commands are rarely inspected
+    _indexes: Optional[Dict[Callback, int]] = field(
+        init=False, repr=False, compare=False, default=None
+    )
+
+    def _get_indexes(self) -> Dict[Callback, int]:
+        # the root is left out, so cached plans don't keep their callback alive
+        if self._indexes is None:
+            indexes = {node.callback: idx for idx, node in enumerate(self.nodes[:-1])}
+            object.__setattr__(self, "_indexes", indexes)
+            return indexes
+        return self._indexes
+
+    @property
+    def root(self) -> PlanNode:
+        return self.nodes[-1]
+
+    def index(self, callback: Callback) -> int:
+        """
+        Return position of `callback` in invocation order.
+        """
+        if callback == self.root.callback:
+            return len(self.nodes) - 1
+        return self._get_indexes()[callback]
+
+    @property
+    def edges(self) -> Tuple[Tuple[int, int, str], ...]:
+        """
+        Return (dependency index, consumer index, argument name) of all edges.
+        """
+        indexes = self._get_indexes()
+        return tuple(
+            (indexes[depends_type.callback], idx, arg)
+            for idx, node in enumerate(self.nodes)
+            for arg, depends_type in node.dependencies
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return JSON compatible description of the plan, e.g. to diff plans of releases.
+        """
+        indexes = self._get_indexes()
+        nodes: List[Dict[str, Any]] = []
+        for node in self.nodes:
+            nodes.append(
+                {
+                    "name": node.name,
+                    "params": [p.name for p in node.params],
+                    "dependencies": {
+                        arg: indexes[d.callback] for arg, d in node.dependencies
+                    },
+                    "lazy": sorted(node.lazy_args),
+                    "scope": self.scopes.get(node.callback, "invocation"),
+                    "parallel": node.callback in self.parallel_callbacks,
+                    "persist": node.callback in self.persistent_callbacks,
+                    "cache": node.callback in self.memo_caches,
+                }
+            )
+        return {"nodes": nodes, "parameters": [p.name for p in self.parameters]}
+
+
+def get_node(callback: Callback) -> PlanNode:
+    resolved = resolve_callback(callback)
+    if resolved.node is None:
+        resolved.node = PlanNode(
+            callback=callback,
+            arguments=tuple(p.name for p in resolved.parameters),
+            params=tuple(
+                p for p in resolved.parameters if p.name not in resolved.dependencies
+            ),
+            dependencies=tuple(resolved.dependencies.items()),
+            lazy_args=resolved.lazy_dependencies,
+        )
+    return resolved.node
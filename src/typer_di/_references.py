@@ -0,0 +1,80 @@
+from contextlib import asynccontextmanager
+from functools import update_wrapper
+from inspect import isasyncgenfunction, iscoroutinefunction, isgeneratorfunction
+from typing import Any, Dict, List, Tuple
+
+from ._depends import Callback
+from ._imports import import_object
+
+__all__: List[str] = []
+
+
+_references: Dict[Tuple[str, Callback], Callback] = {}
+
+
+def make_reference(path: str, stub: Callback) -> Callback:
+    """
+    Return callback with signature of `stub`, that imports `path` on the first call.
+
+    References are shared, so a dependency declared in several places is called once.
+    """
+    key = (path, stub)
+    reference = _references.get(key)
+    if reference is None:
+        reference = _references[key] = _make_reference(path, stub)
+    return reference
+
+
+def is_reference(callback: Callback) -> bool:
+    return hasattr(callback, "__typer_di_resolve__")
+
+
+def resolve_reference(callback: Callback) -> Callback:
+    """
+    Return callback imported by reference `callback` or `callback` itself.
+    """
+    resolve = getattr(callback, "__typer_di_resolve__", None)
+    if resolve is None:
+        return callback
+    return resolve()  # type: ignore[no-any-return]
+
+
+def _make_reference(path: str, stub: Callback) -> Callback:
+    target: List[Callback] = []
+
+    def resolve() -> Callback:
+        if not target:
+            target.append(import_object(path))
+        return target[0]
+
+    # kind of the stub tells how the target is called, without importing it
+    reference: Callback
+    if isasyncgenfunction(stub):
+
+        async def reference(*args: Any, **kwargs: Any) -> Any:
+            async with asynccontextmanager(resolve())(*args, **kwargs) as value:
+                yield value
+
+    elif isgeneratorfunction(stub):
+
+        def reference(*args: Any, **kwargs: Any) -> Any:
+            return (yield from resolve()(*args, **kwargs))
+
+    elif iscoroutinefunction(stub):
+
+        async def reference(*args: Any, **kwargs: Any) -> Any:
+            return await resolve()(*args, **kwargs)
+
+    else:
+
+        def reference(*args: Any, **kwargs: Any) -> Any:
+            return resolve()(*args, **kwargs)
+
+    # `__wrapped__` makes `inspect.signature` read params of the stub
+    update_wrapper(reference, stub)
+    module_name, _, qualname = path.partition(":")
+    reference.__module__ = module_name
+    reference.__qualname__ = qualname
+    reference.__name__ = qualname.rpartition(".")[2]
+    reference.__typer_di_resolve__ = resolve  # type: ignore[union-attr]
+    return reference
@@ -0,0 +1,162 @@
+from inspect import Parameter, Signature, ismethod
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+from weakref import WeakKeyDictionary, WeakMethod, ref
+
+from ._depends import Callback, DependsType
+from ._lazy import is_lazy_annotation
+from .compat import signature
+
+if TYPE_CHECKING:
+    from ._plan import DependencyPlan, PlanNode
+
+__all__ = [
+    "clear_resolution_cache",
+    "invalidate_resolution_cache",
+]
+
+
+class ResolvedCallback:
+    """
+    Introspection results of a single callback shared by all wrappers.
+    """
+
+    __slots__ = (
+        "owner",
+        "signature",
+        "parameters",
+        "dependencies",
+        "lazy_dependencies",
+        "_subgraph",
+        "node",
+        "plan",
+    )
+
+    def __init__(self, sig: Signature, owner: "Callable[[], Optional[Callback]]") -> None:
+        self.owner = owner  # reference to the callback itself
+        self.signature = sig
+        self.parameters: Tuple[Parameter, ...] = tuple(sig.parameters.values())
+        self.dependencies: Dict[str, DependsType] = {}
+        for param in self.parameters:
+            depends_type = parse_dependency(param)
+            if depends_type is not None:
+                self.dependencies[param.name] = depends_type
+
+        # dependencies passed as `Lazy` cells
+        self.lazy_dependencies: FrozenSet[str] = (
+            frozenset(
+                name
+                for name, depends_type in self.dependencies.items()
+                if depends_type.lazy or is_lazy_annotation(sig.parameters[name].annotation)
+            )
+            or _NO_NAMES
+        )
+
+        # callbacks of the transitive sub-graph in invocation order (self is the last one),
+        # it is filled by `create_di_wrapper` for wrapped callbacks
+        self._subgraph: Optional[Tuple[Callback, ...]] = None
+
+        # invocation of this callback and plan of its wrapper, filled on first use
+        self.node: Optional["PlanNode"] = None
+        self.plan: Optional["DependencyPlan"] = None
+
+    @property
+    def return_annotation(self) -> Any:
+        return self.signature.return_annotation
+
+    @property
+    def subgraph(self) -> Optional[Tuple[Callback, ...]]:
+        owner = self.owner()
+        if self._subgraph is None or owner is None:
+            return None
+        return (*self._subgraph, owner)
+
+    @subgraph.setter
+    def subgraph(self, value: Optional[Tuple[Callback, ...]]) -> None:
+        # the cache is keyed by the callback, so its entry doesn't keep it alive
+        self._subgraph = None if value is None else value[:-1]
+
+
+_NO_NAMES: FrozenSet[str] = frozenset()
+
+_cache: "WeakKeyDictionary[Callback, ResolvedCallback]" = WeakKeyDictionary()
+
+
+def resolve_callback(func: Callback) -> ResolvedCallback:
+    try:
+        return _cache[func]
+    except (KeyError, TypeError):  # `TypeError`: not weak referenceable
+        pass
+
+    resolved = ResolvedCallback(signature(func, eval_str=True), make_ref(func))
+    try:
+        _cache[func] = resolved
+    except TypeError:
+        pass
+
+    return resolved
+
+
+def make_ref(callback: Callback) -> "Callable[[], Optional[Callback]]":
+    """
+    Return weak reference to `callback`, if it supports them.
+
+    Values of the cache reference their callbacks only this way, otherwise
+    entries would keep their own keys alive.
+    """
+    if ismethod(callback):
+        # bound methods are created on each attribute access
+        return WeakMethod(callback)
+    try:
+        return ref(callback)
+    except TypeError:
+        return lambda: callback
+
+
+def clear_resolution_cache() -> None:
+    """
+    Forget introspection results of all callbacks.
+    """
+    _cache.clear()
+
+
+def invalidate_resolution_cache(func: Callback) -> None:
+    """
+    Forget introspection results of `func` and of all callbacks depending on it.
+    """
+    dependents: Dict[Callback, List[Callback]] = {}
+    for cb, resolved in list(_cache.items()):
+        for depends_type in resolved.dependencies.values():
+            dependents.setdefault(depends_type.callback, []).append(cb)
+
+    stale: Set[Callback] = {func}
+    queue = [func]
+    while queue:
+        for cb in dependents.get(queue.pop(), ()):
+            if cb not in stale:
+                stale.add(cb)
+                queue.append(cb)
+
+    for cb in stale:
+        _cache.pop(cb, None)
+
+
+def parse_dependency(param: Parameter) -> Optional[DependsType]:
+    if isinstance(param.default, DependsType):
+        return param.default
+
+    metadata = getattr(param.annotation, "__metadata__", ())
+    for p in metadata:
+        if isinstance(p, DependsType):
+            return p
+
+    return None
@@ -0,0 +1,184 @@
+import atexit
+import sys
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+
+from ._depends import Callback
+
+__all__ = [
+    "clear_process_scope",
+    "dependency_context",
+]
+
+
+_META_KEY = "typer_di.context_scope"
+_STACK_META_KEY = "typer_di.context_stack"
+
+_context_cache: "ContextVar[Optional[Dict[Callback, Any]]]" = ContextVar(
+    "typer_di_context_scope", default=None
+)
+_context_stack: "ContextVar[Optional[ExitStack]]" = ContextVar(
+    "typer_di_context_stack", default=None
+)
+_process_cache: Dict[Callback, Any] = {}
+# teardown of "process" scoped generator dependencies
+_process_stack = ExitStack()
+
+
+class Missing:
+    """
+    Sentinel of values absent in scope caches.
+    """
+
+
+class _Latest:
+    """
+    Marks keys of the last computed results of callbacks in "context" caches.
+    """
+
+
+def get_scope_cache(scope: str) -> Dict[Callback, Any]:
+    """
+    Return storage of dependency results shared in `scope`.
+
+    "context" results are kept in `meta` of the current click context (it is shared
+    by group callbacks and commands of a single invocation) or in the innermost
+    `dependency_context()`. Outside of both a fresh dict is returned, so the call
+    behaves like "invocation" scope.
+    """
+    if scope == "process":
+        return _process_cache
+
+    cache = _context_cache.get()
+    if cache is not None:
+        return cache
+
+    # don't import `click` if the app doesn't use it
+    click = sys.modules.get("click")
+    if click is not None:
+        ctx = click.get_current_context(silent=True)
+        if ctx is not None:
+            return ctx.meta.setdefault(_META_KEY, {})  # type: ignore[no-any-return]
+
+    return {}
+
+
+def get_scope_entry(
+    scope: str,
+    callback: Callback,
+    names: Tuple[str, ...],
+    values: Tuple[Any, ...],
+    required: Tuple[str, ...],
+) -> Tuple[Dict[Any, Any], Hashable]:
+    """
+    Return scope cache and key of result of `callback` that depends on wrapper params.
+
+    Results are cached by values of `names` params. A click command reuses "context"
+    result computed by its parent callbacks, when none of these params were given
+    to the command itself. Otherwise its `required` params (passed as `None` when
+    they are optional only thanks to the parent) have to be given.
+    """
+    cache: Dict[Any, Any] = get_scope_cache(scope)
+    key = (callback, *map(_freeze, values))
+    try:
+        hash(key)
+    except TypeError:
+        raise TypeError(
+            f'Can\'t share "{scope}" scoped result of "{callback.__qualname__}" '
+            f"by unhashable params {', '.join(names)}"
+        ) from None
+
+    click = sys.modules.get("click")
+    if scope != "context" or click is None:
+        return cache, key
+    ctx = click.get_current_context(silent=True)
+    if ctx is None:
+        return cache, key
+
+    given = [name for name in names if _is_given(ctx, name)]
+    latest = (_Latest, callback)
+    if not given:
+        inherited = cache.get(latest)
+        if inherited is not None and inherited in cache:
+            return cache, inherited
+
+    for name, value in zip(names, values):
+        if value is None and name in required and name not in given:
+            param = next((p for p in ctx.command.params if p.name == name), None)
+            raise click.MissingParameter(ctx=ctx, param=param)
+
+    cache[latest] = key
+    return cache, key
+
+
+def _freeze(value: Any) -> Any:
+    # options with `multiple=True` and `nargs` are passed as lists
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_freeze, value))
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def _is_given(ctx: Any, name: str) -> bool:
+    source = ctx.get_parameter_source(name)
+    return source is not None and source.name not in ("DEFAULT", "DEFAULT_MAP")
+
+
+def get_scope_stack(scope: str, default: ExitStack) -> ExitStack:
+    """
+    Return stack that tears down generator dependencies shared in `scope`.
+
+    It is closed together with the scope cache: at exit (or `clear_process_scope()`),
+    when the outermost click context or `dependency_context()` is closed.
+    Outside of both `default` stack of the wrapper call is returned.
+    """
+    if scope == "process":
+        return _process_stack
+
+    stack = _context_stack.get()
+    if stack is not None:
+        return stack
+
+    click = sys.modules.get("click")
+    if click is not None:
+        ctx = click.get_current_context(silent=True)
+        if ctx is not None:
+            stack = ctx.meta.get(_STACK_META_KEY)
+            if stack is None:
+                stack = ctx.meta[_STACK_META_KEY] = ExitStack()
+                ctx.find_root().call_on_close(stack.close)
+            return stack
+
+    return default
+
+
+@contextmanager
+def dependency_context() -> Iterator[None]:
+    """
+    Share results of "context" scoped dependencies between all wrappers called inside.
+
+    Generator dependencies of this scope are torn down on exit.
+    """
+    token = _context_cache.set({})
+    with ExitStack() as stack:
+        stack_token = _context_stack.set(stack)
+        try:
+            yield
+        finally:
+            _context_stack.reset(stack_token)
+            _context_cache.reset(token)
+
+
+def clear_process_scope() -> None:
+    """
+    Tear down and forget results of all "process" scoped dependencies.
+    """
+    global _process_stack
+    stack, _process_stack = _process_stack, ExitStack()
+    _process_cache.clear()
+    stack.close()
+
+
+atexit.register(lambda: _process_stack.close())
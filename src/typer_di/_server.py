@@ -0,0 +1,161 @@
+import os
+import signal
+import socket
+import sys
+import traceback
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+import click
+import typer
+
+from ._batch import get_exit_code
+from ._imports import collect_sources, import_object, sources_changed
+from .client import check_runtime_dir, get_socket_path, recv_message, send_message
+
+__all__ = ["serve"]
+
+
+DEFAULT_IDLE_TIMEOUT = 15 * 60.0
+
+_STDIO_FDS = (0, 1, 2)
+
+
+def serve(app_path: str, *, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+    """
+    Keep the app loaded and run its commands for `typer_di.client`.
+
+    Requests are handled one by one in this process, so compiled wrappers and
+    "process" scoped dependencies are shared by all of them. The server exits
+    after `idle_timeout` seconds without requests or when sources of loaded
+    modules change (the client runs that command itself and starts a new server).
+    """
+    import fcntl
+
+    # remove the socket on `kill` as well
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    sock_path = get_socket_path(app_path)
+    check_runtime_dir(sock_path.parent)
+
+    with open(sock_path.with_suffix(".lock"), "w") as lock_file:
+        try:
+            # a single server per app, concurrently spawned ones just exit
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+
+        command = typer.main.get_command(import_object(app_path))
+        sources = collect_sources()
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            _remove(sock_path)  # left by a killed server
+            server.bind(str(sock_path))
+            server.listen()
+            server.settimeout(idle_timeout)
+            try:
+                _serve_forever(server, command, sources)
+            finally:
+                _remove(sock_path)
+
+
+def _serve_forever(
+    server: socket.socket, command: click.Command, sources: Dict[str, int]
+) -> None:
+    while True:
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            return
+
+        stale = sources_changed(sources)
+        with conn:
+            conn.settimeout(None)
+            try:
+                _handle(conn, command, stale)
+            except OSError:
+                pass  # client has gone
+
+        if stale:
+            return
+        # commands may import modules lazily
+        collect_sources(sources)
+
+
+def _handle(conn: socket.socket, command: click.Command, stale: bool) -> None:
+    request, fds = recv_message(conn, max_fds=len(_STDIO_FDS))
+    try:
+        if request is None or len(fds) != len(_STDIO_FDS) or stale:
+            send_message(conn, {"status": "stale"})
+            return
+
+        send_message(conn, {"status": "running"})
+        try:
+            with _client_process(request, fds):
+                exit_code = _run_command(command, request["argv"], request["prog_name"])
+        except OSError as ex:  # e.g. missing working directory
+            os.write(fds[2], f"Error: {ex}\n".encode())
+            exit_code = 1
+        send_message(conn, {"exit_code": exit_code})
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+def _run_command(command: click.Command, argv: List[str], prog_name: str) -> int:
+    try:
+        command.main(args=argv, prog_name=prog_name, standalone_mode=True)
+    except SystemExit as ex:
+        return get_exit_code(ex)
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+@contextmanager
+def _client_process(request: Dict[str, Any], fds: List[int]) -> Iterator[None]:
+    """
+    Temporarily take stdio, environment, working directory and argv of the client.
+    """
+    saved_fds = [os.dup(fd) for fd in _STDIO_FDS]
+    saved_streams = sys.stdin, sys.stdout, sys.stderr
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    saved_argv = sys.argv
+    streams = []
+    try:
+        for fd, target in zip(fds, _STDIO_FDS):
+            os.dup2(fd, target)
+        streams = [
+            open(0, "r", closefd=False),
+            open(1, "w", buffering=1, closefd=False),
+            open(2, "w", buffering=1, closefd=False),
+        ]
+        sys.stdin, sys.stdout, sys.stderr = streams
+        os.environ.clear()
+        os.environ.update(request["env"])
+        os.chdir(request["cwd"])
+        sys.argv = [request["prog_name"], *request["argv"]]
+        yield
+    finally:
+        for stream in streams:
+            try:
+                stream.close()  # flushes output, keeps descriptors open
+            except OSError:
+                pass
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+        for saved, target in zip(saved_fds, _STDIO_FDS):
+            os.dup2(saved, target)
+            os.close(saved)
+        os.environ.clear()
+        os.environ.update(saved_env)
+        os.chdir(saved_cwd)
+        sys.argv = saved_argv
+
+
+def _remove(path: "os.PathLike[str]") -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,84 @@
+import hashlib
+import linecache
+import os
+import re
+from pathlib import Path
+from typing import Optional, Union
+
+__all__ = [
+    "set_named_wrappers",
+    "set_source_dump_dir",
+]
+
+
+_dump_dir: Optional[Path] = None
+_named_wrappers: Optional[bool] = None
+
+
+def set_named_wrappers(enabled: Optional[bool]) -> None:
+    """
+    Name wrappers built after this point after their commands in tracebacks and profiles.
+
+    Named wrappers get copies of the compiled code, otherwise wrappers of identically
+    shaped commands share it. Defaults to `TYPER_DI_NAMED_WRAPPERS` environment
+    variable, wrappers are always named when their sources are dumped.
+    """
+    global _named_wrappers
+    _named_wrappers = enabled
+
+
+def get_named_wrappers() -> bool:
+    if get_dump_dir() is not None:
+        return True
+    if _named_wrappers is not None:
+        return _named_wrappers
+    return os.environ.get("TYPER_DI_NAMED_WRAPPERS", "") not in ("", "0")
+
+
+def set_source_dump_dir(directory: Union[str, Path, None]) -> None:
+    """
+    Write source of every wrapper built after this point to `directory`.
+
+    Frames of these wrappers point to the written files, so debuggers can step
+    through them. Defaults to `TYPER_DI_DUMP_DIR` environment variable.
+    """
+    global _dump_dir
+    _dump_dir = None if directory is None else Path(directory)
+
+
+def get_dump_dir() -> Optional[Path]:
+    if _dump_dir is not None:
+        return _dump_dir
+
+    env_dir = os.environ.get("TYPER_DI_DUMP_DIR")
+    return Path(env_dir) if env_dir else None
+
+
+def register_source(name: str, program_text: str) -> str:
+    """
+    Return filename of wrapper program of `name`, its source is available in `linecache`.
+
+    Filenames are synthetic (`<typer_di:module.qualname>`), unless sources are dumped.
+    """
+    filename = f"<typer_di:{name}>"
+
+    dump_dir = get_dump_dir()
+    if dump_dir is not None:
+        # wrappers of the same command may differ, e.g. with overrides
+        digest = hashlib.sha1(program_text.encode()).hexdigest()[:8]
+        path = dump_dir / f"{_UNSAFE_CHARS.sub('_', name)}-{digest}.py"
+        dump_dir.mkdir(parents=True, exist_ok=True)
+        path.write_text(program_text, encoding="utf-8")
+        filename = str(path)
+
+    # entries without mtime are never invalidated by `linecache.checkcache()`
+    linecache.cache[filename] = (
+        len(program_text),
+        None,
+        program_text.splitlines(keepends=True),
+        filename,
+    )
+    return filename
+
+
+_UNSAFE_CHARS = re.compile(r"[^\w.-]+")
@@ -1,39 +1,652 @@
-from functools import wraps
-from typing import TYPE_CHECKING, Any, Callable
+from collections import Counter
+from copy import copy
+from dataclasses import dataclass
+from functools import lru_cache, partial, wraps
+from inspect import (
+    Parameter,
+    Signature,
+    isasyncgenfunction,
+    iscoroutinefunction,
+    isgeneratorfunction,
+    signature,
+)
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set,
+    TextIO,
+    Type,
+    Union,
+)
 
+import click
 import typer
+from typer.core import TyperCommand, TyperGroup
+from typer.main import (
+    get_callback,
+    get_group_from_info,
+    get_params_convertors_ctx_param_name_from_function,
+)
+from typer.models import CommandFunctionType, TyperInfo
 
-from ._create_di_wrapper import create_di_wrapper
+from ._batch import run_batch
+from ._create_di_wrapper import compile_plan, create_di_wrapper
+from ._freeze import load_frozen_wrapper
+from ._imports import import_object
+from ._map import create_map_wrapper
+from ._method_builder import copy_func_attrs, get_positional_params
+from ._plan import DependencyPlan, PlanNode, get_node
+from .compat import Annotated
 
 __all__ = ["TyperDI"]
 
 
 class TyperDI(typer.Typer):
+    """
+    Drop-in replacement of `typer.Typer` that unwraps `Depends` of all passed functions.
+
+    With `lazy=True` commands are registered as cheap placeholders: the DI wrapper
+    and its merged signature are compiled only when click needs parameters of that
+    exact command (it is invoked, its help is shown or it is completed).
+
+    With `parallel=True` independent blocking dependencies of each command run
+    in a shared thread pool.
+
+    With `frozen="package.module"` wrappers are loaded from a module generated by
+    `python -m typer_di freeze`, stale or missing entries are compiled as usual.
+
+    `override_dependency` replaces dependencies of registered commands and callbacks
+    (e.g. with fakes in tests) without registering them again.
+
+    `command(map_over="name")` calls the command for each of many values of that
+    parameter in a pool of processes, dependencies are evaluated once per worker.
+
+    `add_typer("package.module:app", name=...)` registers a sub-app that is imported
+    only when its group is invoked, its help is shown or it is completed.
+    """
+
+    lazy: bool
+    parallel: bool
+    frozen: Optional[str]
+    di_functions: List[Callable[..., Any]]  # registered functions in original form
+
     # we only patch existing methods, so do it silently without affecting type checker
 
-    if not TYPE_CHECKING:
+    if TYPE_CHECKING:
+
+        def __init__(
+            self,
+            *,
+            lazy: bool = False,
+            parallel: bool = False,
+            frozen: Optional[str] = None,
+            **kwargs: Any,
+        ) -> None:
+            ...
+
+        def add_typer(self, typer_instance: Union[typer.Typer, str], **kwargs: Any) -> None:
+            ...
 
-        def __init__(self, *args, **kwargs):
+        def command(
+            self, *args: Any, map_over: Optional[str] = None, **kwargs: Any
+        ) -> Callable[[CommandFunctionType], CommandFunctionType]:
+            ...
+
+    else:
+
+        def __init__(self, *args, lazy=False, parallel=False, frozen=None, **kwargs):
+            self.lazy = lazy
+            self.parallel = parallel
+            self.frozen = frozen
+            self.di_functions = []
+            self._di_overrides = {}
+            self._di_compiled = {}
+            self._di_dependents = {}
+            self._di_map_over = {}
+            self._di_imported_apps = {}
+            self._di_signatures = {}
+            self._di_parent = None
+            self._di_callback = None
             if "callback" in kwargs:
-                kwargs["callback"] = create_di_wrapper(kwargs["callback"])
+                self._di_callback = kwargs["callback"]
+                kwargs["callback"] = self._register(kwargs["callback"])
             super().__init__(*args, **kwargs)
 
         def callback(self, *args, **kwargs):
             decor = super().callback(*args, **kwargs)
-            return wrap_typer_decorator(decor)
+            return wrap_typer_decorator(decor, self._register_callback)
+
+        def command(self, *args, map_over=None, **kwargs):
+            if not self.lazy:
+                decor = super().command(*args, **kwargs)
+                return wrap_typer_decorator(
+                    decor, partial(self._register, map_over=map_over)
+                )
+
+            cls = lazy_command_class(kwargs.pop("cls", None) or TyperCommand)
+
+            def decorator(func):
+                self.di_functions.append(func)
+                if map_over is not None:
+                    self._di_map_over[func] = map_over
+                super(TyperDI, self).command(
+                    *args,
+                    **kwargs,
+                    cls=partial(
+                        cls,
+                        di_func=func,
+                        di_create_wrapper=self.create_wrapper,
+                        di_pretty_exceptions_short=self.pretty_exceptions_short,
+                    ),
+                )(_make_placeholder(func))
+                return func
+
+            return decorator
+
+        def add_typer(self, typer_instance, **kwargs):
+            if isinstance(typer_instance, str):
+                name = kwargs.get("name")
+                if not isinstance(name, str) or not name:
+                    raise TypeError(
+                        f"Sub-app '{typer_instance}' is registered by import path, "
+                        "pass its `name` explicitly"
+                    )
+                kwargs["cls"] = lazy_group_class(
+                    kwargs.get("cls") or TyperGroup, typer_instance, dict(kwargs), self
+                )
+                # empty placeholder is replaced by commands of the imported app
+                typer_instance = TyperDI()
+            super().add_typer(typer_instance, **kwargs)
+            if isinstance(typer_instance, TyperDI):
+                typer_instance._set_parent(self)
+
+        def _register(self, func, map_over=None):
+            self.di_functions.append(func)
+            if map_over is not None:
+                self._di_map_over[func] = map_over
+            wrapper = self.create_wrapper(func)
+            self._track(func, wrapper)
+            return wrapper
+
+        def _register_callback(self, func):
+            self._di_callback = func
+            wrapper = self._register(func)
+            # commands registered earlier may inherit params of the callback
+            self._relax_commands()
+            return wrapper
+
+    _di_overrides: Dict[Callable[..., Any], Callable[..., Any]]
+    _di_compiled: Dict[Callable[..., Any], "_CompiledWrapper"]
+    # dependency -> registered functions which wrappers invoke it
+    _di_dependents: Dict[Callable[..., Any], Set[Callable[..., Any]]]
+    # command -> name of its parameter mapped over a process pool
+    _di_map_over: Dict[Callable[..., Any], str]
+    # import path -> sub-app registered by it, once it is imported
+    _di_imported_apps: Dict[str, "TyperDI"]
+    # registered function -> signature of its wrapper before relaxing
+    _di_signatures: Dict[Callable[..., Any], Signature]
+    _di_parent: Optional["TyperDI"]
+    _di_callback: Optional[Callable[..., Any]]  # registered callback of the group
+
+    @property
+    def dependency_overrides(self) -> Mapping[Callable[..., Any], Callable[..., Any]]:
+        return MappingProxyType(self._di_overrides)
+
+    def override_dependency(
+        self, original: Callable[..., Any], override: Callable[..., Any]
+    ) -> None:
+        """
+        Call `override` instead of `original` dependency in this app and its sub-apps.
+
+        When `override` takes the same parameters and dependencies, it is swapped in
+        compiled wrappers in place, other wrappers that use `original` are recompiled.
+        """
+        self._di_overrides[original] = override
+        self._apply_override(original)
+        for sub_app in self._sub_apps():
+            sub_app.override_dependency(original, override)
+
+    def reset_dependency_overrides(self) -> None:
+        """
+        Restore original dependencies in this app and its sub-apps.
+        """
+        originals = list(self._di_overrides)
+        self._di_overrides.clear()
+        for original in originals:
+            self._apply_override(original)
+        for sub_app in self._sub_apps():
+            sub_app.reset_dependency_overrides()
+
+    def run_batch(
+        self, lines: Iterable[str], output: TextIO, *, prog_name: Optional[str] = None
+    ) -> int:
+        """
+        Run each line as command line of the app in this process, write JSON results.
+
+        Compiled wrappers and "process" scoped dependencies are shared by all lines.
+        Return number of failed lines.
+        """
+        return run_batch(self, lines, output, prog_name=prog_name)
+
+    def create_wrapper(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Compile DI wrapper of `func` or load it from the `frozen` module.
+        """
+        item_name = self._di_map_over.get(func)
+        if item_name is not None:
+            return create_map_wrapper(
+                func, item_name, parallel=self.parallel, overrides=self._di_overrides
+            )
+
+        wrapper = None
+        if self._di_overrides:
+            # frozen wrappers know nothing about overrides
+            wrapper = create_di_wrapper(
+                func, parallel=self.parallel, overrides=self._di_overrides
+            )
+        elif self.frozen is not None:
+            wrapper = load_frozen_wrapper(self.frozen, func, parallel=self.parallel)
+
+        if wrapper is None:
+            wrapper = create_di_wrapper(func, parallel=self.parallel)
+
+        self._di_signatures.pop(func, None)
+        self._relax(func, wrapper)
+        return wrapper
+
+    def _relax(self, func: Callable[..., Any], wrapper: Callable[..., Any]) -> None:
+        # parent callbacks may be registered after `func`, so this is repeated
+        names = self._get_inherited_params(func)
+        original = self._di_signatures.get(func)
+        if not names:
+            if original is not None:
+                wrapper.__signature__ = original  # type: ignore[attr-defined]
+                del self._di_signatures[func]
+            return
+
+        if original is None:
+            original = self._di_signatures[func] = signature(wrapper)
+        wrapper.__signature__ = _relax_params(original, names)  # type: ignore[attr-defined]
+
+    def _relax_commands(self) -> None:
+        for func, compiled in self._di_compiled.items():
+            self._relax(func, compiled.wrapper)
+        for sub_app in self._sub_apps():
+            sub_app._relax_commands()
+
+    def _set_parent(self, parent: "TyperDI") -> None:
+        self._di_parent = parent
+        self._relax_commands()
+
+    def _get_inherited_params(self, func: Callable[..., Any]) -> FrozenSet[str]:
+        # "context" scoped dependencies of callbacks of this and parent groups
+        provided: Set[Callable[..., Any]] = set()
+        app: Optional[TyperDI] = self
+        while app is not None:
+            callback = app._di_callback
+            if callback is not None and callback is not func:
+                plan = compile_plan(callback, overrides=app._di_overrides)
+                provided.update(
+                    cb for cb, scope in plan.scopes.items() if scope == "context"
+                )
+            app = app._di_parent
+
+        if not provided:
+            return _NO_NAMES
+        plan = compile_plan(func, overrides=self._di_overrides)
+        return _get_inherited_params(plan, provided)
+
+    def _track(self, func: Callable[..., Any], wrapper: Callable[..., Any]) -> None:
+        plan = compile_plan(func, overrides=self._di_overrides)
+        callbacks = [node.callback for node in plan.nodes]
+
+        # overridden dependencies are called from the slot of their override
+        slots = {callback: idx for idx, callback in enumerate(callbacks)}
+        for original, override in self._di_overrides.items():
+            if override in slots:
+                slots[original] = slots[override]
+
+        compiled = _CompiledWrapper(func, wrapper, callbacks, slots)
+        self._di_compiled[func] = compiled
+        for callback in slots:
+            self._di_dependents.setdefault(callback, set()).add(func)
+
+    def _apply_override(self, original: Callable[..., Any]) -> None:
+        target = self._di_overrides.get(original, original)
+        for func in list(self._di_dependents.get(original, ())):
+            compiled = self._di_compiled[func]
+            if not compiled.swap(original, target):
+                self._rebuild(compiled)
+
+    def _rebuild(self, compiled: "_CompiledWrapper") -> None:
+        func = compiled.func
+        for callback in compiled.slots:
+            self._di_dependents[callback].discard(func)
+
+        wrapper = self.create_wrapper(func)
+        self._track(func, wrapper)
+
+        # `typer` reads callbacks from registration info on every run
+        infos = [*self.registered_commands, self.registered_callback, self.info]
+        for info in infos:
+            if info is not None and info.callback is compiled.wrapper:
+                info.callback = wrapper
+
+    def _sub_apps(self) -> List["TyperDI"]:
+        return [
+            group.typer_instance
+            for group in self.registered_groups
+            if isinstance(group.typer_instance, TyperDI)
+        ] + list(self._di_imported_apps.values())
+
+
+@dataclass
+class _CompiledWrapper:
+    """
+    Wrapper of a registered function and `__cbN` slots of its dependencies.
+    """
+
+    __slots__ = ("func", "wrapper", "callbacks", "slots", "_shared")
+
+    func: Callable[..., Any]
+    wrapper: Callable[..., Any]
+    callbacks: List[Callable[..., Any]]  # current callback of each slot
+    slots: Dict[Callable[..., Any], int]  # dependency -> slot that calls it
+
+    def __post_init__(self) -> None:
+        counts = Counter(self.slots.values())
+        self._shared = (
+            frozenset(idx for idx, count in counts.items() if count > 1) or _NO_SLOTS
+        )
+
+    def swap(self, original: Callable[..., Any], target: Callable[..., Any]) -> bool:
+        """
+        Replace callback in place, if wrapper code doesn't depend on the change.
+        """
+        idx = self.slots.get(original)
+        if idx is None or idx in self._shared:
+            # slot is reached by other dependencies too
+            return False
+
+        current = self.callbacks[idx]
+        name = f"__cb{idx}"
+        # frozen wrappers keep callbacks in closures
+        globs = getattr(self.wrapper, "__globals__", {})
+        if globs.get(name) is not current or not _same_shape(current, target):
+            return False
+        if f"__m{idx}" in globs:
+            # cached results of memoized slots belong to the current callback
+            return False
 
-        def command(self, *args, **kwargs):
-            decor = super().command(*args, **kwargs)
-            return wrap_typer_decorator(decor)
+        globs[name] = target
+        self.callbacks[idx] = target
+        return True
 
 
-def wrap_typer_decorator(decor: Callable[..., Any]) -> Callable[..., Any]:
+_NO_SLOTS: FrozenSet[int] = frozenset()
+_NO_NAMES: FrozenSet[str] = frozenset()
+
+
+def _get_inherited_params(
+    plan: DependencyPlan, provided: Set[Callable[..., Any]]
+) -> FrozenSet[str]:
+    """
+    Return required params read only by "context" scoped dependencies, which
+    parent callbacks of `provided` dependencies may have already supplied.
+    """
+    consumers: Dict[Callable[..., Any], List[Callable[..., Any]]] = {}
+    for node in plan.nodes:
+        for _, depends_type in node.dependencies:
+            consumers.setdefault(depends_type.callback, []).append(node.callback)
+
+    scoped: Dict[Callable[..., Any], bool] = {}
+    names: Set[str] = set()
+    for node in reversed(plan.nodes):
+        users = consumers.get(node.callback, ())
+        scoped[node.callback] = (
+            plan.scopes.get(node.callback) == "context" and node.callback in provided
+        ) or (bool(users) and all(scoped[user] for user in users))
+        if scoped[node.callback]:
+            names.update(p.name for p in node.params if p.default is Parameter.empty)
+    return frozenset(names)
+
+
+def _relax_params(sig: Signature, names: FrozenSet[str]) -> Signature:
+    """
+    Return `sig` where required options of `names` default to values of parents.
+    """
+    params: List[Parameter] = []
+    relaxed: List[Parameter] = []
+    for param in sig.parameters.values():
+        option = _relax_option(param) if param.name in names else None
+        if option is None:
+            params.append(param)
+        else:
+            relaxed.append(option)
+
+    # `typer` passes options by keyword, moving them to the end keeps `sig` valid
+    return sig.replace(parameters=params + relaxed)
+
+
+def _relax_option(param: Parameter) -> Optional[Parameter]:
+    # arguments are positional, they can't be skipped, so they are left required
+    metadata = getattr(param.annotation, "__metadata__", ())
+    infos = [m for m in metadata if isinstance(m, typer.models.ParameterInfo)]
+    if len(infos) != 1 or not isinstance(infos[0], typer.models.OptionInfo):
+        return None
+
+    option = copy(infos[0])
+    option.show_default = _INHERITED_DEFAULT
+    metadata = tuple(option if m is infos[0] else m for m in metadata)
+    annotation = Annotated[(param.annotation.__origin__, *metadata)]  # type: ignore
+    return param.replace(kind=Parameter.KEYWORD_ONLY, annotation=annotation, default=None)
+
+
+_INHERITED_DEFAULT = "value given to parent command"
+
+
+def _same_shape(a: Callable[..., Any], b: Callable[..., Any]) -> bool:
+    node_a, node_b = get_node(a), get_node(b)
+    return (
+        _node_shape(node_a) == _node_shape(node_b)
+        and iscoroutinefunction(a) == iscoroutinefunction(b)
+        and isgeneratorfunction(a) == isgeneratorfunction(b)
+        and isasyncgenfunction(a) == isasyncgenfunction(b)
+        # wrappers pass leading arguments positionally
+        and get_positional_params(a) == get_positional_params(b)
+    )
+
+
+def _node_shape(node: PlanNode) -> Any:
+    return (
+        node.arguments,
+        node.params,
+        node.lazy_args,
+        [
+            (arg, d.callback, d.parallel, d.scope, d.lazy, d.persist, d.cache)
+            for arg, d in node.dependencies
+        ],
+    )
+
+
+def wrap_typer_decorator(
+    decor: Callable[..., Any],
+    create_wrapper: Callable[[Callable[..., Any]], Callable[..., Any]] = create_di_wrapper,
+) -> Callable[..., Any]:
     @wraps(decor)
     def inner(func: Callable[..., Any]) -> Callable[..., Any]:
         # pass wrapper to the typer
-        decor(create_di_wrapper(func))
+        decor(create_wrapper(func))
 
         # return untouched func
         return func
 
     return inner
+
+
+class LazyDICommand(TyperCommand):
+    """
+    Command that compiles DI wrapper of `di_func` on first access to its
+    `params` or `callback`.
+
+    `typer` builds click commands for the whole app on each run, so lazy commands
+    are registered with a parameterless placeholder and receive real parameters
+    only when click asks for them.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        di_func: Callable[..., Any],
+        di_pretty_exceptions_short: bool,
+        di_create_wrapper: Callable[[Callable[..., Any]], Callable[..., Any]] = create_di_wrapper,
+        **kwargs: Any,
+    ) -> None:
+        self.di_func = di_func
+        self._di_create_wrapper = di_create_wrapper
+        self.di_materialized = False
+        self._di_pretty_exceptions_short = di_pretty_exceptions_short
+        super().__init__(*args, **kwargs)
+
+    @property
+    def params(self) -> List[click.Parameter]:
+        self._materialize()
+        return self._di_params
+
+    @params.setter
+    def params(self, value: List[click.Parameter]) -> None:
+        self._di_params = value
+
+    @property
+    def callback(self) -> Optional[Callable[..., Any]]:
+        self._materialize()
+        return self._di_callback
+
+    @callback.setter
+    def callback(self, value: Optional[Callable[..., Any]]) -> None:
+        self._di_callback = value
+
+    def _materialize(self) -> None:
+        # placeholder `params` and `callback` from `__init__` are replaced here
+        if self.di_materialized:
+            return
+        self.di_materialized = True
+
+        wrapper = self._di_create_wrapper(self.di_func)
+        params, convertors, context_param_name = (
+            get_params_convertors_ctx_param_name_from_function(wrapper)
+        )
+
+        self._di_params = list(params)
+        self._di_callback = get_callback(
+            callback=wrapper,
+            params=params,
+            convertors=convertors,
+            context_param_name=context_param_name,
+            pretty_exceptions_short=self._di_pretty_exceptions_short,
+        )
+
+
+@lru_cache(maxsize=None)
+def lazy_command_class(base: Type[TyperCommand]) -> Type[LazyDICommand]:
+    if issubclass(base, LazyDICommand):
+        return base
+    return type(base.__name__, (LazyDICommand, base), {})
+
+
+class LazyDIGroup(TyperGroup):
+    """
+    Group that imports its sub-app from `di_import_path` on first access to its
+    `commands`, `params` or `callback`.
+
+    `name` and help passed to `add_typer` are available before that, so listing
+    of the parent group doesn't import the sub-app.
+    """
+
+    di_import_path: ClassVar[str]
+    di_info: ClassVar[Dict[str, Any]]  # `add_typer` arguments
+    di_parent: ClassVar[TyperDI]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.di_materialized = False
+        super().__init__(*args, **kwargs)
+
+    @property
+    def commands(self) -> MutableMapping[str, click.Command]:
+        self._materialize()
+        return self._di_commands
+
+    @commands.setter
+    def commands(self, value: MutableMapping[str, click.Command]) -> None:
+        self._di_commands = value
+
+    @property
+    def params(self) -> List[click.Parameter]:
+        self._materialize()
+        return self._di_params
+
+    @params.setter
+    def params(self, value: List[click.Parameter]) -> None:
+        self._di_params = value
+
+    @property
+    def callback(self) -> Optional[Callable[..., Any]]:
+        self._materialize()
+        return self._di_callback
+
+    @callback.setter
+    def callback(self, value: Optional[Callable[..., Any]]) -> None:
+        self._di_callback = value
+
+    def _materialize(self) -> None:
+        if self.di_materialized:
+            return
+        self.di_materialized = True
+
+        target = import_object(self.di_import_path)
+        if not isinstance(target, typer.Typer):
+            raise TypeError(f"'{self.di_import_path}' is not a Typer app")
+
+        if isinstance(target, TyperDI):
+            # later overrides and resets of the parent are passed by `_sub_apps`
+            parent = self.di_parent
+            parent._di_imported_apps[self.di_import_path] = target
+            for original, override in parent.dependency_overrides.items():
+                target.override_dependency(original, override)
+            target._set_parent(parent)
+
+        info = TyperInfo(target, **self.di_info)
+        group = get_group_from_info(
+            info,
+            pretty_exceptions_short=self.di_parent.pretty_exceptions_short,
+            rich_markup_mode=self.rich_markup_mode,
+        )
+        for key, value in vars(group).items():
+            if key != "name":
+                setattr(self, key, value)
+
+
+def lazy_group_class(
+    base: Type[TyperGroup], import_path: str, info: Dict[str, Any], parent: TyperDI
+) -> Type[LazyDIGroup]:
+    attrs = {"di_import_path": import_path, "di_info": info, "di_parent": parent}
+    return type(base.__name__, (LazyDIGroup, base), attrs)
+
+
+def _make_placeholder(func: Callable[..., Any]) -> Callable[..., Any]:
+    # `typer` takes command name and help from the callback
+    def placeholder() -> None:  # pragma: no cover
+        ...
+
+    copy_func_attrs(placeholder, func)
+    return placeholder
@@ -0,0 +1,221 @@
+"""
+Tiny client of `python -m typer_di serve`, it imports neither the app nor `typer`.
+
+Run a command of a served app with
+
+    python -m typer_di.client my_package.cli:app [ARGS]...
+
+or from a console script entry point:
+
+    def main():
+        sys.exit(typer_di.client.run("my_package.cli:app"))
+"""
+
+import array
+import hashlib
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .completion import complete_from_index
+
+__all__ = ["main", "run"]
+
+
+_HEADER = struct.Struct("!I")
+_STDIO_FDS = (0, 1, 2)
+
+
+def is_supported() -> bool:
+    return hasattr(socket, "AF_UNIX") and hasattr(socket, "CMSG_SPACE")
+
+
+def get_runtime_dir() -> Path:
+    env_dir = os.environ.get("TYPER_DI_RUNTIME_DIR")
+    if env_dir:
+        return Path(env_dir)
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "typer_di"
+    return Path(tempfile.gettempdir()) / f"typer_di-{os.getuid()}"
+
+
+def get_socket_path(app_path: str) -> Path:
+    # the same app path may point to different code in other environments
+    key = hashlib.sha256(f"{sys.executable}\0{app_path}".encode()).hexdigest()[:16]
+    return get_runtime_dir() / f"{key}.sock"
+
+
+def check_runtime_dir(path: Path) -> None:
+    """
+    Ensure that only the current user can access sockets in `path`.
+    """
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = path.stat()
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"Runtime directory '{path}' is accessible by other users")
+
+
+def run(
+    app_path: str,
+    argv: Optional[Sequence[str]] = None,
+    *,
+    prog_name: Optional[str] = None,
+    spawn: bool = True,
+) -> int:
+    """
+    Run command line `argv` of the app served for `app_path` and return its exit code.
+
+    Shell completion is answered by `typer_di.completion`. When the server is
+    unavailable or its app sources have changed, the command runs in this process
+    and (with `spawn=True`) a fresh server is started for the next calls.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if prog_name is None:
+        prog_name = os.path.basename(sys.argv[0])
+
+    # shell completion requests are answered from the index without any server
+    complete_from_index(app_path, prog_name)
+
+    exit_code = None
+    if is_supported():
+        exit_code = _run_remote(app_path, list(argv), prog_name)
+        if exit_code is None and spawn:
+            _spawn_server(app_path)
+
+    if exit_code is None:
+        exit_code = _run_local(app_path, list(argv), prog_name)
+    return exit_code
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        sys.stderr.write("Usage: python -m typer_di.client module:app [ARGS]...\n")
+        sys.exit(2)
+
+    app_path = sys.argv[1]
+    sys.exit(run(app_path, sys.argv[2:], prog_name=app_path.partition(":")[0]))
+
+
+def send_message(
+    sock: socket.socket, message: Dict[str, Any], fds: Sequence[int] = ()
+) -> None:
+    data = json.dumps(message).encode()
+    data = _HEADER.pack(len(data)) + data
+
+    ancillary = []
+    if fds:
+        ancillary.append((socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds)))
+    sent = sock.sendmsg([data], ancillary)
+    if sent < len(data):
+        sock.sendall(data[sent:])
+
+
+def recv_message(
+    sock: socket.socket, max_fds: int = 0
+) -> Tuple[Optional[Dict[str, Any]], List[int]]:
+    """
+    Receive a message and file descriptors passed with it, `None` on closed connection.
+    """
+    fds = array.array("i")
+    ancbufsize = socket.CMSG_SPACE(max_fds * fds.itemsize) if max_fds else 0
+    # read the header only, the next message must stay in the socket
+    data, ancdata, _, _ = sock.recvmsg(_HEADER.size, ancbufsize)
+    for level, kind, cmsg_data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(cmsg_data[: len(cmsg_data) - len(cmsg_data) % fds.itemsize])
+
+    header = _recv_exactly(sock, data, _HEADER.size)
+    if header is None:
+        return None, list(fds)
+    (size,) = _HEADER.unpack(header)
+
+    payload = _recv_exactly(sock, b"", size)
+    if payload is None:
+        return None, list(fds)
+    return json.loads(payload), list(fds)
+
+
+def _recv_exactly(sock: socket.socket, data: bytes, size: int) -> Optional[bytes]:
+    buffer = bytearray(data)
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer += chunk
+    return bytes(buffer)
+
+
+def _run_remote(app_path: str, argv: List[str], prog_name: str) -> Optional[int]:
+    """
+    Return exit code of the command or `None` if the server didn't start it.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(str(get_socket_path(app_path)))
+            request = {
+                "argv": argv,
+                "prog_name": prog_name,
+                "env": dict(os.environ),
+                "cwd": os.getcwd(),
+            }
+            send_message(sock, request, _STDIO_FDS)
+            response, _ = recv_message(sock)
+        except OSError:
+            return None
+        if response is None or response.get("status") != "running":
+            return None  # stale or stopping server
+
+        # stdio is written by the server directly, wait for the exit code
+        try:
+            response, _ = recv_message(sock)
+        except OSError:
+            response = None
+    finally:
+        sock.close()
+
+    if response is None:
+        sys.stderr.write("Error: connection to typer_di server is lost\n")
+        return 1
+    return int(response["exit_code"])
+
+
+def _run_local(app_path: str, argv: List[str], prog_name: str) -> int:
+    from ._imports import import_object
+
+    app = import_object(app_path)
+    try:
+        app(args=argv, prog_name=prog_name)
+    except SystemExit as ex:
+        if ex.code is None or isinstance(ex.code, int):
+            return ex.code or 0
+        sys.stderr.write(f"{ex.code}\n")
+        return 1
+    return 0
+
+
+def _spawn_server(app_path: str) -> None:
+    import subprocess
+
+    try:
+        subprocess.Popen(
+            [sys.executable, "-m", "typer_di", "serve", app_path],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass  # the next call will try again
+
+
+if __name__ == "__main__":
+    main()
@@ -33,7 +33,7 @@ else:  # pragma: no cover
         def eval_if_str(obj: Any) -> Any:
             if not isinstance(obj, str):
                 return obj
-            return eval(obj, sys.modules[func.__module__].__dict__)
+            return eval(obj, sys.modules[inspect.unwrap(func).__module__].__dict__)
 
         return sig.replace(
             parameters=[
@@ -0,0 +1,304 @@
+"""
+Shell completion of typer apps from a cached index, without importing the app.
+
+Call it before importing the app in the console script entry point:
+
+    def main():
+        typer_di.completion.complete_from_index("my_package.cli:app")
+
+        from my_package.cli import app
+        app()
+
+The index is built on the first completion request and rebuilt when sources of
+the app (or of its dependencies) change.
+"""
+
+import hashlib
+import json
+import os
+import shlex
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+__all__ = ["complete_from_index"]
+
+
+# bump on incompatible changes of the index layout
+INDEX_FORMAT = 1
+
+_Completion = Tuple[str, Optional[str]]  # value and help
+
+
+def complete_from_index(
+    app_path: str,
+    prog_name: Optional[str] = None,
+    *,
+    complete_var: Optional[str] = None,
+) -> None:
+    """
+    Print completions and exit, if the process is started by the shell completion.
+
+    Does nothing for regular calls, for completion script requests and for values
+    of parameters with custom `autocompletion`, they are handled by the app.
+    """
+    if prog_name is None:
+        prog_name = os.path.basename(sys.argv[0])
+    if complete_var is None:
+        complete_var = f"_{prog_name}_COMPLETE".replace("-", "_").upper()
+
+    instruction = os.environ.get(complete_var)
+    if not instruction:
+        return
+
+    # typer scripts pass "complete_bash", click ones "bash_complete"
+    action, _, shell = instruction.partition("_")
+    if action != "complete":
+        shell, action = action, shell
+    if action != "complete" or shell not in _SHELLS:
+        return
+
+    index = _load_index(app_path)
+    if index is None:
+        return
+
+    get_args, format_output = _SHELLS[shell]
+    args, incomplete = get_args()
+    completions = get_completions(index["root"], args, incomplete)
+    if completions is None:
+        return
+
+    output, exit_code = format_output(completions)
+    if output is not None:
+        sys.stdout.write(output + "\n")
+        sys.stdout.flush()
+    sys.exit(exit_code)
+
+
+def get_index_path(app_path: str) -> Path:
+    from ._persist import get_cache_dir
+
+    key = hashlib.sha256(f"{sys.executable}\0{app_path}".encode()).hexdigest()[:16]
+    return get_cache_dir() / "completion" / f"{key}.json"
+
+
+def get_completions(
+    root: Dict[str, Any], args: List[str], incomplete: str
+) -> Optional[List[_Completion]]:
+    """
+    Complete `incomplete` after `args` like click does, `None` for dynamic values.
+    """
+    node = root
+    positional = 0
+    used_options: List[Dict[str, Any]] = []
+    expect_value: Optional[Dict[str, Any]] = None
+    after_separator = False
+
+    for arg in args:
+        if expect_value is not None:
+            expect_value = None
+        elif not after_separator and arg == "--":
+            after_separator = True
+        elif not after_separator and arg.startswith("-") and len(arg) > 1:
+            option = _find_option(node, arg.partition("=")[0])
+            if option is not None:
+                used_options.append(option)
+                if option["takes_value"] and "=" not in arg:
+                    expect_value = option
+        elif arg in node.get("commands", ()):
+            node = node["commands"][arg]
+            positional = 0
+            used_options = []
+            after_separator = False
+        else:
+            positional += 1
+
+    # shells split `--opt=value` differently, complete the value alone
+    if incomplete == "=":
+        incomplete = ""
+    elif "=" in incomplete and incomplete.startswith("-") and not after_separator:
+        name, _, incomplete = incomplete.partition("=")
+        expect_value = _find_option(node, name)
+        if expect_value is None:
+            return []
+
+    if expect_value is not None:
+        return _complete_values(expect_value["values"], incomplete)
+
+    if not after_separator and incomplete and not incomplete[0].isalnum():
+        return [
+            (name, option["help"])
+            for option in node["options"]
+            if option["multiple"] or not any(option is used for used in used_options)
+            for name in option["names"]
+            if name.startswith(incomplete)
+        ]
+
+    argument = _find_argument(node, positional)
+    if argument is not None:
+        return _complete_values(argument["values"], incomplete)
+
+    return [
+        (name, command["help"] or None)
+        for name, command in node.get("commands", {}).items()
+        if name.startswith(incomplete) and not command["hidden"]
+    ]
+
+
+def _find_option(node: Dict[str, Any], name: str) -> Optional[Dict[str, Any]]:
+    options: List[Dict[str, Any]] = node["options"]
+    for option in options:
+        if name in option["names"]:
+            return option
+    return None
+
+
+def _find_argument(node: Dict[str, Any], positional: int) -> Optional[Dict[str, Any]]:
+    arguments: List[Dict[str, Any]] = node["arguments"]
+    for argument in arguments:
+        # `nargs=-1` takes all the rest
+        if argument["nargs"] < 0 or positional < argument["nargs"]:
+            return argument
+        positional -= argument["nargs"]
+    return None
+
+
+def _complete_values(values: Any, incomplete: str) -> Optional[List[_Completion]]:
+    if values is None:
+        return []
+    if values == "dynamic":
+        return None
+    if values == "path":
+        # click leaves paths to the shell
+        return [(incomplete, None)]
+
+    if values["case_sensitive"]:
+        return [(c, None) for c in values["choices"] if c.startswith(incomplete)]
+    incomplete = incomplete.lower()
+    return [(c, None) for c in values["choices"] if c.lower().startswith(incomplete)]
+
+
+def _load_index(app_path: str) -> Optional[Dict[str, Any]]:
+    from ._imports import sources_changed
+
+    path = get_index_path(app_path)
+    try:
+        index: Dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pass
+    else:
+        if index.get("format") == INDEX_FORMAT and not sources_changed(index["sources"]):
+            return index
+
+    try:
+        return _rebuild_index(app_path, path)
+    except Exception:
+        return None  # let the app complete itself
+
+
+def _rebuild_index(app_path: str, path: Path) -> Dict[str, Any]:
+    from ._completion import build_index
+    from ._imports import collect_sources, import_object
+
+    index = build_index(import_object(app_path))
+    index["sources"] = collect_sources()
+
+    # the index is an optimization, failed write only makes the next call slower
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_name, path)
+    except OSError:
+        pass
+    return index
+
+
+def _split_arg_string(string: str) -> List[str]:
+    # the last word may have an unclosed quote
+    lex = shlex.shlex(string, posix=True)
+    lex.whitespace_split = True
+    lex.commenters = ""
+    out = []
+    try:
+        for token in lex:
+            out.append(token)
+    except ValueError:
+        out.append(lex.token)
+    return out
+
+
+def _get_bash_args() -> Tuple[List[str], str]:
+    cwords = _split_arg_string(os.environ["COMP_WORDS"])
+    cword = int(os.environ["COMP_CWORD"])
+    incomplete = cwords[cword] if cword < len(cwords) else ""
+    return cwords[1:cword], incomplete
+
+
+def _get_typer_args() -> Tuple[List[str], str]:
+    completion_args = os.environ.get("_TYPER_COMPLETE_ARGS", "")
+    args = _split_arg_string(completion_args)[1:]
+    if args and not completion_args.endswith(" "):
+        return args[:-1], args[-1]
+    return args, ""
+
+
+def _get_powershell_args() -> Tuple[List[str], str]:
+    cwords = _split_arg_string(os.environ.get("_TYPER_COMPLETE_ARGS", ""))
+    incomplete = os.environ.get("_TYPER_COMPLETE_WORD_TO_COMPLETE", "")
+    return (cwords[1:-1] if incomplete else cwords[1:]), incomplete
+
+
+# output formats of typer completion classes
+
+
+def _format_bash(completions: List[_Completion]) -> Tuple[Optional[str], int]:
+    return "\n".join(value for value, _ in completions), 0
+
+
+def _format_zsh(completions: List[_Completion]) -> Tuple[Optional[str], int]:
+    def escape(s: str) -> str:
+        return (
+            s.replace('"', '""')
+            .replace("'", "''")
+            .replace("$", "\\$")
+            .replace("`", "\\`")
+            .replace(":", r"\\:")
+        )
+
+    if not completions:
+        return "_files", 0
+
+    items = "\n".join(
+        f'"{escape(value)}":"{escape(help)}"' if help else f'"{escape(value)}"'
+        for value, help in completions
+    )
+    return f"_arguments '*: :(({items}))'", 0
+
+
+def _format_fish(completions: List[_Completion]) -> Tuple[Optional[str], int]:
+    action = os.environ.get("_TYPER_COMPLETE_FISH_ACTION", "")
+    if action == "is-args":
+        # completions of args disable completion of files
+        return None, 0 if completions else 1
+    if action == "get-args" and completions:
+        return "\n".join(
+            f"{value}\t{' '.join(help.split())}" if help else value
+            for value, help in completions
+        ), 0
+    return "", 0
+
+
+def _format_powershell(completions: List[_Completion]) -> Tuple[Optional[str], int]:
+    return "\n".join(f"{value}:::{help or ' '}" for value, help in completions), 0
+
+
+_SHELLS = {
+    "bash": (_get_bash_args, _format_bash),
+    "zsh": (_get_typer_args, _format_zsh),
+    "fish": (_get_typer_args, _format_fish),
+    "powershell": (_get_powershell_args, _format_powershell),
+    "pwsh": (_get_powershell_args, _format_powershell),
+}
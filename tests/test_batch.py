@@ -0,0 +1,117 @@
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest import mock
+
+import typer
+from typer.testing import CliRunner
+
+from tests.helpers import assert_words_in_message
+from typer_di import Depends, TyperDI, clear_process_scope
+from typer_di.__main__ import app as tools_app
+from typer_di.compat import Annotated
+
+connect_mock = mock.Mock(name="connect_mock")
+
+
+def connect() -> str:
+    connect_mock()
+    return "db"
+
+
+def get_name(name: Annotated[str, typer.Option("--name")] = "world") -> str:
+    return name
+
+
+app = TyperDI()
+
+
+@app.command()
+def hello(db=Depends(connect, scope="process"), name=Depends(get_name)):
+    typer.echo(f"hello {name} from {db}")
+
+
+def connect_to(url: Annotated[str, typer.Option("--url")] = "main") -> str:
+    return f"db({url})"
+
+
+@app.command()
+def ping(db=Depends(connect_to, scope="process")):
+    typer.echo(db)
+
+
+@app.command()
+def fail(code: int):
+    if code < 0:
+        raise RuntimeError("negative code")
+    raise typer.Exit(code)
+
+
+def run_batch(lines: List[str]) -> List[Dict[str, Any]]:
+    output = io.StringIO()
+    app.run_batch(lines, output, prog_name="tool")
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def setup_function():
+    connect_mock.reset_mock()
+    clear_process_scope()
+
+
+def test_dont_reuse_process_scope_for_other_params():
+    results = run_batch(["ping --url a", "ping --url b", "ping"])
+
+    assert [r["stdout"] for r in results] == ["db(a)\n", "db(b)\n", "db(main)\n"]
+
+
+def test_run_lines_and_reuse_process_scope():
+    results = run_batch(["hello", "hello --name 'typer di'"])
+
+    assert [r["stdout"] for r in results] == [
+        "hello world from db\n",
+        "hello typer di from db\n",
+    ]
+    assert results[1]["argv"] == ["hello", "--name", "typer di"]
+    assert [r["exit_code"] for r in results] == [0, 0]
+    connect_mock.assert_called_once_with()
+
+
+def test_skip_empty_lines_and_comments():
+    results = run_batch(["# comment", "", "hello\n"])
+
+    assert [r["line"] for r in results] == [3]
+
+
+def test_report_failures():
+    output = io.StringIO()
+    failed = app.run_batch(["fail 3", "fail -- -1", "missing", "hello 'x"], output)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert failed == 4
+    assert [r["exit_code"] for r in results] == [3, 1, 2, 2]
+    assert_words_in_message("RuntimeError: negative code", results[1]["stderr"])
+    assert_words_in_message("No such command 'missing'", results[2]["stderr"])
+    assert results[3]["argv"] is None
+
+
+def test_batch_command(tmp_path: Path):
+    input_file = tmp_path / "batch.txt"
+    input_file.write_text("hello --name a\nhello --name b\n")
+    output = tmp_path / "results.jsonl"
+
+    r = CliRunner().invoke(
+        tools_app,
+        ["batch", "tests.test_batch:app", str(input_file), "-o", str(output)],
+    )
+
+    assert r.exit_code == 0, r.output
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r["stdout"] for r in results] == ["hello a from db\n", "hello b from db\n"]
+
+
+def test_batch_command_from_stdin():
+    r = CliRunner().invoke(tools_app, ["batch", "tests.test_batch:app"], input="fail 1\n")
+
+    assert r.exit_code == 1
+    assert json.loads(r.output)["exit_code"] == 1
@@ -0,0 +1,30 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks.__main__ import main
+from benchmarks.graphs import SHAPES, make_graph
+from typer_di import create_di_wrapper
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_graph_matches_manual_wrapper(shape: str):
+    graph = make_graph(shape, 9)
+
+    wrapper = create_di_wrapper(graph.command)
+
+    assert wrapper(**graph.kwargs) == graph.manual(**graph.kwargs)
+
+
+def test_write_and_compare_results(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    output = tmp_path / "results.json"
+
+    main(["--quick", "-o", str(output)])
+    main(["--quick", "--compare", str(output)])
+
+    data = json.loads(output.read_text())
+    assert {"build_cold", "call_overhead", "app_startup", "import"} <= {
+        r["name"] for r in data["results"]
+    }
+    assert "Compared to" in capsys.readouterr().out
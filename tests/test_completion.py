@@ -0,0 +1,168 @@
+import enum
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from tests.test_package import get_imported_modules
+from typer_di import Depends, TyperDI, set_persistent_cache
+from typer_di.completion import complete_from_index, get_index_path
+from typer_di.compat import Annotated
+
+APP_PATH = "tests.test_completion:app"
+
+
+class Color(str, enum.Enum):
+    red = "red"
+    green = "green"
+
+
+def get_verbose(verbose: Annotated[bool, typer.Option("--verbose", "-v")] = False):
+    return verbose
+
+
+def get_color(color: Annotated[Color, typer.Option("--color", help="Output color.")]):
+    return color
+
+
+app = TyperDI()
+db_app = TyperDI()
+app.add_typer(db_app, name="db", help="Database commands.")
+
+
+@app.command(help="Show files.")
+def show(
+    path: Annotated[Path, typer.Argument()],
+    verbose=Depends(get_verbose),
+    color=Depends(get_color),
+):
+    ...
+
+
+@app.command(hidden=True)
+def secret():
+    ...
+
+
+@db_app.command()
+def migrate(
+    target: Annotated[
+        str, typer.Option(autocompletion=lambda: ["head", "base"], help="Revision.")
+    ] = "head",
+    verbose=Depends(get_verbose),
+):
+    """Apply migrations."""
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path: Path):
+    set_persistent_cache(tmp_path)
+    yield tmp_path
+    set_persistent_cache()
+
+
+def complete_by_app(env: Dict[str, str]) -> str:
+    r = CliRunner().invoke(app, [], prog_name="tool", env=env)
+    return r.output
+
+
+def complete_by_index(
+    env: Dict[str, str], monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> Optional[str]:
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+
+    try:
+        complete_from_index(APP_PATH, "tool")
+    except SystemExit:
+        return capsys.readouterr().out
+    return None
+
+
+def bash_env(words: str) -> Dict[str, str]:
+    return {
+        "_TOOL_COMPLETE": "complete_bash",
+        "COMP_WORDS": words,
+        "COMP_CWORD": str(len(words.split(" ")) - 1),
+    }
+
+
+def zsh_env(words: str) -> Dict[str, str]:
+    return {"_TOOL_COMPLETE": "complete_zsh", "_TYPER_COMPLETE_ARGS": words}
+
+
+@pytest.mark.parametrize(
+    "env",
+    [
+        bash_env("tool "),
+        bash_env("tool s"),
+        bash_env("tool --"),
+        bash_env("tool show -"),
+        bash_env("tool show --verbose --"),
+        bash_env("tool show x --color "),
+        bash_env("tool show x --color=g"),
+        bash_env("tool show "),
+        bash_env("tool db "),
+        bash_env("tool db migrate --"),
+        zsh_env("tool "),
+        zsh_env("tool db migrate --v"),
+        zsh_env("tool show x --color r"),
+    ],
+)
+def test_complete_like_app(
+    env: Dict[str, str], monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+):
+    expected = complete_by_app(env)
+
+    assert complete_by_index(env, monkeypatch, capsys) == expected
+
+
+def test_fall_back_to_app_for_dynamic_values(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+):
+    env = bash_env("tool db migrate --target ")
+
+    assert complete_by_index(env, monkeypatch, capsys) is None
+    assert complete_by_app(env) == "head\nbase\n"
+
+
+def test_ignore_regular_calls(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture):
+    monkeypatch.delenv("_TOOL_COMPLETE", raising=False)
+
+    assert complete_by_index({}, monkeypatch, capsys) is None
+    assert not get_index_path(APP_PATH).exists()
+
+
+def test_rebuild_stale_index(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture):
+    complete_by_index(bash_env("tool "), monkeypatch, capsys)
+    index_path = get_index_path(APP_PATH)
+    index = json.loads(index_path.read_text())
+    assert __file__ in index["sources"]
+
+    # pretend that the app had no commands when the index was built
+    index["root"]["commands"] = {}
+    index["sources"][__file__] -= 1
+    index_path.write_text(json.dumps(index))
+
+    assert complete_by_index(bash_env("tool "), monkeypatch, capsys) == "show\ndb\n"
+
+
+def test_dont_import_app_with_fresh_index(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture, cache_dir: Path
+):
+    complete_by_index(bash_env("tool "), monkeypatch, capsys)
+
+    code = (
+        "from typer_di.completion import complete_from_index; "
+        f"complete_from_index({APP_PATH!r}, 'tool')"
+    )
+    env = dict(bash_env("tool sh"), TYPER_DI_CACHE_DIR=str(cache_dir))
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    modules = get_imported_modules(code)
+
+    assert "typer_di.completion" in modules
+    assert not {"tests.test_completion", "typer", "click"} & modules
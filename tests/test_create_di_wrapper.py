@@ -1,3 +1,6 @@
+import asyncio
+import sys
+import threading
 from inspect import Signature, signature
 from typing import Any
 from unittest import mock
@@ -6,7 +9,7 @@ import pytest
 import typer
 
 from tests.helpers import assert_words_in_message
-from typer_di import Depends, TyperDIError, create_di_wrapper
+from typer_di import Depends, Lazy, TyperDIError, create_di_wrapper
 from typer_di.compat import Annotated
 
 
@@ -23,6 +26,21 @@ def test_call_original_method():
     assert r == 42
 
 
+def test_return_function_without_dependencies():
+    def func(x, *, y=1):
+        ...
+
+    async def async_func(x):
+        ...
+
+    def positional_only(x, /):
+        ...
+
+    assert create_di_wrapper(func) is func
+    assert create_di_wrapper(async_func) is not async_func
+    assert create_di_wrapper(positional_only) is not positional_only
+
+
 def test_restore_signature():
     def func(x: int, y=17, z: str = "abc") -> dict:
         ...
@@ -196,8 +214,222 @@ def test_error_on_cycles():
         "cycle in dependency graph get_loop_first",
         ctx.value,
     )
+    assert "get_loop_first -> get_loop_third -> get_loop_second -> get_loop_first" in str(
+        ctx.value
+    )
+
+
+def test_resolve_graphs_deeper_than_recursion_limit():
+    def make_dep(prev):
+        def dep(x: int = Depends(prev)) -> int:
+            return x + 1
+
+        return dep
+
+    def base(start: int) -> int:
+        return start
+
+    depth = 3 * sys.getrecursionlimit()
+    dep = base
+    for _ in range(depth):
+        dep = make_dep(dep)
+
+    def command(x: int = Depends(dep)) -> int:
+        return x
+
+    assert create_di_wrapper(command)(start=1) == depth + 1
+
+
+def test_resolve_graphs_with_many_params():
+    source = "\n".join(
+        f"def dep_{i}(p_{i}: int = {i}) -> int:\n    return p_{i}\n" for i in range(2000)
+    )
+    args = ", ".join(f"v_{i}=Depends(dep_{i})" for i in range(2000))
+    source += f"\ndef command({args}):\n    return v_1999\n"
+    namespace = {"Depends": Depends}
+    exec(source, namespace)
+
+    wrapper = create_di_wrapper(namespace["command"])
+
+    assert len(signature(wrapper).parameters) == 2000
+    assert wrapper() == 1999
 
 
 # TODO: deny varargs and kwargs in callbacks
 
 # TBD: replace wrapped signatures by `Signature.empty` instead of `Depends`
+
+
+def test_async_dependencies_and_command():
+    async def get_a(a: int):
+        await asyncio.sleep(0)
+        return a
+
+    async def get_b(b: int = 2):
+        await asyncio.sleep(0)
+        return b
+
+    async def command(x=Depends(get_a), y=Depends(get_b)) -> int:
+        return x + y
+
+    wrapper = create_di_wrapper(command)
+
+    assert not asyncio.iscoroutinefunction(wrapper)
+    assert signature(wrapper).return_annotation == int
+    assert wrapper(1, b=5) == 6
+
+
+def test_run_independent_async_dependencies_concurrently():
+    async def wait_each_other(own: asyncio.Event, other: asyncio.Event):
+        own.set()
+        await asyncio.wait_for(other.wait(), timeout=1)
+
+    async def get_events():
+        return asyncio.Event(), asyncio.Event()
+
+    async def first(events=Depends(get_events)):
+        await wait_each_other(events[0], events[1])
+        return 1
+
+    async def second(events=Depends(get_events)):
+        await wait_each_other(events[1], events[0])
+        return 2
+
+    def command(x=Depends(first), y=Depends(second)):
+        return x + y
+
+    wrapper = create_di_wrapper(command)
+
+    assert wrapper() == 3
+
+
+def test_run_parallel_dependencies_in_threads():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def get_first():
+        barrier.wait()
+        return 1
+
+    def get_second():
+        barrier.wait()
+        return 2
+
+    def command(x=Depends(get_first, parallel=True), y=Depends(get_second, parallel=True)):
+        return x + y
+
+    assert create_di_wrapper(command)() == 3
+
+
+def test_run_all_dependencies_in_threads():
+    barrier = threading.Barrier(2, timeout=5)
+    calls = mock.Mock(name="calls")
+
+    def get_first():
+        calls("first")
+        barrier.wait()
+        return 1
+
+    def get_second():
+        calls("second")
+        barrier.wait()
+        return 2
+
+    def command(x=Depends(get_first), y=Depends(get_second)):
+        return x + y
+
+    assert create_di_wrapper(command, parallel=True)() == 3
+    assert calls.call_count == 2
+
+
+@pytest.mark.parametrize("parallel_app", [False, True])
+def test_call_parallel_async_dependencies_once(parallel_app: bool):
+    calls = mock.Mock(name="calls")
+
+    async def fetch(url: str = "a"):
+        calls("fetch")
+        await asyncio.sleep(0)
+        return url
+
+    async def get_token():
+        calls("token")
+        return "t"
+
+    def get_local():
+        calls("local")
+        return 1
+
+    def command(
+        x=Depends(fetch, parallel=True),
+        t=Depends(get_token, parallel=True),
+        n=Depends(get_local, parallel=True),
+    ):
+        return x, t, n
+
+    wrapper = create_di_wrapper(command, parallel=parallel_app)
+
+    assert wrapper() == ("a", "t", 1)
+    assert sorted(c.args[0] for c in calls.call_args_list) == ["fetch", "local", "token"]
+
+
+def test_inject_lazy_dependency():
+    calls = mock.Mock(name="calls")
+
+    def get_base(x: int):
+        calls("base")
+        return x
+
+    def get_config(base: int = Depends(get_base), y: int = 0):
+        calls("config")
+        return base + y
+
+    def command(cfg: Annotated[Lazy[int], Depends(get_config)], use: bool = False):
+        return cfg.get() if use else None
+
+    wrapper = create_di_wrapper(command)
+
+    # options of lazy dependencies are still merged into the signature
+    assert list(signature(wrapper).parameters) == ["x", "y", "use"]
+
+    assert wrapper(x=1, y=2) is None
+    calls.assert_not_called()
+
+    assert wrapper(x=1, y=2, use=True) == 3
+    assert calls.call_args_list == [mock.call("base"), mock.call("config")]
+
+
+def test_lazy_depends_flag():
+    calls = mock.Mock(name="calls")
+
+    def get_value():
+        calls()
+        return 42
+
+    def command(value=Depends(get_value, lazy=True)):
+        return value
+
+    lazy = create_di_wrapper(command)()
+
+    calls.assert_not_called()
+    assert isinstance(lazy, Lazy)
+    assert lazy.get() == 42
+
+
+def test_override_dependency_subgraph():
+    def get_inner(inner: int):
+        return inner
+
+    def get_value(x=Depends(get_inner)):
+        return x
+
+    def fake_value(fake: str):
+        return fake
+
+    def command(value=Depends(get_value)):
+        return value
+
+    wrapper = create_di_wrapper(command, overrides={get_value: fake_value})
+
+    assert list(signature(wrapper).parameters) == ["fake"]
+    assert wrapper(fake="test") == "test"
+    # plans of original callbacks are untouched
+    assert list(signature(create_di_wrapper(command)).parameters) == ["inner"]
@@ -0,0 +1,156 @@
+import sys
+from inspect import signature
+from pathlib import Path
+from unittest import mock
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from tests.helpers import assert_words_in_message
+from typer_di import Depends, TyperDI, create_di_wrapper, freeze_app
+from typer_di import _freeze, _typer_di
+from typer_di.__main__ import app as tools_app
+from typer_di.compat import Annotated
+
+command_mock = mock.Mock(name="command_mock")
+
+
+def get_value(value: Annotated[int, typer.Option("--value")] = 1) -> int:
+    return value * 10
+
+
+def get_other(other: int = 2) -> int:
+    return other
+
+
+def cmd_show(name: str, v: int = Depends(get_value)) -> str:
+    command_mock(name=name, v=v)
+    return f"{name}={v}"
+
+
+def load_config(path: str = "p") -> str:
+    return path
+
+
+def get_settings(config: str = Depends(load_config)) -> str:
+    return f"settings({config})"
+
+
+def cmd_settings(settings: str = Depends(get_settings), config: int = 5) -> str:
+    return f"{settings} {config}"
+
+
+class Config:
+    def __init__(self, path: str = "x") -> None:
+        self.path = path
+
+
+def cmd_config(config: Config = Depends(Config)) -> str:
+    return config.path
+
+
+app = TyperDI()
+app.command("show")(cmd_show)
+app.command("settings")(cmd_settings)
+app.command("config")(cmd_config)
+
+
+@pytest.fixture
+def frozen_module(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    module_name = f"_frozen_di_{id(tmp_path)}"
+    (tmp_path / f"{module_name}.py").write_text(freeze_app(app))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield module_name
+    _freeze._loaded_modules.pop(module_name, None)
+    sys.modules.pop(module_name, None)
+
+
+def test_generate_importable_module(frozen_module: str):
+    module = __import__(frozen_module)
+
+    assert module.FROZEN_FORMAT == _freeze.FROZEN_FORMAT
+    assert list(module.WRAPPERS) == [
+        "tests.test_freeze:cmd_show",
+        "tests.test_freeze:cmd_settings",
+    ]
+
+
+def test_load_wrapper_with_same_signature(frozen_module: str):
+    wrapper = _freeze.load_frozen_wrapper(frozen_module, cmd_show)
+
+    assert wrapper is not None
+    assert signature(wrapper) == signature(create_di_wrapper(cmd_show))
+    assert wrapper.__name__ == "cmd_show"
+    assert wrapper("x", 3) == "x=30"
+
+
+def test_param_named_as_dependency_argument(frozen_module: str):
+    wrapper = _freeze.load_frozen_wrapper(frozen_module, cmd_settings)
+
+    assert wrapper is not None
+    assert signature(wrapper) == signature(create_di_wrapper(cmd_settings))
+    assert wrapper() == "settings(p) 5"
+
+
+def test_skip_params_of_class_dependencies(frozen_module: str):
+    assert _freeze.load_frozen_wrapper(frozen_module, cmd_config) is None
+
+
+def test_fallback_on_stale_dependency(
+    frozen_module: str, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(sys.modules[__name__], "get_value", get_other)
+
+    assert _freeze.load_frozen_wrapper(frozen_module, cmd_show) is None
+
+
+def test_fallback_on_missing_module():
+    assert _freeze.load_frozen_wrapper("_missing_frozen_di", cmd_show) is None
+
+
+def test_use_frozen_wrappers_in_app(
+    frozen_module: str, monkeypatch: pytest.MonkeyPatch
+):
+    spy = mock.Mock(name="create_di_wrapper", wraps=create_di_wrapper)
+    monkeypatch.setattr(_typer_di, "create_di_wrapper", spy)
+    command_mock.reset_mock()
+
+    frozen_app = TyperDI(frozen=frozen_module)
+    frozen_app.command("show")(cmd_show)
+
+    @frozen_app.command("local")
+    def cmd_local(v: int = Depends(get_value)):
+        ...
+
+    r = CliRunner().invoke(frozen_app, "show abc --value 4")
+
+    assert r.exit_code == 0
+    command_mock.assert_called_once_with(name="abc", v=40)
+    # only local function is compiled at runtime
+    assert [c.args[0] for c in spy.call_args_list] == [cmd_local]
+
+
+def test_freeze_lazy_sub_apps():
+    parent = TyperDI()
+    parent.add_typer("tests.test_freeze:app", name="sub")
+
+    assert "'tests.test_freeze:cmd_show'" in freeze_app(parent)
+
+
+def test_freeze_command(tmp_path: Path):
+    output = tmp_path / "frozen.py"
+
+    r = CliRunner().invoke(tools_app, ["freeze", "tests.test_freeze:app", "-o", str(output)])
+
+    assert r.exit_code == 0, r.output
+    assert_words_in_message("def _make_0", output.read_text())
+
+
+def test_freeze_command_rejects_other_objects(tmp_path: Path):
+    r = CliRunner().invoke(
+        tools_app, ["freeze", "tests.test_freeze:get_value", "-o", str(tmp_path / "x.py")]
+    )
+
+    assert r.exit_code != 0
+    assert_words_in_message("not a TyperDI app", r.output)
@@ -0,0 +1,197 @@
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from tests.helpers import assert_words_in_message
+from typer_di import (
+    Depends,
+    MethodBuilderError,
+    TyperDI,
+    clear_process_scope,
+    create_di_wrapper,
+    dependency_context,
+)
+from typer_di.compat import Annotated
+
+
+@pytest.fixture
+def log() -> List[str]:
+    return []
+
+
+def test_teardown_in_reverse_order(log: List[str]):
+    def get_pool(url: str):
+        log.append("open pool")
+        yield f"pool({url})"
+        log.append("close pool")
+
+    def get_client(pool=Depends(get_pool)):
+        log.append("open client")
+        yield f"client({pool})"
+        log.append("close client")
+
+    def command(client=Depends(get_client), pool=Depends(get_pool)):
+        log.append(f"run {client}")
+        return pool
+
+    assert create_di_wrapper(command)(url="db") == "pool(db)"
+    assert log == [
+        "open pool",
+        "open client",
+        "run client(pool(db))",
+        "close client",
+        "close pool",
+    ]
+
+
+def test_throw_error_to_generator(log: List[str]):
+    def get_conn():
+        try:
+            yield "conn"
+        except KeyError:
+            log.append("rollback")
+            raise
+        finally:
+            log.append("close")
+
+    def command(conn=Depends(get_conn)):
+        raise KeyError(conn)
+
+    with pytest.raises(KeyError):
+        create_di_wrapper(command)()
+    assert log == ["rollback", "close"]
+
+
+def test_async_generators(log: List[str]):
+    def get_pool():
+        yield "pool"
+        log.append("close pool")
+
+    async def get_session(pool=Depends(get_pool)):
+        yield f"session({pool})"
+        log.append("close session")
+
+    async def command(session=Depends(get_session)):
+        log.append(f"run {session}")
+
+    create_di_wrapper(command)()
+    assert log == ["run session(pool)", "close session", "close pool"]
+
+
+def test_parallel_generators(log: List[str]):
+    def get_first():
+        yield 1
+        log.append("close first")
+
+    def get_second():
+        yield 2
+        log.append("close second")
+
+    def command(a=Depends(get_first), b=Depends(get_second)):
+        return a + b
+
+    assert create_di_wrapper(command, parallel=True)() == 3
+    assert sorted(log) == ["close first", "close second"]
+
+
+def test_teardown_with_dependency_context(log: List[str]):
+    def get_client():
+        log.append("open")
+        yield "client"
+        log.append("close")
+
+    wrapper = create_di_wrapper(lambda c=Depends(get_client, scope="context"): c)
+
+    with dependency_context():
+        assert wrapper() == "client"
+        assert wrapper() == "client"
+        assert log == ["open"]
+    assert log == ["open", "close"]
+
+
+def test_teardown_process_scope(log: List[str]):
+    def get_client():
+        yield "client"
+        log.append("close")
+
+    wrapper = create_di_wrapper(lambda c=Depends(get_client, scope="process"): c)
+
+    wrapper()
+    wrapper()
+    assert log == []
+
+    clear_process_scope()
+    assert log == ["close"]
+
+
+def test_share_context_generator_with_subcommands(log: List[str]):
+    def get_client(token: Annotated[str, typer.Option("--token")] = "default"):
+        log.append(f"open {token}")
+        yield token
+        log.append("close")
+
+    app = TyperDI()
+
+    @app.callback()
+    def main(client=Depends(get_client, scope="context")):
+        log.append(f"main {client}")
+
+    @app.command()
+    def hello(client=Depends(get_client, scope="context")):
+        log.append(f"hello {client}")
+
+    r = CliRunner().invoke(app, "--token abc hello")
+
+    assert r.exit_code == 0, r.output
+    assert log == ["open abc", "main abc", "hello abc", "close"]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"persist": True}, {"cache": True}],
+)
+def test_error_on_cached_generator(options):
+    def get_client():
+        yield "client"
+
+    with pytest.raises(MethodBuilderError) as ex:
+        create_di_wrapper(lambda c=Depends(get_client, **options): c)
+    assert_words_in_message(["get_client", "generator"], ex.value)
+
+
+def test_error_on_scoped_async_generator():
+    async def get_client():
+        yield "client"
+
+    with pytest.raises(MethodBuilderError) as ex:
+        create_di_wrapper(lambda c=Depends(get_client, scope="process"): c)
+    assert_words_in_message(["get_client", "process"], ex.value)
+
+
+map_app = TyperDI()
+
+
+def get_marker(marker_dir: Annotated[Path, typer.Option()]):
+    yield marker_dir
+    (marker_dir / f"closed-{os.getpid()}").touch(exist_ok=False)
+
+
+@map_app.command(map_over="value")
+def check(value: int, marker_dir=Depends(get_marker)):
+    assert not list(marker_dir.iterdir())
+    return value
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_keep_open_while_mapping(tmp_path: Path, jobs: str):
+    values = [str(i) for i in range(6)]
+    r = CliRunner().invoke(map_app, ["-j", jobs, "--marker-dir", str(tmp_path), *values])
+
+    assert r.exit_code == 0, r.output
+    assert r.output.split() == values
+    # torn down once per worker
+    assert 1 <= len(list(tmp_path.iterdir())) <= int(jobs)
@@ -0,0 +1,111 @@
+import asyncio
+from typing import Iterator, List, Optional, Tuple
+from unittest import mock
+
+import pytest
+
+from typer_di import (
+    Depends,
+    DependencyInfo,
+    create_di_wrapper,
+    set_instrumentation_hooks,
+)
+from typer_di._create_di_wrapper import create_di_builder
+
+Event = Tuple[str, DependencyInfo, Optional[BaseException]]
+
+
+@pytest.fixture
+def events() -> Iterator[List[Event]]:
+    events: List[Event] = []
+
+    def on_start(info: DependencyInfo) -> None:
+        events.append(("start", info, None))
+
+    def on_end(info: DependencyInfo, duration: float, ex: Optional[BaseException]):
+        assert duration >= 0
+        events.append(("end", info, ex))
+
+    set_instrumentation_hooks(on_start, on_end)
+    yield events
+    set_instrumentation_hooks()
+
+
+def get_config(path: str) -> str:
+    return f"config:{path}"
+
+
+def get_client(cfg: str = Depends(get_config)) -> str:
+    return f"client:{cfg}"
+
+
+def command(client: str = Depends(get_client), cfg: str = Depends(get_config)) -> str:
+    return client
+
+
+def test_dont_instrument_by_default():
+    program = create_di_builder(command).format_program()
+
+    assert "__instrument" not in program
+
+
+def test_dont_instrument_wrappers_built_before_hooks(events: List[Event]):
+    set_instrumentation_hooks()
+    wrapper = create_di_wrapper(command)
+    on_start = mock.Mock(name="on_start")
+    set_instrumentation_hooks(on_start)
+
+    wrapper(path="p")
+
+    on_start.assert_not_called()
+
+
+def test_report_calls_in_order(events: List[Event]):
+    wrapper = create_di_wrapper(command)
+
+    assert wrapper(path="p") == "client:config:p"
+
+    assert [(kind, info.name) for kind, info, _ in events] == [
+        ("start", "get_config"),
+        ("end", "get_config"),
+        ("start", "get_client"),
+        ("end", "get_client"),
+        ("start", "command"),
+        ("end", "command"),
+    ]
+
+    infos = [info for kind, info, _ in events if kind == "end"]
+    assert infos == [
+        DependencyInfo("get_config", 0, (), "command"),
+        DependencyInfo("get_client", 1, (0,), "command"),
+        DependencyInfo("command", 2, (1, 0), "command", is_command=True),
+    ]
+
+
+def test_report_exceptions(events: List[Event]):
+    def failing():
+        raise KeyError("failed")
+
+    def cmd(x=Depends(failing)):
+        pass
+
+    wrapper = create_di_wrapper(cmd)
+
+    with pytest.raises(KeyError):
+        wrapper()
+
+    [_, (kind, info, ex)] = events
+    assert kind == "end" and info.name.endswith("failing")
+    assert isinstance(ex, KeyError)
+
+
+def test_measure_async_callbacks(events: List[Event]):
+    async def get_value():
+        await asyncio.sleep(0)
+        return 1
+
+    async def cmd(x=Depends(get_value)):
+        return x
+
+    assert create_di_wrapper(cmd)() == 1
+    assert [kind for kind, _, _ in events] == ["start", "end", "start", "end"]
@@ -0,0 +1,48 @@
+from unittest import mock
+
+from typer_di import Depends, Lazy
+from typer_di._lazy import is_lazy_annotation
+from typer_di.compat import Annotated
+
+
+def test_evaluate_once():
+    thunk = mock.Mock(return_value=42)
+    lazy = Lazy(thunk)
+
+    thunk.assert_not_called()
+    assert not lazy.evaluated
+
+    assert lazy.get() == 42
+    assert lazy.get() == 42
+    assert lazy.evaluated
+    thunk.assert_called_once_with()
+
+
+def test_retry_failed_evaluation():
+    thunk = mock.Mock(side_effect=[KeyError("first"), 42])
+    lazy = Lazy(thunk)
+
+    try:
+        lazy.get()
+    except KeyError:
+        pass
+
+    assert not lazy.evaluated
+    assert lazy.get() == 42
+
+
+def test_repr():
+    lazy = Lazy(lambda: "value")
+    assert repr(lazy) == "Lazy(<not evaluated>)"
+
+    lazy.get()
+    assert repr(lazy) == "Lazy('value')"
+
+
+def test_detect_lazy_annotation():
+    assert is_lazy_annotation(Lazy)
+    assert is_lazy_annotation(Lazy[int])
+    assert is_lazy_annotation(Annotated[Lazy[int], Depends(int)])
+
+    assert not is_lazy_annotation(int)
+    assert not is_lazy_annotation(Annotated[int, Depends(int)])
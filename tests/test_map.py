@@ -0,0 +1,139 @@
+import os
+from typing import List
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from tests.helpers import assert_words_in_message
+from typer_di import Depends, TyperDI, TyperDIError
+from typer_di.compat import Annotated
+
+setup_calls: List[str] = []
+
+
+def get_prefix(prefix: Annotated[str, typer.Option()] = "item"):
+    setup_calls.append(prefix)
+    return prefix
+
+
+app = TyperDI()
+
+
+@app.command(map_over="value")
+def process(value: Annotated[int, typer.Argument()], prefix=Depends(get_prefix)):
+    return f"{prefix} {value * 10} {os.getpid()}"
+
+
+@app.command(map_over="name")
+def greet(name: str):
+    if name != "nobody":
+        return f"hello {name}"
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    setup_calls.clear()
+
+
+def parse(output: str):
+    return [line.split() for line in output.splitlines()]
+
+
+def test_run_in_process():
+    r = CliRunner().invoke(app, ["process", "--jobs", "1", "--prefix", "x", "1", "2", "3"])
+
+    assert r.exit_code == 0, r.output
+    assert [line[:2] for line in parse(r.output)] == [["x", "10"], ["x", "20"], ["x", "30"]]
+    assert {line[2] for line in parse(r.output)} == {str(os.getpid())}
+    assert setup_calls == ["x"]
+
+
+def test_run_in_workers():
+    values = [str(i) for i in range(8)]
+    r = CliRunner().invoke(app, ["process", "-j", "2", "--chunk-size", "3", *values])
+
+    assert r.exit_code == 0, r.output
+    lines = parse(r.output)
+    assert [line[1] for line in lines] == [str(i * 10) for i in range(8)]
+    pids = {line[2] for line in lines}
+    assert str(os.getpid()) not in pids
+    assert 1 <= len(pids) <= 2
+    # dependencies are evaluated in workers
+    assert setup_calls == []
+
+
+def test_run_as_completed():
+    values = [str(i) for i in range(6)]
+    r = CliRunner().invoke(app, ["process", "-j", "3", "--as-completed", *values])
+
+    assert r.exit_code == 0, r.output
+    assert sorted(int(line[1]) for line in parse(r.output)) == [i * 10 for i in range(6)]
+
+
+def test_skip_none_results():
+    r = CliRunner().invoke(app, ["greet", "-j", "1", "alice", "nobody", "bob"])
+
+    assert r.exit_code == 0, r.output
+    assert r.output == "hello alice\nhello bob\n"
+
+
+def test_help():
+    r = CliRunner().invoke(app, ["process", "--help"])
+
+    assert r.exit_code == 0, r.output
+    assert_words_in_message(["--jobs", "--chunk-size", "--as-completed", "--prefix"], r.output)
+
+
+def test_missing_param():
+    bad_app = TyperDI()
+
+    def cmd(value: int):
+        ...
+
+    with pytest.raises(TyperDIError) as ex:
+        bad_app.command(map_over="values")(cmd)
+    assert_words_in_message(["values", "map over"], str(ex.value))
+
+
+def test_async_generator_dependencies():
+    bad_app = TyperDI()
+
+    def get_session():
+        yield "session"
+
+    async def get_token():
+        return "token"
+
+    def cmd(value: int, session=Depends(get_session), token=Depends(get_token)):
+        ...
+
+    with pytest.raises(TyperDIError) as ex:
+        bad_app.command(map_over="value")(cmd)
+    assert_words_in_message(["value", "async", "generator"], str(ex.value))
+
+
+def test_lazy_app():
+    lazy_app = TyperDI(lazy=True)
+    lazy_app.command(map_over="value")(process)
+    lazy_app.command()(greet)
+
+    r = CliRunner().invoke(lazy_app, ["process", "-j", "1", "5"])
+
+    assert r.exit_code == 0, r.output
+    assert parse(r.output)[0][:2] == ["item", "50"]
+
+
+def get_fake_prefix():
+    return "fake"
+
+
+def test_dependency_override():
+    app.override_dependency(get_prefix, get_fake_prefix)
+    try:
+        r = CliRunner().invoke(app, ["process", "-j", "2", "1", "2"])
+    finally:
+        app.reset_dependency_overrides()
+
+    assert r.exit_code == 0, r.output
+    assert [line[:2] for line in parse(r.output)] == [["fake", "10"], ["fake", "20"]]
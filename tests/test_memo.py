@@ -0,0 +1,198 @@
+from typing import List
+from unittest import mock
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from tests.helpers import assert_words_in_message
+from typer_di import Depends, Memoize, TyperDI, TyperDIError, create_di_wrapper
+from typer_di.compat import Annotated
+
+
+@pytest.fixture
+def read_mock() -> mock.Mock:
+    return mock.Mock(name="read_mock", side_effect=lambda path: f"text of {path}")
+
+
+@pytest.fixture
+def parse_mock() -> mock.Mock:
+    return mock.Mock(name="parse_mock", side_effect=lambda text: {"text": text})
+
+
+def test_skip_subgraph_on_hit(read_mock: mock.Mock, parse_mock: mock.Mock):
+    def read(path: str):
+        return read_mock(path)
+
+    def parse(text=Depends(read)):
+        return parse_mock(text)
+
+    memo = Memoize()
+
+    def command(name: str, cfg=Depends(parse, cache=memo)):
+        return name, cfg
+
+    wrapper = create_di_wrapper(command)
+
+    assert wrapper(path="a", name="x") == ("x", {"text": "text of a"})
+    assert wrapper(path="a", name="y") == ("y", {"text": "text of a"})
+    assert wrapper(path="b", name="x") == ("x", {"text": "text of b"})
+
+    assert read_mock.call_count == 2
+    assert parse_mock.call_count == 2
+    assert memo.cache_info() == (1, 2, 0, 128, 2)
+
+
+def test_share_default_cache_between_commands(read_mock: mock.Mock):
+    def read(path: str):
+        return read_mock(path)
+
+    def first(text=Depends(read, cache=True)):
+        return text
+
+    def second(text=Depends(read, cache=True)):
+        return text
+
+    assert create_di_wrapper(first)(path="a") == "text of a"
+    assert create_di_wrapper(second)(path="a") == "text of a"
+
+    read_mock.assert_called_once_with("a")
+
+
+def test_evict_least_recently_used(read_mock: mock.Mock):
+    def read(path: str):
+        return read_mock(path)
+
+    memo = Memoize(maxsize=2)
+    wrapper = create_di_wrapper(lambda text=Depends(read, cache=memo): text)
+
+    for path in ["a", "b", "a", "c", "a", "b"]:
+        wrapper(path=path)
+
+    assert [c.args[0] for c in read_mock.call_args_list] == ["a", "b", "c", "b"]
+    info = memo.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.currsize) == (2, 4, 2, 2)
+
+    memo.clear()
+    assert memo.cache_info() == (0, 0, 0, 2, 0)
+
+
+def test_expire_by_ttl(read_mock: mock.Mock):
+    def read(path: str):
+        return read_mock(path)
+
+    memo = Memoize(ttl=10)
+    wrapper = create_di_wrapper(lambda text=Depends(read, cache=memo): text)
+
+    with mock.patch("time.monotonic", return_value=100.0) as monotonic:
+        wrapper(path="a")
+        monotonic.return_value = 109.0
+        wrapper(path="a")
+        monotonic.return_value = 111.0
+        wrapper(path="a")
+
+    assert read_mock.call_count == 2
+    assert memo.cache_info().evictions == 1
+
+
+def test_key_function_for_unhashable_params():
+    def total(values: List[int]):
+        return sum(values)
+
+    wrapper = create_di_wrapper(lambda s=Depends(total, cache=True): s)
+    with pytest.raises(TypeError) as ex:
+        wrapper(values=[1, 2])
+    assert_words_in_message(["values", "key="], ex.value)
+
+    total_mock = mock.Mock(side_effect=total)
+    memo = Memoize(key=lambda values: tuple(values))
+
+    def counted(values: List[int]):
+        return total_mock(values)
+
+    wrapper = create_di_wrapper(lambda s=Depends(counted, cache=memo): s)
+    assert wrapper(values=[1, 2]) == 3
+    assert wrapper(values=[1, 2]) == 3
+    total_mock.assert_called_once_with([1, 2])
+
+
+def test_memoize_async_dependency(read_mock: mock.Mock):
+    async def read(path: str):
+        return read_mock(path)
+
+    async def command(text=Depends(read, cache=Memoize())):
+        return text
+
+    wrapper = create_di_wrapper(command)
+
+    assert wrapper(path="a") == "text of a"
+    assert wrapper(path="a") == "text of a"
+    read_mock.assert_called_once_with("a")
+
+
+def test_error_on_conflicting_caches():
+    def read(path: str):
+        ...
+
+    def parse(text=Depends(read, cache=True)):
+        ...
+
+    def command(text=Depends(read), cfg=Depends(parse)):
+        ...
+
+    with pytest.raises(TyperDIError) as ex:
+        create_di_wrapper(command)
+    assert_words_in_message(["conflicting caches", "read"], ex.value)
+
+
+def test_error_on_cache_with_scope():
+    with pytest.raises(ValueError):
+        Depends(lambda: None, scope="process", cache=True)
+
+
+def test_reuse_results_between_cli_calls(read_mock: mock.Mock):
+    def get_config(path: Annotated[str, typer.Option("--config")] = "default.toml"):
+        return read_mock(path)
+
+    app = TyperDI()
+
+    @app.command()
+    def show(name: str, cfg=Depends(get_config, cache=True)):
+        print(name, cfg)
+
+    runner = CliRunner()
+    for name in ["a", "b"]:
+        r = runner.invoke(app, [name, "--config", "x.toml"])
+        assert r.exit_code == 0, r.output
+        assert r.output == f"{name} text of x.toml\n"
+
+    read_mock.assert_called_once_with("x.toml")
+
+
+@pytest.mark.parametrize("cache", [True, Memoize()])
+def test_dont_share_cache_with_overrides(cache):
+    # the same param lets the override be swapped in place
+    X = Annotated[int, typer.Option("--x")]
+
+    def get_value(x: X):
+        return f"real{x}"
+
+    def fake_value(x: X):
+        return f"fake{x}"
+
+    app = TyperDI()
+
+    @app.command()
+    def show(value=Depends(get_value, cache=cache)):
+        typer.echo(value)
+
+    def invoke() -> str:
+        r = CliRunner().invoke(app, "--x 1")
+        assert r.exit_code == 0, r.output
+        return r.output.strip()
+
+    assert invoke() == "real1"
+    app.override_dependency(get_value, fake_value)
+    assert invoke() == "fake1"
+    app.reset_dependency_overrides()
+    assert invoke() == "real1"
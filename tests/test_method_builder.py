@@ -1,9 +1,20 @@
+import asyncio
+import os
+import threading
+import time
 from inspect import signature
 from unittest import mock
 
 import pytest
 
-from typer_di import MethodBuilder, MethodBuilderError, copy_func_attrs
+from typer_di import (
+    Depends,
+    MethodBuilder,
+    MethodBuilderError,
+    copy_func_attrs,
+    create_di_wrapper,
+    set_named_wrappers,
+)
 
 
 @pytest.fixture
@@ -133,3 +144,265 @@ def test_show_program_text_on_compilation_error(builder: MethodBuilder):
 
     with pytest.raises(MethodBuilderError, match="1=y"):
         _ = builder.build()
+
+
+def test_await_async_callbacks(builder: MethodBuilder):
+    async def add(x, y):
+        return x + y
+
+    def mul(x, y):
+        return x * y
+
+    builder.add_param("a")
+    r1 = builder.invoke(add, {"x": "a", "y": "a"})
+    builder.invoke(mul, {"x": r1, "y": "a"})
+    func = builder.build()
+
+    assert "async def" in builder.format_program()
+    assert func(3) == 18
+
+
+def test_gather_independent_async_callbacks(builder: MethodBuilder):
+    started = []
+
+    async def first():
+        started.append("first")
+        await asyncio.sleep(0)
+        return started[:]
+
+    async def second():
+        started.append("second")
+        await asyncio.sleep(0)
+        return started[:]
+
+    def combine(x, y):
+        return x, y
+
+    r1 = builder.invoke(first, {})
+    r2 = builder.invoke(second, {})
+    builder.invoke(combine, {"x": r1, "y": r2})
+    func = builder.build()
+
+    # both callbacks are started before any of them completes
+    assert func() == (["first", "second"], ["first", "second"])
+
+
+def test_run_parallel_callbacks_in_threads(builder: MethodBuilder):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def first():
+        barrier.wait()
+        return threading.get_ident()
+
+    def second():
+        barrier.wait()
+        return threading.get_ident()
+
+    def combine(x, y):
+        return x, y
+
+    r1 = builder.invoke(first, {}, parallel=True)
+    r2 = builder.invoke(second, {}, parallel=True)
+    builder.invoke(combine, {"x": r1, "y": r2})
+    func = builder.build()
+
+    x, y = func()
+    assert x != y
+
+
+def test_raise_first_parallel_error(builder: MethodBuilder):
+    def first():
+        time.sleep(0.01)
+        raise KeyError("first")
+
+    def second():
+        raise ValueError("second")
+
+    builder.invoke(first, {}, parallel=True)
+    builder.invoke(second, {}, parallel=True)
+    func = builder.build()
+
+    with pytest.raises(KeyError, match="first"):
+        func()
+
+
+def test_offload_parallel_callbacks_in_async_mode(builder: MethodBuilder):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def blocking():
+        barrier.wait()
+        return 1
+
+    async def non_blocking():
+        await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+        return 2
+
+    def combine(x, y):
+        return x + y
+
+    r1 = builder.invoke(blocking, {}, parallel=True)
+    r2 = builder.invoke(non_blocking, {})
+    builder.invoke(combine, {"x": r1, "y": r2})
+    func = builder.build()
+
+    assert func() == 3
+
+
+def test_pass_lazy_args(builder: MethodBuilder):
+    dep = mock.Mock(return_value=42)
+
+    r1 = builder.invoke(dep, {"x": "x"})
+    builder.add_param("x")
+    builder.invoke(lambda y: y, {"y": r1}, lazy_args=["y"])
+    func = builder.build()
+
+    lazy = func(x=1)
+    dep.assert_not_called()
+
+    assert lazy.get() == 42
+    dep.assert_called_once_with(x=1)
+
+
+def test_evaluate_lazy_arg_once_when_used_eagerly(builder: MethodBuilder):
+    dep = mock.Mock(return_value=42)
+
+    def command(lazy, value):
+        return lazy, value
+
+    r1 = builder.invoke(dep, {})
+    builder.invoke(command, {"lazy": r1, "value": r1}, lazy_args=["lazy"])
+    func = builder.build()
+
+    lazy, value = func()
+    assert value == 42
+    assert lazy.evaluated and lazy.get() == 42
+    dep.assert_called_once_with()
+
+
+def test_defer_dependencies_of_lazy_arg(builder: MethodBuilder):
+    base = mock.Mock(return_value=1)
+
+    r1 = builder.invoke(base, {})
+    r2 = builder.invoke(lambda b: b + 1, {"b": r1})
+    builder.invoke(lambda y: y, {"y": r2}, lazy_args=["y"])
+    func = builder.build()
+
+    lazy = func()
+    base.assert_not_called()
+
+    assert lazy.get() == 2
+    base.assert_called_once_with()
+
+
+def test_prohibit_async_lazy_args(builder: MethodBuilder):
+    async def dep():
+        pass
+
+    r1 = builder.invoke(dep, {})
+    builder.invoke(lambda y: y, {"y": r1}, lazy_args=["y"])
+
+    with pytest.raises(MethodBuilderError, match="can't be async"):
+        builder.build()
+
+
+def test_pass_leading_arguments_positionally(builder: MethodBuilder):
+    def foo(a, b, *, c):
+        return a, b, c
+
+    def bar(b, a, /):
+        return a, b
+
+    builder.add_param("x")
+    builder.add_param("y")
+    r0 = builder.invoke(foo, kwargs={"a": "x", "b": "y", "c": "x"})
+    builder.invoke(bar, kwargs={"a": r0, "b": "y"})
+    program = builder.format_program()
+
+    assert "__r0 = __cb0(x, y, c=x)" in program
+    assert "__cb1(a=__r0, b=y)" in program
+
+
+def test_share_code_of_identical_programs():
+    def build(callback):
+        builder = MethodBuilder()
+        builder.add_param("x")
+        builder.invoke(callback, kwargs={"x": "x"})
+        return builder.build()
+
+    first = build(lambda x: x + 1)
+    second = build(lambda x: x * 10)
+
+    assert first.__code__ is second.__code__
+    assert (first(2), second(2)) == (3, 20)
+
+
+def test_error_on_param_without_default_after_default(builder: MethodBuilder):
+    builder.add_param("x", default=1)
+    builder.add_param("y")
+
+    with pytest.raises(MethodBuilderError):
+        builder.build()
+
+
+def test_name_code_after_origin(builder: MethodBuilder):
+    def command(x):
+        raise ValueError(x)
+
+    builder.add_param("x")
+    builder.invoke(command, kwargs={"x": "x"})
+    func = builder.build(command)
+
+    code = func.__code__
+    assert code.co_filename == f"<typer_di:{__name__}.{command.__qualname__}>"
+    assert code.co_name == "command"
+
+    with pytest.raises(ValueError) as ex:
+        func(1)
+    frame = ex.traceback[1]
+    assert frame.path == code.co_filename
+    assert str(frame.statement).strip() == "__r0 = __cb0(x)"
+
+
+def test_dump_sources(builder: MethodBuilder, tmp_path):
+    def command():
+        return 1
+
+    builder.invoke(command, kwargs={})
+    with mock.patch.dict(os.environ, TYPER_DI_DUMP_DIR=str(tmp_path)):
+        func = builder.build(command)
+
+    (path,) = tmp_path.iterdir()
+    assert func.__code__.co_filename == str(path)
+    assert path.read_text() == builder.format_program()
+    assert func() == 1
+
+
+def get_value(x: int) -> int:
+    return x
+
+
+def test_share_code_of_commands():
+    def first(value=Depends(get_value)):
+        return value + 1
+
+    def second(value=Depends(get_value)):
+        return value * 10
+
+    wa, wb = create_di_wrapper(first), create_di_wrapper(second)
+
+    assert wa.__code__ is wb.__code__
+    assert (wa(x=2), wb(x=2)) == (3, 20)
+
+
+def test_name_wrappers_when_enabled():
+    def command(value=Depends(get_value)):
+        return value
+
+    set_named_wrappers(True)
+    try:
+        wrapper = create_di_wrapper(command)
+    finally:
+        set_named_wrappers(None)
+
+    assert wrapper.__code__.co_filename == f"<typer_di:{__name__}.{command.__qualname__}>"
+    assert wrapper.__code__.co_name == "command"
@@ -0,0 +1,68 @@
+import importlib
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Set
+
+import pytest
+
+import typer_di
+
+
+def get_imported_modules(code: str) -> Set[str]:
+    src_dir = Path(typer_di.__file__).parents[1]
+    env = dict(os.environ, PYTHONPATH=str(src_dir))
+    r = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    # lines look like "import time:   self [us] | cumulative | module"
+    return {
+        line.rsplit("|", 1)[-1].strip()
+        for line in r.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line
+    }
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import typer_di",
+        "from typer_di import Depends, DependsType",
+    ],
+)
+def test_dont_import_typer_for_depends(code: str):
+    modules = get_imported_modules(code)
+
+    assert "typer_di._depends" in modules
+    assert not {"typer", "click", "inspect", "dataclasses"} & modules
+
+
+def test_import_typer_on_first_access():
+    modules = get_imported_modules("from typer_di import TyperDI")
+
+    assert {"typer", "click"} <= modules
+
+
+def test_export_all_public_names():
+    exported = set()
+    for module_name in typer_di._SUBMODULES:
+        module = importlib.import_module(module_name, "typer_di")
+        assert set(module.__all__) == set(typer_di._SUBMODULES[module_name])
+        exported |= set(module.__all__)
+
+    assert set(typer_di.__all__) == exported | {"Depends", "DependsType", "Scope"}
+    assert set(typer_di.__all__) <= set(dir(typer_di))
+
+
+def test_resolve_names_lazily():
+    from typer_di._typer_di import TyperDI
+
+    assert typer_di.TyperDI is TyperDI
+
+    with pytest.raises(AttributeError, match="no attribute 'missing'"):
+        typer_di.missing
@@ -0,0 +1,185 @@
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Iterator
+from unittest import mock
+
+import pytest
+from typer.testing import CliRunner
+
+from typer_di import (
+    Depends,
+    MethodBuilder,
+    MethodBuilderError,
+    clear_persistent_cache,
+    create_di_wrapper,
+    set_persistent_cache,
+)
+from typer_di import _persist
+from typer_di.__main__ import app as tools_app
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path: Path) -> Iterator[Path]:
+    cache_dir = tmp_path / "cache"
+    set_persistent_cache(cache_dir)
+    yield cache_dir
+    set_persistent_cache()
+
+
+@pytest.fixture
+def load_mock() -> mock.Mock:
+    return mock.Mock(name="load_mock", side_effect=lambda x: {"value": x})
+
+
+@pytest.fixture
+def command(load_mock: mock.Mock):
+    def load_index(x: int):
+        return load_mock(x)
+
+    def command(index=Depends(load_index, persist=True)):
+        return index
+
+    return command
+
+
+def test_reuse_result_between_wrappers(command, load_mock: mock.Mock):
+    # each wrapper simulates a separate CLI run
+    assert create_di_wrapper(command)(x=1) == {"value": 1}
+    assert create_di_wrapper(command)(x=1) == {"value": 1}
+
+    load_mock.assert_called_once_with(1)
+
+
+def test_key_by_arguments(command, load_mock: mock.Mock):
+    wrapper = create_di_wrapper(command)
+
+    assert wrapper(x=1) == {"value": 1}
+    assert wrapper(x=2) == {"value": 2}
+    assert wrapper(x=1) == {"value": 1}
+
+    assert load_mock.call_count == 2
+
+
+def test_key_by_input_files(tmp_path: Path):
+    calls = mock.Mock(name="calls")
+
+    def parse(config: Path):
+        calls()
+        return config.read_text()
+
+    def command(data=Depends(parse, persist=True)):
+        return data
+
+    config = tmp_path / "config.yaml"
+    config.write_text("a: 1")
+    wrapper = create_di_wrapper(command)
+
+    assert wrapper(config=config) == "a: 1"
+    assert wrapper(config=config) == "a: 1"
+    assert calls.call_count == 1
+
+    config.write_text("a: 10")
+    assert wrapper(config=config) == "a: 10"
+    assert calls.call_count == 2
+
+
+def test_dont_cache_unpicklable_arguments():
+    calls = mock.Mock(name="calls")
+
+    def get_lock():
+        return threading.Lock()
+
+    def describe(lock=Depends(get_lock)):
+        calls()
+        return "lock"
+
+    def command(x=Depends(describe, persist=True)):
+        return x
+
+    wrapper = create_di_wrapper(command)
+    assert wrapper() == "lock"
+    assert wrapper() == "lock"
+    assert calls.call_count == 2
+
+
+def test_recompute_broken_entries(command, load_mock: mock.Mock, cache_dir: Path):
+    wrapper = create_di_wrapper(command)
+    wrapper(x=1)
+
+    [entry] = cache_dir.iterdir()
+    entry.write_bytes(b"garbage")
+
+    assert wrapper(x=1) == {"value": 1}
+    assert load_mock.call_count == 2
+
+
+def test_evict_least_recently_used(command, load_mock: mock.Mock, cache_dir: Path):
+    wrapper = create_di_wrapper(command)
+    wrapper(x=1)
+    entry_size = next(cache_dir.iterdir()).stat().st_size
+    set_persistent_cache(cache_dir, max_size=entry_size * 2)
+
+    wrapper(x=2)
+    wrapper(x=3)
+
+    assert len(_persist.list_entries()) == 2
+
+
+def test_clear(command, load_mock: mock.Mock):
+    wrapper = create_di_wrapper(command)
+    wrapper(x=1)
+
+    clear_persistent_cache()
+    wrapper(x=1)
+
+    assert load_mock.call_count == 2
+
+
+def test_prohibit_async_callbacks():
+    async def load():
+        pass
+
+    with pytest.raises(MethodBuilderError, match="can't be async"):
+        MethodBuilder().invoke(load, {}, persist=True)
+
+
+def test_cli_info_and_clear(command, cache_dir: Path):
+    create_di_wrapper(command)(x=1)
+
+    r = CliRunner().invoke(tools_app, ["cache", "info", "--dir", str(cache_dir)])
+    assert r.exit_code == 0, r.output
+    assert f"Directory: {cache_dir}" in r.output
+    assert "Entries: 1" in r.output
+
+    r = CliRunner().invoke(tools_app, ["cache", "clear", "--dir", str(cache_dir)])
+    assert r.exit_code == 0, r.output
+    assert "Removed 1 entries" in r.output
+    assert _persist.list_entries() == []
+
+
+KEY_SOURCE = """
+from typer_di import _persist
+
+def load(x):
+    return x in {"a", "b", "c", "d"} or x in (1, frozenset({"e", "f"}))
+
+print(_persist._make_key(load, {"x": "a"}))
+"""
+
+
+def test_same_key_in_other_processes():
+    src_dir = Path(_persist.__file__).parents[1]
+    keys = {
+        subprocess.run(
+            [sys.executable, "-c", KEY_SOURCE],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=dict(os.environ, PYTHONPATH=str(src_dir), PYTHONHASHSEED=str(seed)),
+        ).stdout
+        for seed in range(4)
+    }
+    assert len(keys) == 1
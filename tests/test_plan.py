@@ -0,0 +1,97 @@
+import dataclasses
+import json
+
+import pytest
+
+from typer_di import (
+    Depends,
+    MethodBuilder,
+    compile_plan,
+    invalidate_resolution_cache,
+)
+
+
+def get_config(path: str, verbose: bool = False) -> str:
+    return f"{path}:{verbose}"
+
+
+def get_client(cfg: str = Depends(get_config)) -> str:
+    return f"client({cfg})"
+
+
+def upload(
+    name: str,
+    client: str = Depends(get_client, scope="context"),
+    cfg: str = Depends(get_config),
+):
+    return f"{client} {cfg} {name}"
+
+
+def download(client: str = Depends(get_client, parallel=True)):
+    return client
+
+
+def test_nodes_in_invocation_order():
+    plan = compile_plan(upload)
+
+    assert [n.callback for n in plan.nodes] == [get_config, get_client, upload]
+    assert plan.root.callback is upload
+    assert plan.index(get_client) == 1
+    assert set(plan.edges) == {(0, 1, "cfg"), (1, 2, "client"), (0, 2, "cfg")}
+
+
+def test_merge_parameters():
+    plan = compile_plan(upload)
+
+    # params with defaults are moved to the end
+    assert [p.name for p in plan.parameters] == ["path", "name", "verbose"]
+    assert dict(plan.scopes) == {get_client: "context"}
+
+
+def test_share_nodes_between_plans():
+    upload_plan = compile_plan(upload)
+    download_plan = compile_plan(download)
+
+    assert compile_plan(upload) is upload_plan
+    assert download_plan.nodes[:2] == upload_plan.nodes[:2]
+    assert download_plan.nodes[0] is upload_plan.nodes[0]
+    assert download_plan.parallel_callbacks == {get_client}
+
+
+def test_plan_is_immutable():
+    plan = compile_plan(upload)
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        plan.nodes = ()  # type: ignore[misc]
+
+
+def test_build_wrapper_from_plan():
+    wrapper = MethodBuilder.from_plan(compile_plan(upload)).build()
+
+    assert wrapper("p", "x") == "client(p:False) p:False x"
+
+
+def test_describe_as_json():
+    data = compile_plan(upload).to_dict()
+
+    assert json.loads(json.dumps(data)) == data
+    assert data["parameters"] == ["path", "name", "verbose"]
+    assert data["nodes"][2] == {
+        "name": "upload",
+        "params": ["name"],
+        "dependencies": {"client": 1, "cfg": 0},
+        "lazy": [],
+        "scope": "invocation",
+        "parallel": False,
+        "persist": False,
+        "cache": False,
+    }
+
+
+def test_forget_plan_on_invalidation():
+    plan = compile_plan(upload)
+
+    invalidate_resolution_cache(get_config)
+
+    assert compile_plan(upload) is not plan
+    assert compile_plan(upload) == plan
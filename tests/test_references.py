@@ -0,0 +1,159 @@
+import sys
+import textwrap
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from tests.helpers import assert_words_in_message
+from typer_di import Depends, TyperDI, create_di_wrapper, freeze_app
+from typer_di.compat import Annotated
+
+_MODULE_SOURCE = """
+log = []
+
+def get_client(url: str, retries: int = 3):
+    log.append(f"get_client {url} {retries}")
+    return f"client({url}, {retries})"
+
+def get_session(url: str):
+    yield f"session({url})"
+    log.append("close session")
+
+async def get_token(user: str):
+    return f"token({user})"
+"""
+
+
+@pytest.fixture
+def heavy(tmp_path: Path) -> Iterator[str]:
+    name = f"heavy_{tmp_path.name}"
+    (tmp_path / f"{name}.py").write_text(textwrap.dedent(_MODULE_SOURCE))
+    sys.path.insert(0, str(tmp_path))
+    try:
+        yield name
+    finally:
+        sys.path.remove(str(tmp_path))
+        sys.modules.pop(name, None)
+
+
+def client_stub(url: str, retries: int = 3) -> str:
+    ...
+
+
+def test_import_on_first_call(heavy: str):
+    def command(client=Depends(f"{heavy}:get_client", stub=client_stub)):
+        return client
+
+    wrapper = create_di_wrapper(command)
+    assert heavy not in sys.modules
+
+    assert wrapper(url="db") == "client(db, 3)"
+    assert heavy in sys.modules
+
+
+def test_import_without_stub_on_resolution(heavy: str):
+    def command(client=Depends(f"{heavy}:get_client")):
+        return client
+
+    assert heavy not in sys.modules
+
+    wrapper = create_di_wrapper(command)
+    assert heavy in sys.modules
+    assert wrapper(url="db", retries=1) == "client(db, 1)"
+
+
+def test_share_referenced_dependency(heavy: str):
+    def get_user(client=Depends(f"{heavy}:get_client", stub=client_stub)):
+        return f"user({client})"
+
+    def command(
+        user=Depends(get_user), client=Depends(f"{heavy}:get_client", stub=client_stub)
+    ):
+        return user, client
+
+    result = create_di_wrapper(command)(url="db")
+    assert result == ("user(client(db, 3))", "client(db, 3)")
+    assert sys.modules[heavy].log == ["get_client db 3"]  # type: ignore[attr-defined]
+
+
+def test_referenced_generator_and_async(heavy: str):
+    def session_stub(url: str):
+        yield
+
+    async def token_stub(user: str):
+        ...
+
+    def command(
+        session=Depends(f"{heavy}:get_session", stub=session_stub),
+        token=Depends(f"{heavy}:get_token", stub=token_stub),
+    ):
+        return session, token
+
+    assert create_di_wrapper(command)(url="db", user="me") == ("session(db)", "token(me)")
+    assert sys.modules[heavy].log == ["close session"]  # type: ignore[attr-defined]
+
+
+def test_help_without_import(heavy: str):
+    def stub(url: Annotated[str, typer.Option(help="Database URL")]):
+        ...
+
+    app = TyperDI()
+
+    @app.command()
+    def hello(client=Depends(f"{heavy}:get_client", stub=stub)):
+        print(client)
+
+    @app.command()
+    def other():
+        ...
+
+    r = CliRunner().invoke(app, ["hello", "--help"])
+    assert r.exit_code == 0, r.output
+    assert_words_in_message(["--url", "Database URL"], r.output)
+    assert heavy not in sys.modules
+
+    r = CliRunner().invoke(app, ["hello", "--url", "db"])
+    assert r.exit_code == 0, r.output
+    assert r.output == "client(db, 3)\n"
+
+
+frozen_app = TyperDI()
+
+
+@frozen_app.command()
+def fetch(client=Depends("missing_heavy_module:get_client", stub=client_stub)):
+    ...
+
+
+@frozen_app.command()
+def plain(client=Depends(client_stub)):
+    ...
+
+
+def test_dont_freeze_referenced_dependencies():
+    source = freeze_app(frozen_app)
+
+    assert f"{__name__}:plain" in source
+    assert f"{__name__}:fetch" not in source
+
+
+def test_repr_of_referenced_dependency():
+    depends_type = Depends("pkg.module:get_client", stub=client_stub, parallel=True)
+    assert repr(depends_type) == "Depends(pkg.module:get_client, parallel=True)"
+
+
+@pytest.mark.parametrize(
+    "args, words",
+    [
+        (["pkg.module"], ["pkg.module", "module:func"]),
+        ([":func"], [":func", "module:func"]),
+        ([client_stub], ["stub", "path"]),
+    ],
+)
+def test_error_on_invalid_reference(args: List[object], words: List[str]):
+    with pytest.raises(ValueError) as ex:
+        Depends(*args, stub=client_stub)
+    assert_words_in_message(words, ex.value)
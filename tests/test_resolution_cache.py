@@ -0,0 +1,113 @@
+import gc
+import weakref
+from typing import List
+from unittest import mock
+
+import pytest
+
+from typer_di import (
+    Depends,
+    clear_resolution_cache,
+    compile_plan,
+    create_di_wrapper,
+    invalidate_resolution_cache,
+)
+from typer_di import _resolution_cache
+
+
+@pytest.fixture
+def signature_spy(monkeypatch: pytest.MonkeyPatch) -> mock.Mock:
+    spy = mock.Mock(name="signature", wraps=_resolution_cache.signature)
+    monkeypatch.setattr(_resolution_cache, "signature", spy)
+    return spy
+
+
+def get_shared(x: int = 1):
+    return x
+
+
+def get_first(shared=Depends(get_shared)):
+    return shared
+
+
+def test_introspect_shared_dependencies_once(signature_spy: mock.Mock):
+    clear_resolution_cache()
+
+    def first(s=Depends(get_shared)):
+        return s
+
+    def second(s=Depends(get_shared), f=Depends(get_first)):
+        return s + f
+
+    create_di_wrapper(first)
+    create_di_wrapper(second)
+
+    inspected = [c.args[0] for c in signature_spy.call_args_list]
+    assert inspected.count(get_shared) == 1
+    assert inspected.count(get_first) == 1
+
+
+def test_reuse_cached_subgraph():
+    def command(f=Depends(get_first), s=Depends(get_shared)):
+        return f + s
+
+    create_di_wrapper(command)
+    wrapper = create_di_wrapper(command)
+
+    assert wrapper(x=2) == 4
+    assert _resolution_cache.resolve_callback(command).subgraph == (
+        get_shared,
+        get_first,
+        command,
+    )
+
+
+def test_invalidate_dependents(signature_spy: mock.Mock):
+    def command(f=Depends(get_first)):
+        return f
+
+    create_di_wrapper(command)
+    invalidate_resolution_cache(get_shared)
+    signature_spy.reset_mock()
+
+    create_di_wrapper(command)
+
+    inspected = [c.args[0] for c in signature_spy.call_args_list]
+    assert set(inspected) == {get_shared, get_first, command}
+
+
+class _Add:
+    __slots__ = ()  # disable weak references
+
+    def __call__(self, x: int, y: int) -> int:
+        return x + y
+
+
+def test_skip_caching_of_non_weakrefable_callbacks():
+    add = _Add()
+
+    resolved = _resolution_cache.resolve_callback(add)
+
+    assert [p.name for p in resolved.parameters] == ["x", "y"]
+    assert _resolution_cache.resolve_callback(add) is not resolved
+
+
+def test_collect_unused_callbacks():
+    refs: List[weakref.ref] = []
+    for _ in range(100):
+
+        def get_value(y: int = 1):
+            return y
+
+        def command(value=Depends(get_value), shared=Depends(get_shared)):
+            return value + shared
+
+        assert create_di_wrapper(command)(y=2) == 3
+        assert len(compile_plan(command).nodes) == 3
+        assert vars(command) == {}
+        refs += [weakref.ref(get_value), weakref.ref(command)]
+
+    del get_value, command
+    gc.collect()
+
+    assert [r for r in refs if r() is not None] == []
@@ -0,0 +1,288 @@
+from unittest import mock
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from tests.helpers import assert_words_in_message
+from typer_di import (
+    Depends,
+    MethodBuilder,
+    TyperDI,
+    TyperDIError,
+    clear_process_scope,
+    create_di_wrapper,
+    dependency_context,
+)
+from typer_di.compat import Annotated
+
+
+@pytest.fixture
+def source_mock() -> mock.Mock:
+    return mock.Mock(name="source_mock", return_value=10)
+
+
+@pytest.fixture
+def client_mock() -> mock.Mock:
+    return mock.Mock(name="client_mock", side_effect=lambda x: x + 1)
+
+
+def test_skip_nested_dependencies_on_cache_hit(
+    source_mock: mock.Mock, client_mock: mock.Mock
+):
+    builder = MethodBuilder()
+    r0 = builder.invoke(source_mock, {})
+    builder.invoke(client_mock, {"x": r0}, scope="context")
+    func = builder.build()
+
+    with dependency_context():
+        assert func() == 11
+        assert func() == 11
+
+    source_mock.assert_called_once_with()
+    client_mock.assert_called_once_with(x=10)
+
+
+def test_keep_shared_dependencies_outside_of_guard(
+    source_mock: mock.Mock, client_mock: mock.Mock
+):
+    def combine(x, y):
+        return x + y
+
+    builder = MethodBuilder()
+    r0 = builder.invoke(source_mock, {})
+    r1 = builder.invoke(client_mock, {"x": r0}, scope="context")
+    builder.invoke(combine, {"x": r0, "y": r1})
+    func = builder.build()
+
+    with dependency_context():
+        assert func() == 21
+        assert func() == 21
+
+    assert source_mock.call_count == 2
+    client_mock.assert_called_once_with(x=10)
+
+
+def test_context_scope_without_context(source_mock: mock.Mock):
+    def get_value():
+        return source_mock()
+
+    def command(x=Depends(get_value, scope="context")):
+        return x
+
+    wrapper = create_di_wrapper(command)
+    wrapper()
+    wrapper()
+
+    assert source_mock.call_count == 2
+
+
+def test_isolate_dependency_contexts(source_mock: mock.Mock):
+    def get_value():
+        return source_mock()
+
+    def first(x=Depends(get_value, scope="context")):
+        return x
+
+    def second(x=Depends(get_value, scope="context")):
+        return x
+
+    first_wrapper = create_di_wrapper(first)
+    second_wrapper = create_di_wrapper(second)
+
+    with dependency_context():
+        first_wrapper()
+        second_wrapper()
+    with dependency_context():
+        second_wrapper()
+
+    assert source_mock.call_count == 2
+
+
+def test_process_scope(source_mock: mock.Mock):
+    def get_value():
+        return source_mock()
+
+    def command(x=Depends(get_value, scope="process")):
+        return x
+
+    wrapper = create_di_wrapper(command)
+    wrapper()
+    wrapper()
+    source_mock.assert_called_once_with()
+
+    clear_process_scope()
+    wrapper()
+    assert source_mock.call_count == 2
+
+
+def test_error_on_conflicting_scopes():
+    def get_value():
+        ...
+
+    def get_other(x=Depends(get_value, scope="process")):
+        ...
+
+    def command(x=Depends(get_value), y=Depends(get_other)):
+        ...
+
+    with pytest.raises(TyperDIError) as ctx:
+        create_di_wrapper(command)
+
+    assert_words_in_message("conflicting scopes get_value", ctx.value)
+
+
+def test_error_on_unknown_scope():
+    with pytest.raises(ValueError, match="Unknown scope"):
+        Depends(print, scope="request")  # type: ignore[arg-type]
+
+
+class TestShareContextWithSubcommands:
+    @pytest.fixture
+    def client_mock(self) -> mock.Mock:
+        return mock.Mock(name="client_mock", side_effect=lambda token: [token])
+
+    @pytest.fixture
+    def app(self, client_mock: mock.Mock) -> TyperDI:
+        def get_client(token: Annotated[str, typer.Option("--token")] = "default"):
+            return client_mock(token)
+
+        app = TyperDI()
+
+        @app.callback()
+        def main(client=Depends(get_client, scope="context")):
+            client.append("main")
+
+        @app.command()
+        def hello(client=Depends(get_client, scope="context")):
+            typer.echo(client)
+
+        return app
+
+    def test_reuse_callback_result(self, app: TyperDI, client_mock: mock.Mock):
+        r = CliRunner().invoke(app, "--token abc hello")
+
+        assert r.exit_code == 0
+        assert_words_in_message("abc main", r.output)
+        client_mock.assert_called_once_with("abc")
+
+    def test_dont_share_between_invocations(
+        self, app: TyperDI, client_mock: mock.Mock
+    ):
+        CliRunner().invoke(app, "--token abc hello")
+        CliRunner().invoke(app, "--token abc hello")
+
+        assert client_mock.call_count == 2
+
+
+def test_cache_by_params_values(source_mock: mock.Mock):
+    def get_value(x: int):
+        return source_mock(x)
+
+    def command(value=Depends(get_value, scope="context")):
+        return value
+
+    source_mock.side_effect = lambda x: x * 10
+    wrapper = create_di_wrapper(command)
+
+    with dependency_context():
+        assert [wrapper(x=1), wrapper(x=2), wrapper(x=1)] == [10, 20, 10]
+    assert source_mock.call_count == 2
+
+
+class TestInheritRequiredOptions:
+    @pytest.fixture
+    def client_mock(self) -> mock.Mock:
+        return mock.Mock(name="client_mock", side_effect=lambda token: f"client({token})")
+
+    @pytest.fixture
+    def app(self, client_mock: mock.Mock) -> TyperDI:
+        def get_client(token: Annotated[str, typer.Option("--token")]):
+            return client_mock(token)
+
+        app = TyperDI()
+
+        @app.callback()
+        def main(client=Depends(get_client, scope="context")):
+            ...
+
+        @app.command()
+        def upload(client=Depends(get_client, scope="context")):
+            typer.echo(client)
+
+        return app
+
+    def test_inherit_from_callback(self, app: TyperDI, client_mock: mock.Mock):
+        r = CliRunner().invoke(app, "--token t upload")
+
+        assert r.exit_code == 0, r.output
+        assert r.output == "client(t)\n"
+        client_mock.assert_called_once_with("t")
+
+    def test_override_in_command(self, app: TyperDI):
+        r = CliRunner().invoke(app, "--token t upload --token u")
+
+        assert r.exit_code == 0, r.output
+        assert r.output == "client(u)\n"
+
+    def test_error_on_missing_option(self, app: TyperDI, client_mock: mock.Mock):
+        r = CliRunner().invoke(app, "upload --token u")
+
+        assert r.exit_code == 2
+        assert_words_in_message("missing option --token", r.output)
+        client_mock.assert_not_called()
+
+    def test_help(self, app: TyperDI):
+        r = CliRunner().invoke(app, "--token t upload --help")
+
+        assert r.exit_code == 0, r.output
+        assert_words_in_message("--token value given to parent command", r.output)
+        assert "required" not in r.output
+
+    def test_required_without_parent_callback(self):
+        def get_client(token: Annotated[str, typer.Option("--token")]):
+            ...
+
+        app = TyperDI()
+
+        @app.command()
+        def upload(client=Depends(get_client, scope="context")):
+            ...
+
+        @app.command()
+        def download(client=Depends(get_client, scope="context")):
+            ...
+
+        r = CliRunner().invoke(app, "upload --help")
+
+        assert r.exit_code == 0, r.output
+        assert_words_in_message("--token required", r.output)
+        assert "parent" not in r.output
+
+    def test_inherit_in_sub_app(self, client_mock: mock.Mock):
+        def get_client(token: Annotated[str, typer.Option("--token")]):
+            return client_mock(token)
+
+        app = TyperDI()
+        sub_app = TyperDI()
+
+        @sub_app.command()
+        def upload(client=Depends(get_client, scope="context")):
+            typer.echo(client)
+
+        @sub_app.command()
+        def download():
+            ...
+
+        app.add_typer(sub_app, name="files")
+
+        # callbacks registered after commands are taken into account too
+        @app.callback()
+        def main(client=Depends(get_client, scope="context")):
+            ...
+
+        r = CliRunner().invoke(app, "--token t files upload")
+
+        assert r.exit_code == 0, r.output
+        assert r.output == "client(t)\n"
+        client_mock.assert_called_once_with("t")
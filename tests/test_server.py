@@ -0,0 +1,127 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import pytest
+
+import typer_di
+from typer_di.client import get_socket_path, is_supported
+
+pytestmark = pytest.mark.skipif(not is_supported(), reason="requires unix sockets")
+
+APP_SOURCE = '''
+import os
+import sys
+
+import typer
+
+from typer_di import Depends, TyperDI
+
+calls = []
+
+
+def connect():
+    calls.append(1)
+    return os.getpid()
+
+
+app = TyperDI()
+
+
+@app.command()
+def hello(name: str, pid=Depends(connect, scope="process")):
+    typer.echo(f"{name} pid={pid} calls={len(calls)} env={os.environ.get('APP_ENV')}")
+    typer.echo(f"stdin={sys.stdin.read().strip()}", err=True)
+    if name == "fail":
+        raise typer.Exit(3)
+'''
+
+CLIENT = "import sys, typer_di.client as c; sys.exit(c.run('app_mod:app', spawn=False))"
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Dict[str, str]:
+    (tmp_path / "app_mod.py").write_text(APP_SOURCE)
+    monkeypatch.setenv("TYPER_DI_RUNTIME_DIR", str(tmp_path / "run"))
+    src_dir = Path(typer_di.__file__).parents[1]
+    return dict(os.environ, PYTHONPATH=os.pathsep.join([str(src_dir), str(tmp_path)]))
+
+
+@pytest.fixture
+def server(env: Dict[str, str]) -> Iterator["subprocess.Popen[bytes]"]:
+    proc = start_server(env, idle_timeout=30)
+    yield proc
+    proc.terminate()
+    proc.wait(timeout=5)
+
+
+def start_server(env: Dict[str, str], idle_timeout: float) -> "subprocess.Popen[bytes]":
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "typer_di", "serve", "app_mod:app"]
+        + ["--idle-timeout", str(idle_timeout)],
+        env=env,
+    )
+    sock_path = get_socket_path("app_mod:app")
+    deadline = time.monotonic() + 10
+    while not sock_path.exists():
+        assert time.monotonic() < deadline, "server didn't start"
+        time.sleep(0.05)
+    return proc
+
+
+def run_client(env: Dict[str, str], args: List[str], stdin: str = ""):
+    return subprocess.run(
+        [sys.executable, "-c", CLIENT, *args],
+        env=env,
+        input=stdin,
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+
+
+def test_run_in_process_without_server(env: Dict[str, str]):
+    r = run_client(env, ["local"], stdin="data")
+
+    assert r.returncode == 0, r.stderr
+    assert r.stdout.startswith("local pid=")
+    assert r.stderr == "stdin=data\n"
+
+
+def test_serve_commands(env: Dict[str, str], server: "subprocess.Popen[bytes]"):
+    first = run_client(env, ["first"], stdin="data")
+    second = run_client(env, ["fail"], stdin="more")
+    env["APP_ENV"] = "test"
+    third = run_client(env, ["third"])
+
+    assert first.returncode == 0, first.stderr
+    assert first.stdout == f"first pid={server.pid} calls=1 env=None\n"
+    assert first.stderr == "stdin=data\n"
+    assert second.returncode == 3
+    assert second.stderr == "stdin=more\n"
+    # process scoped dependency is called once for all clients
+    assert third.stdout == f"third pid={server.pid} calls=1 env=test\n"
+
+
+def test_exit_on_idle_timeout(env: Dict[str, str]):
+    proc = start_server(env, idle_timeout=0.2)
+
+    assert proc.wait(timeout=10) == 0
+    assert not get_socket_path("app_mod:app").exists()
+
+
+def test_restart_on_source_change(
+    tmp_path: Path, env: Dict[str, str], server: "subprocess.Popen[bytes]"
+):
+    module = tmp_path / "app_mod.py"
+    mtime = module.stat().st_mtime + 10
+    os.utime(module, (mtime, mtime))
+
+    r = run_client(env, ["changed"])
+
+    assert r.returncode == 0, r.stderr
+    assert f"pid={server.pid}" not in r.stdout
+    assert server.wait(timeout=10) == 0
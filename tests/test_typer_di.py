@@ -1,3 +1,6 @@
+import sys
+import threading
+from pathlib import Path
 from typing import List
 from unittest import mock
 
@@ -196,3 +199,327 @@ class TestReuseDependency:
         first_mock.assert_called_once_with(opt="hello")
         second_mock.assert_called_once_with(first="first")
         command_mock.assert_called_once_with(first="first", second="second")
+
+
+class TestLazyCommands:
+    @pytest.fixture
+    def wrapper_spy(self, monkeypatch: pytest.MonkeyPatch) -> mock.Mock:
+        from typer_di import _typer_di
+
+        spy = mock.Mock(name="create_di_wrapper", wraps=_typer_di.create_di_wrapper)
+        monkeypatch.setattr(_typer_di, "create_di_wrapper", spy)
+        return spy
+
+    @pytest.fixture
+    def command_mock(self) -> mock.Mock:
+        return mock.Mock(name="command_mock")
+
+    @pytest.fixture
+    def app(self, wrapper_spy: mock.Mock, command_mock: mock.Mock) -> TyperDI:
+        app = TyperDI(lazy=True)
+
+        def get_config(x: Annotated[str, typer.Option("--config")]):
+            return [x]
+
+        @app.command("first")
+        def cmd_first(cfg=Depends(get_config)):
+            """First command."""
+            command_mock(cfg=cfg)
+
+        @app.command("second")
+        def cmd_second(cfg=Depends(get_config)):
+            command_mock(cfg=cfg)
+
+        return app
+
+    def test_dont_compile_on_registration(self, app: TyperDI, wrapper_spy: mock.Mock):
+        wrapper_spy.assert_not_called()
+
+    def test_compile_only_invoked_command(
+        self, app: TyperDI, wrapper_spy: mock.Mock, command_mock: mock.Mock
+    ):
+        r = CliRunner().invoke(app, "first --config test/path")
+
+        assert r.exit_code == 0
+        command_mock.assert_called_once_with(cfg=["test/path"])
+        assert [c.args[0].__name__ for c in wrapper_spy.call_args_list] == ["cmd_first"]
+
+    def test_list_commands_without_compilation(
+        self, app: TyperDI, wrapper_spy: mock.Mock
+    ):
+        r = CliRunner().invoke(app, "--help")
+
+        assert r.exit_code == 0
+        assert_words_in_message("first First command.", r.output, require_same_line=True)
+        wrapper_spy.assert_not_called()
+
+    def test_show_option_in_command_help(self, app: TyperDI):
+        r = CliRunner().invoke(app, "second --help")
+
+        assert r.exit_code == 0
+        assert_words_in_message("--config TEXT", r.output, require_same_line=True)
+
+    def test_return_untouched_func(self):
+        app = TyperDI(lazy=True)
+
+        def func():
+            ...
+
+        assert app.command()(func) is func
+
+
+class TestAsyncCommands:
+    @pytest.fixture
+    def command_mock(self) -> mock.Mock:
+        return mock.Mock(name="command_mock")
+
+    @pytest.fixture
+    def app(self, command_mock: mock.Mock) -> TyperDI:
+        app = TyperDI()
+
+        async def get_config(x: Annotated[str, typer.Option("--config")]):
+            return [x]
+
+        @app.command()
+        async def command(cfg=Depends(get_config)):
+            command_mock(cfg=cfg)
+
+        return app
+
+    def test_run_async_command(self, app: TyperDI, command_mock: mock.Mock):
+        r = CliRunner().invoke(app, "--config test/path")
+
+        assert r.exit_code == 0
+        command_mock.assert_called_once_with(cfg=["test/path"])
+
+
+class TestParallelApp:
+    def test_run_dependencies_in_threads(self):
+        barrier = threading.Barrier(2, timeout=5)
+        command_mock = mock.Mock(name="command_mock")
+
+        def get_first(first: Annotated[str, typer.Option("--first")]):
+            barrier.wait()
+            return first
+
+        def get_second(second: Annotated[str, typer.Option("--second")]):
+            barrier.wait()
+            return second
+
+        app = TyperDI(parallel=True)
+
+        @app.command()
+        def command(x=Depends(get_first), y=Depends(get_second)):
+            command_mock(x=x, y=y)
+
+        r = CliRunner().invoke(app, "--first a --second b")
+
+        assert r.exit_code == 0
+        command_mock.assert_called_once_with(x="a", y="b")
+
+
+ConfigOption = Annotated[str, typer.Option("--config")]
+
+
+class TestDependencyOverrides:
+    @pytest.fixture
+    def command_mock(self) -> mock.Mock:
+        return mock.Mock(name="command_mock")
+
+    @staticmethod
+    def get_config(x: ConfigOption):
+        return [x]
+
+    @pytest.fixture
+    def app(self, command_mock: mock.Mock) -> TyperDI:
+        app = TyperDI()
+
+        @app.command()
+        def command(cfg=Depends(self.get_config)):
+            command_mock(cfg=cfg)
+
+        return app
+
+    def test_swap_callback_in_place(self, app: TyperDI, command_mock: mock.Mock):
+        wrapper = app.registered_commands[0].callback
+
+        def fake_config(x: ConfigOption):
+            return ["fake", x]
+
+        app.override_dependency(self.get_config, fake_config)
+        r = CliRunner().invoke(app, "--config test/path")
+
+        assert r.exit_code == 0
+        assert app.registered_commands[0].callback is wrapper
+        command_mock.assert_called_once_with(cfg=["fake", "test/path"])
+
+    def test_rebuild_wrapper_with_other_params(
+        self, app: TyperDI, command_mock: mock.Mock
+    ):
+        def fake_config(y: Annotated[int, typer.Option("--fake")]):
+            return [y]
+
+        app.override_dependency(self.get_config, fake_config)
+        r = CliRunner().invoke(app, "--help")
+
+        assert r.exit_code == 0
+        assert_words_in_message("--fake INTEGER", r.output, require_same_line=True)
+        assert "--config" not in r.output
+
+        r = CliRunner().invoke(app, "--fake 3")
+
+        assert r.exit_code == 0
+        command_mock.assert_called_once_with(cfg=[3])
+
+    def test_reset_overrides(self, app: TyperDI, command_mock: mock.Mock):
+        app.override_dependency(self.get_config, lambda: ["fake"])
+        app.reset_dependency_overrides()
+        r = CliRunner().invoke(app, "--config test/path")
+
+        assert r.exit_code == 0
+        assert not app.dependency_overrides
+        command_mock.assert_called_once_with(cfg=["test/path"])
+
+    def test_override_in_lazy_sub_app(self, command_mock: mock.Mock):
+        app = TyperDI()
+        sub_app = TyperDI(lazy=True)
+        app.add_typer(sub_app, name="sub")
+
+        @sub_app.command()
+        def command(cfg=Depends(self.get_config)):
+            command_mock(cfg=cfg)
+
+        app.override_dependency(self.get_config, lambda: ["fake"])
+        r = CliRunner().invoke(app, "sub command")
+
+        assert r.exit_code == 0
+        assert sub_app.dependency_overrides == {self.get_config: mock.ANY}
+        command_mock.assert_called_once_with(cfg=["fake"])
+
+
+LAZY_SUB_APP_SOURCE = """
+import typer
+
+from typer_di import Depends, TyperDI
+
+
+def get_name(name: str = typer.Option("world", "--name")):
+    return name
+
+
+app = TyperDI()
+
+
+@app.command()
+def hello(name=Depends(get_name)):
+    typer.echo(f"hello {name}")
+
+
+@app.command()
+def bye():
+    typer.echo("bye")
+"""
+
+
+class TestLazySubApps:
+    @pytest.fixture
+    def app(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> TyperDI:
+        (tmp_path / "lazy_sub_app.py").write_text(LAZY_SUB_APP_SOURCE)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.delitem(sys.modules, "lazy_sub_app", raising=False)
+
+        app = TyperDI()
+        app.add_typer("lazy_sub_app:app", name="tools", help="Lazy tools.")
+
+        @app.command()
+        def other():
+            typer.echo("other")
+
+        return app
+
+    def test_dont_import_for_other_commands(self, app: TyperDI):
+        r = CliRunner().invoke(app, "other")
+        assert r.exit_code == 0, r.output
+
+        r = CliRunner().invoke(app, "--help")
+        assert r.exit_code == 0, r.output
+        assert_words_in_message("tools Lazy tools.", r.output, require_same_line=True)
+
+        assert "lazy_sub_app" not in sys.modules
+
+    def test_import_on_invoke(self, app: TyperDI):
+        r = CliRunner().invoke(app, "tools hello --name typer")
+
+        assert r.exit_code == 0, r.output
+        assert r.output == "hello typer\n"
+        assert "lazy_sub_app" in sys.modules
+
+    def test_show_sub_app_help(self, app: TyperDI):
+        r = CliRunner().invoke(app, "tools --help")
+
+        assert r.exit_code == 0, r.output
+        assert_words_in_message("hello", r.output)
+        assert_words_in_message("bye", r.output)
+
+    def test_apply_dependency_overrides(self, app: TyperDI):
+        import lazy_sub_app  # type: ignore[import-not-found]
+
+        app.override_dependency(lazy_sub_app.get_name, lambda: "fake")
+        r = CliRunner().invoke(app, "tools hello")
+
+        assert r.exit_code == 0, r.output
+        assert r.output == "hello fake\n"
+
+    def test_reset_dependency_overrides(self, app: TyperDI):
+        import lazy_sub_app  # type: ignore[import-not-found]
+
+        app.override_dependency(lazy_sub_app.get_name, lambda: "fake")
+        CliRunner().invoke(app, "tools hello")
+        app.reset_dependency_overrides()
+        r = CliRunner().invoke(app, "tools hello")
+
+        assert r.exit_code == 0, r.output
+        assert r.output == "hello world\n"
+        assert not lazy_sub_app.app.dependency_overrides
+
+    def test_require_name(self):
+        with pytest.raises(TypeError, match="pass its `name`"):
+            TyperDI().add_typer("lazy_sub_app:app")
+
+
+def test_memory_per_command():
+    import gc
+    import tracemalloc
+
+    def get_verbose(verbose: Annotated[bool, typer.Option("--verbose")] = False):
+        return verbose
+
+    def get_config(path: str = "cfg.toml", verbose=Depends(get_verbose)):
+        return path
+
+    commands = []
+    for idx in range(200):
+
+        def command(name: str, cfg=Depends(get_config), verbose=Depends(get_verbose)):
+            ...
+
+        command.__name__ = command.__qualname__ = f"command_{idx}"
+        commands.append(command)
+
+    app = TyperDI()
+    app.command()(commands[0])  # warm up shared dependencies
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for command in commands[1:]:
+            app.command()(command)
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    allocated = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    # typer registration included
+    assert allocated / (len(commands) - 1) < 5 * 1024